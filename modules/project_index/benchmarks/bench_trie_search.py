@@ -0,0 +1,72 @@
+"""
+Compares trie_search.Trie and trie_search.RadixTrie on a synthetic vocabulary of
+shot and task names.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_trie_search.py --names 200000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from project_index import trie_search
+
+TASKS = ["anim", "comp", "fx", "fx_destruction", "fx_sim", "layout", "lgt", "model", "rig", "surf"]
+
+
+def make_names(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        seq, shot = rng.randrange(1000), rng.randrange(10000)
+        names.add(f"seq{seq:03d}_sh{shot:04d}_{rng.choice(TASKS)}")
+    return sorted(names, key=lambda _: rng.random())
+
+
+def build(trie_class, names: list[str]) -> tuple[object, float, int]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    trie = trie_class()
+    for name in names:
+        trie.insert(name)
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return trie, elapsed, memory
+
+
+def lookup(trie, prefixes: list[str], repeat: int) -> tuple[float, int]:
+    found = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for prefix in prefixes:
+            found += len(trie.autocomplete(prefix))
+    return (time.perf_counter() - start) / (repeat * len(prefixes)), found
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Trie vs RadixTrie benchmark")
+    parser.add_argument("--names", type=int, default=100000, help="Number of names to insert")
+    parser.add_argument("--repeat", type=int, default=5, help="Lookup repetitions")
+    namespace = parser.parse_args(args)
+
+    names = make_names(namespace.names)
+    rng = random.Random(1)
+    # Short prefixes return thousands of names, long ones a handful
+    prefixes = [name[:length] for name in rng.sample(names, 200) for length in (4, 9, 14)]
+
+    print(f"{len(names)} names, {len(prefixes)} prefixes")
+    print(f"{'':10} {'build (s)':>10} {'memory (MB)':>12} {'lookup (ms)':>12} {'results':>10}")
+    for trie_class in (trie_search.Trie, trie_search.RadixTrie):
+        trie, build_time, memory = build(trie_class, names)
+        lookup_time, found = lookup(trie, prefixes, namespace.repeat)
+        print(f"{trie_class.__name__:10} {build_time:10.2f} {memory / 2 ** 20:12.1f} "
+              f"{lookup_time * 1000:12.3f} {found:10}")
+        del trie
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@ name = "project_index"
 version = "1.0.0"
 build_command = "python {root}/build.py {install}"
 
-requires = ["PySide6_Addons", "~usd"]
+requires = ["PySide6_Addons", "~usd", "tracepath"]
 
 def commands():
     global env
@@ -12,3 +12,4 @@ def commands():
     env.STYLE_PROJECT_INDEX.set("{root}/resources")
     alias("trace_project", "python -m project_index.trace_project_index_ui")
     alias("trace_reset", "python -m project_index.trace_reset_ui")
+    alias("trace_index", "python -m project_index.cli_project_index")
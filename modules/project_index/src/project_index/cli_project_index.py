@@ -0,0 +1,124 @@
+import argparse
+import logging
+import os
+import threading
+from pathlib import Path
+
+from project_index import index_cache, index_store, reconcile, watcher
+
+
+def migrate(namespace):
+    paths = index_store.get_index_paths()
+    db_path = Path(namespace.db) if namespace.db else paths["sqlite"]
+    if db_path.exists() and not namespace.force:
+        logging.error(f"SQLite index already exists: {db_path}. Use --force to replace its content.")
+        return 1
+    store = index_store.migrate_json_to_sqlite(namespace.json or paths["json"], db_path)
+    store.close()
+    return 0
+
+
+def export(namespace):
+    paths = index_store.get_index_paths()
+    store = index_store.get_index_store(backend=namespace.backend)
+    index_store.export_json(store, namespace.output or paths["json"])
+    return 0
+
+
+def compact(namespace):
+    store = index_store.get_index_store(backend="json")
+    store.compact()
+    logging.info(f"Compacted project index journal into {store.json_path}")
+    return 0
+
+
+def reconcile_index(namespace):
+    projects_path = namespace.projects_path or os.getenv("PR_PROJECTS_PATH")
+    if not projects_path:
+        logging.error("PR_PROJECTS_PATH is not set. Use --projects-path.")
+        return 1
+    project_index = index_cache.get_project_index(backend=namespace.backend)
+    report = reconcile.reconcile(project_index, projects_path, namespace.show, namespace.workers)
+
+    for path in report.missing:
+        print(f"missing  {path}")
+    for path in report.orphans:
+        print(f"orphan   {path}")
+    for path in report.unreadable:
+        print(f"skipped  {path}")
+    logging.info(f"Scanned {report.scanned} folders: {len(report.missing)} missing, {len(report.orphans)} orphan(s), "
+                 f"{len(report.unreadable)} skipped")
+
+    if namespace.repair:
+        try:
+            reconcile.repair(project_index, report, projects_path)
+        except RuntimeError as e:
+            logging.error(str(e))
+            return 1
+        logging.info("Project index repaired")
+        return 0
+    return 1 if report.missing or report.orphans else 0
+
+
+def watch(namespace):
+    projects_path = namespace.projects_path or os.getenv("PR_PROJECTS_PATH")
+    if not projects_path:
+        logging.error("PR_PROJECTS_PATH is not set. Use --projects-path.")
+        return 1
+    project_index = index_cache.get_project_index()
+    backend = watcher.create_backend(polling=namespace.poll, interval=namespace.interval)
+    project_watcher = watcher.ProjectWatcher(projects_path, namespace.show or project_index.projects(), backend)
+    project_watcher.subscribe(watcher.index_updater(project_index))
+    project_watcher.subscribe(lambda event: logging.info(f"{event.kind} {event.level}: {'/'.join(event.parts)}"))
+    project_watcher.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        project_watcher.stop()
+    return 0
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Project index maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Migrate trace_project_index.json into SQLite")
+    migrate_parser.add_argument("--json", help="Source JSON index (defaults to the framework config)")
+    migrate_parser.add_argument("--db", help="Target SQLite database (defaults to the framework config)")
+    migrate_parser.add_argument("--force", action="store_true", help="Replace an existing SQLite index")
+    migrate_parser.set_defaults(func=migrate)
+
+    export_parser = subparsers.add_parser("export", help="Export the project index in the JSON format")
+    export_parser.add_argument("--backend", help="Backend to export from (defaults to PR_PROJECT_INDEX_BACKEND)")
+    export_parser.add_argument("--output", help="Output JSON path (defaults to the framework config)")
+    export_parser.set_defaults(func=export)
+
+    compact_parser = subparsers.add_parser("compact", help="Fold the JSON index journal into a fresh snapshot")
+    compact_parser.set_defaults(func=compact)
+
+    reconcile_parser = subparsers.add_parser("reconcile", help="Compare the project index with the folders on disk")
+    reconcile_parser.add_argument("--show", nargs="+", help="Projects to check (defaults to every indexed project)")
+    reconcile_parser.add_argument("--projects-path", help="Projects root (defaults to PR_PROJECTS_PATH)")
+    reconcile_parser.add_argument("--workers", type=int, default=reconcile.DEFAULT_WORKERS,
+                                  help="Number of concurrent directory listings")
+    reconcile_parser.add_argument("--backend", help="Backend to check (defaults to PR_PROJECT_INDEX_BACKEND)")
+    reconcile_parser.add_argument("--repair", action="store_true",
+                                  help="Add orphan folders to the index and remove missing ones")
+    reconcile_parser.set_defaults(func=reconcile_index)
+
+    watch_parser = subparsers.add_parser("watch", help="Keep the project index in sync with the folders on disk")
+    watch_parser.add_argument("--show", nargs="+", help="Projects to watch (defaults to every indexed project)")
+    watch_parser.add_argument("--projects-path", help="Projects root (defaults to PR_PROJECTS_PATH)")
+    watch_parser.add_argument("--poll", action="store_true", help="Poll the folders instead of using inotify")
+    watch_parser.add_argument("--interval", type=float, default=watcher.POLL_INTERVAL,
+                              help="Polling interval in seconds")
+    watch_parser.set_defaults(func=watch)
+
+    namespace = parser.parse_args(args)
+    return namespace.func(namespace)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
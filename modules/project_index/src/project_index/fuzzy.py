@@ -0,0 +1,171 @@
+import difflib
+import heapq
+import math
+from collections import Counter
+
+# Postings read before the candidate set of a lookup is closed
+CANDIDATE_BUDGET = 500
+# Vocabularies up to this size (DCC names) are matched with a full difflib pass
+SMALL_VOCABULARY = 200
+
+
+def trigrams(word: str) -> set[str]:
+    """
+    Trigrams of a lower-cased word padded with two leading and one trailing space,
+    so short words and word starts get their own trigrams.
+    """
+    padded = f"  {word.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Typo-tolerant lookup over a vocabulary (DCC, task, shot names...).
+
+    Every word is indexed by its trigrams. A lookup only reads the posting lists of the
+    query trigrams, starting with the rarest ones, so its cost follows the number of
+    words sharing rare trigrams with the query instead of the vocabulary size. Words are
+    matched case-insensitively and returned with their original case.
+
+    Usage:
+        index = TrigramIndex(["houdini", "maya", "nuke"])
+        index.suggest("houdni")  # ["houdini"]
+
+    """
+
+    def __init__(self, words=()):
+        self._postings = {}  # trigram -> lower-cased words
+        self._sizes = {}  # lower-cased word -> number of trigrams
+        self._words = {}  # lower-cased word -> original word
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self._words
+
+    def add(self, word: str) -> None:
+        key = word.lower()
+        if key in self._words:
+            return
+        grams = trigrams(key)
+        self._words[key] = word
+        self._sizes[key] = len(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, word: str) -> None:
+        key = word.lower()
+        if self._words.pop(key, None) is None:
+            return
+        del self._sizes[key]
+        for gram in trigrams(key):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+
+    def candidates(self, query: str, min_similarity: float = 0.3, budget: int = CANDIDATE_BUDGET) -> dict[str, float]:
+        """
+        Returns the words similar to the query with their trigram (Dice) similarity.
+
+        Posting lists are read from the rarest trigram to the most frequent one. New
+        candidates are only taken from the rare lists, until 'budget' postings were read
+        or until every word able to reach min_similarity is guaranteed to be found.
+        Frequent trigrams (common prefixes and suffixes such as "_fx") then only add to
+        the counts of the candidates, so their long lists are never scanned in full.
+
+        Args:
+            query (str): Text to look up.
+            min_similarity (float): Minimum Dice coefficient between trigram sets (0-1).
+            budget (int): Number of postings read before the candidate set is closed.
+
+        Return:
+            dict[str, float]: Lower-cased word -> similarity.
+
+        """
+        grams = trigrams(query)
+        # A word sharing 'needed' trigrams is in at least one of the len - needed + 1 rarest lists
+        needed = max(1, math.ceil(min_similarity * len(grams) / (2 - min_similarity)))
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        split = len(postings) - needed + 1
+
+        counts = Counter()
+        read = 0
+        for i, posting in enumerate(postings):
+            if i < split and (not counts or read + len(posting) <= budget):
+                counts.update(posting)
+                read += len(posting)
+            elif len(posting) < len(counts):
+                for word in posting:
+                    if word in counts:
+                        counts[word] += 1
+            else:
+                for word in counts:
+                    if word in posting:
+                        counts[word] += 1
+
+        result = {}
+        for word, shared in counts.items():
+            similarity = 2 * shared / (len(grams) + self._sizes[word])
+            if similarity >= min_similarity:
+                result[word] = similarity
+        return result
+
+    def containing(self, text: str) -> list[str]:
+        """
+        Returns the words containing the text (case-insensitive), using the intersection
+        of the posting lists of its trigrams.
+        """
+        text = text.lower()
+        if len(text) < 3:
+            return [word for word in self._words if text in word]
+        postings = sorted((self._postings.get(text[i:i + 3], set()) for i in range(len(text) - 2)), key=len)
+        words = set(postings[0])
+        for posting in postings[1:]:
+            if not words:
+                break
+            words &= posting
+        return [word for word in words if text in word]
+
+    def suggest(self, query: str, limit: int = 1, cutoff: float = 0.6) -> list[str]:
+        """
+        Returns the closest words to the query, best first.
+
+        Small vocabularies, and lookups the trigram index has no candidate for, go through
+        difflib.get_close_matches over every word, so their results are exactly difflib's.
+        In larger vocabularies the best trigram candidates are ranked with difflib's ratio;
+        short words with transposed letters share few trigrams and may be missed there.
+
+        Args:
+            query (str): Possibly misspelled word.
+            limit (int): Maximum number of suggestions.
+            cutoff (float): Minimum difflib ratio (0-1).
+
+        Return:
+            list[str]: Suggested words with their original case.
+
+        """
+        query = query.lower()
+        candidates = None
+        if len(self._words) > SMALL_VOCABULARY:
+            # Short words share few trigrams even with a single typo
+            candidates = self.candidates(query, min_similarity=0.2 if len(query) < 4 else 0.3)
+        if not candidates:
+            matches = difflib.get_close_matches(query, list(self._words), n=limit, cutoff=cutoff)
+            return [self._words[word] for word in matches]
+        best = heapq.nlargest(max(limit * 8, 16), candidates, key=candidates.get)
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(query)
+        scored = []
+        for word in best:
+            matcher.set_seq1(word)
+            if matcher.real_quick_ratio() >= cutoff and matcher.quick_ratio() >= cutoff:
+                ratio = matcher.ratio()
+                if ratio >= cutoff:
+                    scored.append((ratio, word))
+        return [self._words[word] for _, word in heapq.nlargest(limit, scored)]
@@ -0,0 +1,183 @@
+import os
+import threading
+from typing import NamedTuple
+
+from project_index import index_store
+
+
+class IndexNode(NamedTuple):
+    """
+    Flat record of a project index node.
+    """
+    path: str  # "project/group/item/task"
+    name: str
+    type: str  # one of index_store.LEVELS
+    parent: str  # parent path, "" for projects
+
+
+def join_path(*parts) -> str:
+    return "/".join(parts)
+
+
+class ProjectIndex:
+    """
+    Process-wide, read-through cache of the project index.
+
+    The nested index is loaded once and kept in memory, together with a flat map from
+    "project/group/item/task" paths to node records and a parent -> children adjacency
+    map, so existence checks and child listings are dictionary lookups instead of
+    walks over the nested data. Every access compares the
+    signature (mtime and size) of the files backing the index with the one taken at
+    load time, and reloads only when another process changed them. Mutations are
+    written through the backend and invalidate the cached copy.
+
+    Use get_project_index() rather than creating instances, so every consumer in the
+    process shares one cached copy.
+    """
+
+    def __init__(self, store: index_store.IndexStore):
+        self.store = store
+        self._data = None
+        self._signature = None
+        self._nodes = {}
+        self._children = {}
+        self._lock = threading.RLock()
+
+    # Loading
+
+    def _refresh(self) -> None:
+        signature = self.store.signature()
+        if self._data is not None and signature == self._signature:
+            return
+        self._data = self.store.to_dict()
+        self._signature = signature
+
+        self._nodes = {}
+        self._children = {"": []}
+        for parts in index_store.iter_index_paths(self._data):
+            path = join_path(*parts)
+            parent = join_path(*parts[:-1])
+            self._nodes[path] = IndexNode(path, parts[-1], index_store.LEVELS[len(parts) - 1], parent)
+            self._children.setdefault(parent, []).append(parts[-1])
+            self._children.setdefault(path, [])
+
+    def reload(self) -> None:
+        """
+        Drops the cached copy, the next access loads the index again.
+        """
+        with self._lock:
+            self._data = None
+
+    def data(self) -> dict:
+        """
+        Returns the cached nested index data. Must be treated as read-only.
+        """
+        with self._lock:
+            self._refresh()
+            return self._data
+
+    # Path lookups
+
+    def node(self, path: str) -> IndexNode | None:
+        """
+        Returns the record of the node at "project/group/item/task" path, or None.
+        """
+        with self._lock:
+            self._refresh()
+            return self._nodes.get(path)
+
+    def children(self, path: str = "") -> list[str]:
+        """
+        Returns the names of the children of the node at path ("" for the projects).
+        """
+        with self._lock:
+            self._refresh()
+            return list(self._children.get(path, ()))
+
+    def exists(self, *parts) -> bool:
+        return bool(parts) and self.node(join_path(*parts)) is not None
+
+    # Typed accessors
+
+    def projects(self) -> list[str]:
+        return self.children()
+
+    def groups(self, project: str) -> list[str]:
+        return self.children(join_path(project))
+
+    def items(self, project: str, group: str) -> list[str]:
+        return self.children(join_path(project, group))
+
+    def tasks(self, project: str, group: str, item: str) -> list[str]:
+        return self.children(join_path(project, group, item))
+
+    # Mutations
+
+    def _write(self, method, *args) -> None:
+        with self._lock:
+            try:
+                method(*args)
+            finally:
+                self._data = None
+
+    def add(self, *parts) -> None:
+        self._write(self.store.add, *parts)
+
+    def remove(self, *parts) -> None:
+        self._write(self.store.remove, *parts)
+
+    def remove_many(self, paths) -> list[str]:
+        """
+        Removes the nodes at the given "project/group/item/task" paths in one index transaction.
+
+        Paths that are not in the index, or that sit below another removed path, are skipped,
+        so only the affected subtrees are touched.
+
+        Return:
+            list[str]: The paths actually removed.
+
+        """
+        with self._lock:
+            self._refresh()
+            to_remove = {}
+            for path in sorted(set(paths), key=lambda p: p.count("/")):
+                parts = path.split("/")
+                ancestors = (join_path(*parts[:depth]) for depth in range(1, len(parts)))
+                if path in self._nodes and not any(ancestor in to_remove for ancestor in ancestors):
+                    to_remove[path] = tuple(parts)
+            if to_remove:
+                self._write(self.store.remove_many, list(to_remove.values()))
+        return list(to_remove)
+
+    def rename(self, parts: tuple, new_name: str) -> None:
+        self._write(self.store.rename, parts, new_name)
+
+    def set_project(self, project: str, project_data: dict) -> None:
+        self._write(self.store.set_project, project, project_data)
+
+    def update(self, update) -> dict:
+        """
+        Atomic read-modify-write of the whole index, see IndexStore.update.
+        """
+        with self._lock:
+            try:
+                return self.store.update(update)
+            finally:
+                self._data = None
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_project_index(framework: str | None = None, backend: str | None = None) -> ProjectIndex:
+    """
+    Returns the shared ProjectIndex for the framework config and backend, creating it on first use.
+    """
+    backend = (backend or os.getenv(index_store.INDEX_BACKEND_ENV) or "json").lower()
+    paths = index_store.get_index_paths(framework)
+    key = (backend, str(paths["json"]))
+    with _instances_lock:
+        if key not in _instances:
+            _instances[key] = ProjectIndex(index_store.get_index_store(framework, backend))
+        return _instances[key]
@@ -0,0 +1,333 @@
+try:
+    from PySide6 import QtCore
+except ImportError:
+    from PySide2 import QtCore
+
+from project_index import index_cache, search_index
+
+# Maximum depth of the Project -> Group -> Item -> Task hierarchy
+MAX_TREE_DEPTH = 4
+
+
+class TreeNode:
+    """
+    Node of the Project Index tree model.
+
+    Nodes loaded from the project index keep their index path and load their own
+    children only when they are expanded. Nodes created in the UI have no index path
+    and no children to fetch.
+    """
+    __slots__ = ("name", "parent", "children", "index_path", "fetched", "removable", "row")
+
+    def __init__(self, name: str, parent=None, index_path: tuple | None = None, removable: bool = False):
+        self.name = name
+        self.parent = parent
+        self.children = []
+        self.index_path = index_path
+        self.fetched = index_path is None
+        self.removable = removable
+        self.row = 0  # Position under the parent, kept up to date by the model
+
+    def depth(self) -> int:
+        depth, node = 0, self
+        while node.parent is not None:
+            depth += 1
+            node = node.parent
+        return depth
+
+    def type(self) -> str:
+        depth = self.depth()
+        return "task" if depth == 4 else "item" if depth == 3 else "core"
+
+    def path_parts(self) -> list[str]:
+        parts, node = [], self
+        while node.parent is not None:
+            parts.append(node.name)
+            node = node.parent
+        return parts[::-1]
+
+
+class ProjectIndexModel(QtCore.QAbstractItemModel):
+    """
+    Tree model over the project index.
+
+    Only the projects are created up front. The children of a node are created on
+    demand through canFetchMore/fetchMore when the view expands it, so memory use and
+    startup time follow what is visible rather than the size of the index.
+
+    When a search index is given, nodes added, taken or renamed through the model are
+    applied to it, so it always matches the tree.
+    """
+    name_changed = QtCore.Signal(object, str)  # node, old name
+
+    def __init__(self, project_index: index_cache.ProjectIndex, header: str = "Projects:", parent=None,
+                 search: search_index.SearchIndex | None = None):
+        super(ProjectIndexModel, self).__init__(parent)
+        self.project_index = project_index
+        self.header = header
+        self.search = search
+        self.root = TreeNode("", index_path=())
+
+    # Node helpers
+
+    def node_from_index(self, index: QtCore.QModelIndex) -> TreeNode:
+        return index.internalPointer() if index.isValid() else self.root
+
+    def index_from_node(self, node: TreeNode) -> QtCore.QModelIndex:
+        if node is self.root or node.parent is None:
+            return QtCore.QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def top_level_node(self, name: str) -> TreeNode | None:
+        self.fetch_node(self.root)
+        for node in self.root.children:
+            if node.name == name:
+                return node
+        return None
+
+    def node_at(self, path: str) -> TreeNode | None:
+        """
+        Returns the node at a "project/group/item/task" path, fetching the nodes along the way.
+        """
+        node = self.root
+        for name in path.split("/"):
+            self.fetch_node(node)
+            node = next((child for child in node.children if child.name == name), None)
+            if node is None:
+                return None
+        return node
+
+    def is_attached(self, node: TreeNode) -> bool:
+        """
+        Whether a node is still part of the tree (not taken out by a delete).
+        """
+        while node.parent is not None:
+            if node.row >= len(node.parent.children) or node.parent.children[node.row] is not node:
+                return False
+            node = node.parent
+        return node is self.root
+
+    def fetch_node(self, node: TreeNode, recursive: bool = False) -> None:
+        """
+        Loads the children of a node (and optionally of the whole subtree) from the project index.
+        """
+        if not node.fetched:
+            names = self.project_index.children("/".join(node.index_path))
+            node.fetched = True
+            if names:
+                self.beginInsertRows(self.index_from_node(node), len(node.children),
+                                     len(node.children) + len(names) - 1)
+                node.children.extend(TreeNode(name, node, node.index_path + (name,)) for name in names)
+                self._update_rows(node)
+                self.endInsertRows()
+        if recursive:
+            for child in node.children:
+                self.fetch_node(child, recursive=True)
+
+    @staticmethod
+    def _update_rows(parent: TreeNode, start: int = 0) -> None:
+        for row in range(start, len(parent.children)):
+            parent.children[row].row = row
+
+    def node_paths(self, node: TreeNode):
+        """
+        Yields the path of a node and of every node below it, including the ones not fetched yet.
+        """
+        stack = [(index_cache.join_path(*node.path_parts()), node, node.index_path)]
+        while stack:
+            path, child, index_path = stack.pop()
+            yield path
+            if child is not None and child.fetched:
+                stack.extend((index_cache.join_path(path, c.name), c, c.index_path) for c in child.children)
+            elif index_path is not None:
+                # Not fetched yet, the children are the ones in the project index
+                stack.extend((index_cache.join_path(path, name), None, index_path + (name,))
+                             for name in self.project_index.children("/".join(index_path)))
+
+    def insert_node(self, parent: TreeNode, node: TreeNode, row: int | None = None) -> QtCore.QModelIndex:
+        """
+        Inserts a node (new or previously taken) under the parent and returns its index.
+        """
+        self.fetch_node(parent)
+        row = len(parent.children) if row is None else row
+        self.beginInsertRows(self.index_from_node(parent), row, row)
+        node.parent = parent
+        parent.children.insert(row, node)
+        self._update_rows(parent, row)
+        self.endInsertRows()
+        if self.search is not None:
+            for path in self.node_paths(node):
+                self.search.add(path)
+        return self.index_from_node(node)
+
+    def take_node(self, node: TreeNode) -> int:
+        """
+        Removes a node from its parent, keeping the node object so it can be inserted again (undo).
+        """
+        parent = node.parent
+        row = node.row
+        if self.search is not None:
+            self.search.remove(index_cache.join_path(*node.path_parts()))
+        self.beginRemoveRows(self.index_from_node(parent), row, row)
+        parent.children.pop(row)
+        self._update_rows(parent, row)
+        self.endRemoveRows()
+        return row
+
+    def set_name(self, node: TreeNode, name: str) -> None:
+        """
+        Renames a node without emitting name_changed (used by validation and undo).
+        """
+        self._rename_search_path(node, name)
+        node.name = name
+        index = self.index_from_node(node)
+        self.dataChanged.emit(index, index)
+
+    def _rename_search_path(self, node: TreeNode, name: str) -> None:
+        if self.search is not None and name != node.name:
+            self.search.rename(index_cache.join_path(*node.path_parts()), name)
+
+    def set_removable(self, node: TreeNode, removable: bool) -> None:
+        node.removable = removable
+        index = self.index_from_node(node)
+        self.dataChanged.emit(index, index)
+
+    # QAbstractItemModel interface
+
+    def index(self, row, column, parent=QtCore.QModelIndex()):
+        parent_node = self.node_from_index(parent)
+        if not self.hasIndex(row, column, parent) or row >= len(parent_node.children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, parent_node.children[row])
+
+    def parent(self, index=QtCore.QModelIndex()):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.index_from_node(index.internalPointer().parent)
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node_from_index(parent).children)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QtCore.QModelIndex()):
+        node = self.node_from_index(parent)
+        if node.children:
+            return True
+        if node.fetched:
+            return False
+        return bool(self.project_index.children("/".join(node.index_path)))
+
+    def canFetchMore(self, parent):
+        return not self.node_from_index(parent).fetched
+
+    def fetchMore(self, parent):
+        self.fetch_node(self.node_from_index(parent))
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            return node.name
+        if role == QtCore.Qt.UserRole:
+            return {"removable": node.removable, "type": node.type()}
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        node = index.internalPointer()
+        old_name = node.name
+        if value == old_name:
+            return False
+        self._rename_search_path(node, value)
+        node.name = value
+        self.dataChanged.emit(index, index)
+        self.name_changed.emit(node, old_name)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+        if index.internalPointer().removable:
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.header
+        return None
+
+
+class IndexListModel(QtCore.QAbstractListModel):
+    """
+    Flat list model used by the Trace Reset columns (projects, groups, items, tasks, main USD versions).
+
+    Rows are (name, metadata) pairs. A name -> row map is kept next to the rows so a
+    selection can be restored by name without scanning the list.
+
+    Long lists can be loaded page by page: set_rows takes the first page and a function
+    returning the next one, which the view calls when it is scrolled to the end.
+    """
+
+    def __init__(self, parent=None):
+        super(IndexListModel, self).__init__(parent)
+        self._rows = []
+        self._row_by_name = {}
+        self._fetch_more = None
+
+    def set_rows(self, rows: list[tuple[str, dict]], fetch_more=None) -> None:
+        """
+        Replaces the model content in a single reset. 'fetch_more' returns the next rows,
+        an empty list once there are no more.
+        """
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._row_by_name = {name: row for row, (name, _) in enumerate(self._rows)}
+        self._fetch_more = fetch_more
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._fetch_more is not None
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if parent.isValid() or self._fetch_more is None:
+            return
+        rows = self._fetch_more()
+        if not rows:
+            self._fetch_more = None
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(rows) - 1)
+        for row, (name, metadata) in enumerate(rows, start):
+            self._rows.append((name, metadata))
+            self._row_by_name[name] = row
+        self.endInsertRows()
+
+    def clear(self) -> None:
+        self.set_rows([])
+
+    def row_of(self, name: str) -> int | None:
+        return self._row_by_name.get(name)
+
+    def index_of(self, name: str) -> QtCore.QModelIndex:
+        row = self.row_of(name)
+        return self.index(row) if row is not None else QtCore.QModelIndex()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        name, metadata = self._rows[index.row()]
+        if role == QtCore.Qt.DisplayRole:
+            return name
+        if role == QtCore.Qt.UserRole:
+            return metadata
+        return None
@@ -0,0 +1,644 @@
+import abc
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from tracepath import locking
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+# Project index node levels and the keys used for their children in trace_project_index.json
+LEVELS = ("project", "group", "item", "task")
+CHILD_KEYS = ("groups", "items", "tasks")
+
+INDEX_BACKEND_ENV = "PR_PROJECT_INDEX_BACKEND"
+# Set to 1 to use WAL journaling for the SQLite index, only safe when it lives on a local disk
+INDEX_WAL_ENV = "PR_PROJECT_INDEX_WAL"
+INDEX_JSON_NAME = "trace_project_index.json"
+INDEX_DB_NAME = "trace_project_index.db"
+
+# Journal size (in bytes) after which the JSON index journal is folded into a new snapshot
+COMPACT_THRESHOLD = 256 * 1024
+
+
+# Helpers to convert between the nested JSON format and index paths
+
+def iter_index_paths(data: dict, parts: tuple = ()):
+    """
+    Walk the nested project index dictionary and yield the path of every node.
+
+    Parents are always yielded before their children, so the result can be inserted
+    into any backend in order.
+
+    Args:
+        data (dict): Nested project index data, or a sub-dictionary of it.
+        parts (tuple): Path parts of the node that owns 'data'.
+
+    Return:
+        Iterator[tuple]: (project,), (project, group), (project, group, item) ... tuples.
+
+    """
+    if len(parts) > len(CHILD_KEYS):
+        return
+    children = data if not parts else data.get(CHILD_KEYS[len(parts) - 1], {})
+    for name, child in children.items():
+        path = parts + (name,)
+        yield path
+        if isinstance(child, dict):
+            yield from iter_index_paths(child, path)
+
+
+def build_index_dict(paths) -> dict:
+    """
+    Build the nested project index dictionary from an iterable of index paths.
+
+    Args:
+        paths (Iterable[tuple]): Index paths, parents before children.
+
+    Return:
+        dict: Data in the trace_project_index.json format.
+
+    """
+    data = {}
+    for path in paths:
+        node = data
+        for depth, name in enumerate(path):
+            if depth:
+                node = node.setdefault(CHILD_KEYS[depth - 1], {})
+            node = node.setdefault(name, {})
+        if len(path) < len(LEVELS):
+            node.setdefault(CHILD_KEYS[len(path) - 1], {})
+    return data
+
+
+def _check_path(parts: tuple) -> tuple:
+    parts = tuple(p for p in parts if p)
+    if not 1 <= len(parts) <= len(LEVELS):
+        raise ValueError(f"Invalid project index path: {'/'.join(parts) or '<empty>'}")
+    return parts
+
+
+class NodeExistsError(ValueError):
+    """
+    A node was renamed to the name of one of its siblings.
+    """
+
+
+def _node_exists_error(parts: tuple, new_name: str) -> NodeExistsError:
+    return NodeExistsError(f"Cannot rename {'/'.join(parts)}: '{new_name}' already exists")
+
+
+# Backends
+
+class IndexStore(abc.ABC):
+    """
+    Base class for the project index backends.
+
+    Every node is addressed by its path parts: project, group, item, task.
+    Backends have to implement the abstract primitives below, a backend missing one fails
+    when it is created rather than in the middle of an index write. The nested dictionary
+    format stays available through to_dict() for export and legacy consumers.
+    """
+
+    def projects(self) -> list[str]:
+        return self.children()
+
+    def groups(self, project: str) -> list[str]:
+        return self.children(project)
+
+    def items(self, project: str, group: str) -> list[str]:
+        return self.children(project, group)
+
+    def tasks(self, project: str, group: str, item: str) -> list[str]:
+        return self.children(project, group, item)
+
+    @abc.abstractmethod
+    def children(self, *parts) -> list[str]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def exists(self, *parts) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def add(self, *parts) -> None:
+        """
+        Adds a node, creating any missing parents along the way.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def remove(self, *parts) -> None:
+        """
+        Removes a node and everything below it. Missing nodes are ignored.
+        """
+        raise NotImplementedError
+
+    def remove_many(self, paths) -> None:
+        """
+        Removes several nodes (tuples of path parts) as one transaction.
+        """
+        for parts in paths:
+            self.remove(*parts)
+
+    @abc.abstractmethod
+    def rename(self, parts: tuple, new_name: str) -> None:
+        """
+        Renames a node in place, keeping everything below it.
+        Raises NodeExistsError if a sibling already has the new name.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set_project(self, project: str, project_data: dict) -> None:
+        """
+        Replaces the whole subtree of a project with the given nested data.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def update(self, update) -> dict:
+        """
+        Read-modify-write of the whole nested index as one atomic step.
+
+        Args:
+            update (callable): Called with the nested index data, modifies it in place.
+
+        Return:
+            dict: The updated index data.
+
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def to_dict(self) -> dict:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def signature(self) -> tuple:
+        """
+        Cheap stamp (file versions) of the files backing the index, changes whenever the index is written.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def load_dict(self, data: dict) -> None:
+        """
+        Replaces the whole index content with the given nested data.
+        """
+        raise NotImplementedError
+
+
+class IndexJournal:
+    """
+    Append-only log of project index mutations stored next to the JSON snapshot.
+
+    Every line is a single JSON record, for example:
+        {"op": "add", "path": ["MyProject", "seq1", "sh0010", "fx"]}
+        {"op": "remove", "path": ["MyProject", "seq1", "sh0010"]}
+        {"op": "rename", "path": ["MyProject", "seq1"], "name": "seq010"}
+        {"op": "set_project", "path": ["MyProject"], "data": {"groups": {...}}}
+
+    Writers only append, readers replay the records on top of the last snapshot.
+    """
+
+    def __init__(self, journal_path: str):
+        self.journal_path = Path(journal_path)
+
+    def append(self, op: str, parts: tuple, **kwargs) -> None:
+        self.extend([{"op": op, "path": list(parts), **kwargs}])
+
+    def extend(self, records: list[dict]) -> None:
+        """
+        Appends several records with a single write.
+        """
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "a") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def records(self):
+        """
+        Yields the journal records in the order they were written.
+        Incomplete lines (e.g. from an interrupted write) are skipped.
+        """
+        if not self.journal_path.is_file():
+            return
+        with open(self.journal_path, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Skipping corrupted journal record {self.journal_path.name}:{line_number}")
+
+    def replay(self, data: dict) -> dict:
+        """
+        Applies every journal record to the given snapshot data in place.
+        """
+        for record in self.records():
+            apply_journal_record(data, record)
+        return data
+
+    def clear(self) -> None:
+        self.journal_path.unlink(missing_ok=True)
+
+
+def _siblings(data: dict, parent_parts: tuple, create: bool = False) -> dict | None:
+    """
+    Returns the dictionary holding the children of the node at 'parent_parts'
+    (the top level dictionary for an empty path).
+    """
+    node = data
+    for depth, name in enumerate(parent_parts):
+        if create:
+            node = node.setdefault(name, {}).setdefault(CHILD_KEYS[depth], {})
+            continue
+        node = node.get(name)
+        node = node.get(CHILD_KEYS[depth]) if isinstance(node, dict) else None
+        if not isinstance(node, dict):
+            return None
+    return node
+
+
+def apply_journal_record(data: dict, record: dict) -> None:
+    """
+    Applies a single journal record to the nested project index data.
+    """
+    op = record.get("op")
+    parts = tuple(record.get("path", ()))
+    if not 1 <= len(parts) <= len(LEVELS):
+        logging.warning(f"Skipping journal record with invalid path: {record}")
+        return
+
+    if op == "add":
+        node = _siblings(data, parts[:-1], create=True).setdefault(parts[-1], {})
+        if len(parts) < len(LEVELS):
+            node.setdefault(CHILD_KEYS[len(parts) - 1], {})
+    elif op == "remove":
+        siblings = _siblings(data, parts[:-1])
+        if siblings is not None:
+            siblings.pop(parts[-1], None)
+    elif op == "rename":
+        siblings = _siblings(data, parts[:-1])
+        if siblings is None or parts[-1] not in siblings:
+            return
+        if record["name"] != parts[-1] and record["name"] in siblings:
+            # Written by a tool that did not check for duplicates, merging would drop a subtree
+            logging.warning(f"Skipping journal rename onto an existing node: {record}")
+            return
+        # Rebuild the siblings to keep the renamed node at the same position
+        renamed = {record["name"] if name == parts[-1] else name: value for name, value in siblings.items()}
+        siblings.clear()
+        siblings.update(renamed)
+    elif op == "set_project":
+        data[parts[0]] = record.get("data", {})
+    else:
+        logging.warning(f"Skipping unknown journal operation: {op}")
+
+
+class JsonIndexStore(IndexStore):
+    """
+    Project index stored as a nested JSON snapshot (trace_project_index.json) plus
+    an append-only journal of the mutations made since the snapshot was written.
+
+    Mutations only append a journal record, so their cost does not depend on the
+    index size. Once the journal grows past 'compact_threshold' bytes it is folded
+    into a fresh snapshot. Appends and compactions hold the index lock, so tools
+    running at the same time never drop each other's edits.
+    """
+
+    def __init__(self, json_path: str, compact_threshold: int = COMPACT_THRESHOLD):
+        self.json_path = Path(json_path)
+        self.journal = IndexJournal(self.json_path.with_suffix(".journal"))
+        self.compact_threshold = compact_threshold
+
+    def signature(self) -> tuple:
+        return locking.file_version(self.json_path), locking.file_version(self.journal.journal_path)
+
+    def _read_snapshot(self) -> dict:
+        data = locking.read_json(self.json_path) if self.json_path.is_file() else {}
+        return self.journal.replay(data)
+
+    def _read(self) -> dict:
+        # A shared lock keeps readers from seeing a snapshot and journal from different compactions
+        with locking.FileLock(self.json_path, shared=True):
+            return self._read_snapshot()
+
+    def _append(self, op: str, parts: tuple, **kwargs) -> None:
+        self._extend([{"op": op, "path": list(parts), **kwargs}])
+
+    def _extend(self, records: list[dict]) -> None:
+        with locking.FileLock(self.json_path):
+            self._extend_locked(records)
+
+    def _extend_locked(self, records: list[dict]) -> None:
+        self.journal.extend(records)
+        if self.journal.size() > self.compact_threshold:
+            self._compact()
+
+    def _compact(self) -> None:
+        locking.atomic_write_text(self.json_path, json.dumps(self._read_snapshot(), indent=4))
+        self.journal.clear()
+
+    def compact(self) -> None:
+        """
+        Folds the journal into a new snapshot and starts an empty journal.
+        """
+        with locking.FileLock(self.json_path):
+            self._compact()
+
+    @staticmethod
+    def _node(data: dict, parts: tuple) -> dict | None:
+        node = data.get(parts[0]) if parts else None
+        for depth, name in enumerate(parts[1:]):
+            if not isinstance(node, dict):
+                return None
+            node = node.get(CHILD_KEYS[depth], {}).get(name)
+        return node
+
+    def children(self, *parts) -> list[str]:
+        data = self._read()
+        if not parts:
+            return list(data.keys())
+        node = self._node(data, parts)
+        if not isinstance(node, dict) or len(parts) > len(CHILD_KEYS):
+            return []
+        return list(node.get(CHILD_KEYS[len(parts) - 1], {}).keys())
+
+    def exists(self, *parts) -> bool:
+        return self._node(self._read(), _check_path(parts)) is not None
+
+    def add(self, *parts) -> None:
+        self._append("add", _check_path(parts))
+
+    def remove(self, *parts) -> None:
+        self._append("remove", _check_path(parts))
+
+    def remove_many(self, paths) -> None:
+        records = [{"op": "remove", "path": list(_check_path(parts))} for parts in paths]
+        if records:
+            self._extend(records)
+
+    def rename(self, parts: tuple, new_name: str) -> None:
+        parts = _check_path(parts)
+        # The check and the append hold the same lock, so no other tool can take the name in between
+        with locking.FileLock(self.json_path):
+            siblings = _siblings(self._read_snapshot(), parts[:-1])
+            if new_name != parts[-1] and siblings and new_name in siblings:
+                raise _node_exists_error(parts, new_name)
+            self._extend_locked([{"op": "rename", "path": list(parts), "name": new_name}])
+
+    def set_project(self, project: str, project_data: dict) -> None:
+        self._append("set_project", (project,), data=project_data)
+
+    def to_dict(self) -> dict:
+        return self._read()
+
+    def update(self, update) -> dict:
+        with locking.FileLock(self.json_path):
+            data = self._read_snapshot()
+            update(data)
+            locking.atomic_write_text(self.json_path, json.dumps(data, indent=4))
+            self.journal.clear()
+        return data
+
+    def load_dict(self, data: dict) -> None:
+        with locking.FileLock(self.json_path):
+            locking.atomic_write_text(self.json_path, json.dumps(data, indent=4))
+            self.journal.clear()
+
+
+class SQLiteIndexStore(IndexStore):
+    """
+    Project index stored in an embedded SQLite database.
+
+    Each level has its own table with a unique (parent, name) constraint, which gives
+    indexed lookups and lets tasks be added or removed as single rows instead of
+    rewriting the whole index.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS project (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS grp (
+            id INTEGER PRIMARY KEY,
+            parent_id INTEGER NOT NULL REFERENCES project(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            UNIQUE (parent_id, name)
+        );
+        CREATE TABLE IF NOT EXISTS item (
+            id INTEGER PRIMARY KEY,
+            parent_id INTEGER NOT NULL REFERENCES grp(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            UNIQUE (parent_id, name)
+        );
+        CREATE TABLE IF NOT EXISTS task (
+            id INTEGER PRIMARY KEY,
+            parent_id INTEGER NOT NULL REFERENCES item(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            UNIQUE (parent_id, name)
+        );
+    """
+    TABLES = ("project", "grp", "item", "task")
+
+    def __init__(self, db_path: str, wal: bool | None = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # The store may be shared by threads (see ProjectIndex), access is serialized with a lock
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._lock = threading.RLock()
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        # The index usually lives in the shared framework config, where WAL (shared memory on a
+        # single host) is not safe: keep the rollback journal unless WAL is asked for
+        if wal is None:
+            wal = os.getenv(INDEX_WAL_ENV) == "1"
+        self.conn.execute(f"PRAGMA journal_mode = {'WAL' if wal else 'DELETE'}")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock, self.conn:
+            yield
+
+    def signature(self) -> tuple:
+        wal_path = self.db_path.with_name(self.db_path.name + "-wal")
+        return locking.file_version(self.db_path), locking.file_version(wal_path)
+
+    def _node_id(self, parts: tuple, create: bool = False) -> int | None:
+        """
+        Resolves the row id of a node level by level, optionally inserting missing rows.
+        """
+        node_id = None
+        for depth, name in enumerate(parts):
+            table = self.TABLES[depth]
+            if depth == 0:
+                where, args = "name = ?", (name,)
+            else:
+                where, args = "parent_id = ? AND name = ?", (node_id, name)
+            row = self.conn.execute(f"SELECT id FROM {table} WHERE {where}", args).fetchone()
+            if row:
+                node_id = row[0]
+            elif create:
+                columns = "name" if depth == 0 else "parent_id, name"
+                placeholders = "?" if depth == 0 else "?, ?"
+                node_id = self.conn.execute(
+                    f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", args
+                ).lastrowid
+            else:
+                return None
+        return node_id
+
+    def _insert_paths(self, paths) -> None:
+        for path in paths:
+            self._node_id(path, create=True)
+
+    def children(self, *parts) -> list[str]:
+        if len(parts) >= len(LEVELS):
+            return []
+        with self._lock:
+            if not parts:
+                return [row[0] for row in self.conn.execute("SELECT name FROM project ORDER BY id")]
+            node_id = self._node_id(parts)
+            if node_id is None:
+                return []
+            table = self.TABLES[len(parts)]
+            rows = self.conn.execute(f"SELECT name FROM {table} WHERE parent_id = ? ORDER BY id", (node_id,))
+            return [row[0] for row in rows]
+
+    def exists(self, *parts) -> bool:
+        parts = _check_path(parts)
+        with self._lock:
+            return self._node_id(parts) is not None
+
+    def add(self, *parts) -> None:
+        parts = _check_path(parts)
+        with self._transaction():
+            self._node_id(parts, create=True)
+
+    def _remove(self, parts: tuple) -> None:
+        node_id = self._node_id(parts)
+        if node_id is not None:
+            self.conn.execute(f"DELETE FROM {self.TABLES[len(parts) - 1]} WHERE id = ?", (node_id,))
+
+    def remove(self, *parts) -> None:
+        parts = _check_path(parts)
+        with self._transaction():
+            self._remove(parts)
+
+    def remove_many(self, paths) -> None:
+        paths = [_check_path(parts) for parts in paths]
+        with self._transaction():
+            for parts in paths:
+                self._remove(parts)
+
+    def rename(self, parts: tuple, new_name: str) -> None:
+        parts = _check_path(parts)
+        with self._transaction():
+            node_id = self._node_id(parts)
+            if node_id is None or new_name == parts[-1]:
+                return
+            try:
+                self.conn.execute(f"UPDATE {self.TABLES[len(parts) - 1]} SET name = ? WHERE id = ?", (new_name, node_id))
+            except sqlite3.IntegrityError:
+                raise _node_exists_error(parts, new_name) from None
+
+    def set_project(self, project: str, project_data: dict) -> None:
+        with self._transaction():
+            project_id = self._node_id((project,), create=True)
+            self.conn.execute("DELETE FROM grp WHERE parent_id = ?", (project_id,))
+            self._insert_paths(iter_index_paths(project_data, (project,)))
+
+    def to_dict(self) -> dict:
+        query = """
+            SELECT project.name, grp.name, item.name, task.name
+            FROM project
+            LEFT JOIN grp ON grp.parent_id = project.id
+            LEFT JOIN item ON item.parent_id = grp.id
+            LEFT JOIN task ON task.parent_id = item.id
+            ORDER BY project.id, grp.id, item.id, task.id
+        """
+        with self._lock:
+            rows = self.conn.execute(query).fetchall()
+        return build_index_dict(tuple(name for name in row if name is not None) for row in rows)
+
+    def update(self, update) -> dict:
+        with self._transaction():
+            # Take the write lock before reading so no other writer can slip in between
+            self.conn.execute("BEGIN IMMEDIATE")
+            data = self.to_dict()
+            update(data)
+            self.conn.execute("DELETE FROM project")
+            self._insert_paths(iter_index_paths(data))
+        return data
+
+    def load_dict(self, data: dict) -> None:
+        with self._transaction():
+            self.conn.execute("DELETE FROM project")
+            self._insert_paths(iter_index_paths(data))
+
+
+# Backend selection, migration and export
+
+def get_index_paths(framework: str | None = None) -> dict:
+    """
+    Resolve the project index file locations inside the framework config folder.
+
+    Return:
+        dict: {"json": <path to trace_project_index.json>, "sqlite": <path to trace_project_index.db>}
+
+    """
+    framework = framework or os.getenv("PR_TRACEPATH_FRAMEWORK")
+    if not framework:
+        raise EnvironmentError("PR_TRACEPATH_FRAMEWORK is not set")
+    config = Path(framework) / "config"
+    return {"json": config / INDEX_JSON_NAME, "sqlite": config / INDEX_DB_NAME}
+
+
+def get_index_store(framework: str | None = None, backend: str | None = None) -> IndexStore:
+    """
+    Returns the project index backend selected with PR_PROJECT_INDEX_BACKEND ("json" by default, or "sqlite").
+    """
+    backend = (backend or os.getenv(INDEX_BACKEND_ENV) or "json").lower()
+    paths = get_index_paths(framework)
+    if backend == "json":
+        return JsonIndexStore(paths["json"])
+    if backend == "sqlite":
+        return SQLiteIndexStore(paths["sqlite"])
+    raise ValueError(f"Unknown project index backend '{backend}', expected 'json' or 'sqlite'")
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str) -> SQLiteIndexStore:
+    """
+    One-shot migration of an existing trace_project_index.json into a SQLite index.
+
+    Any content already in the database is replaced.
+
+    """
+    store = SQLiteIndexStore(db_path)
+    store.load_dict(JsonIndexStore(json_path).to_dict())
+    logging.info(f"Migrated project index {json_path} -> {db_path}")
+    return store
+
+
+def export_json(store: IndexStore, json_path: str) -> None:
+    """
+    Writes the content of any index backend in the trace_project_index.json format.
+    """
+    JsonIndexStore(json_path).load_dict(store.to_dict())
+    logging.info(f"Exported project index to {json_path}")
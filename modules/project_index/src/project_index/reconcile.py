@@ -0,0 +1,150 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import NamedTuple
+
+from project_index import index_cache, index_store
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+# Folders living next to groups/items/tasks on disk that are not project index nodes
+IGNORED_FOLDERS = {"main", "show_data"}
+
+DEFAULT_WORKERS = 8
+
+
+class ReconcileReport(NamedTuple):
+    """
+    Differences between the project index and the folders on disk.
+    """
+    missing: list[str]  # in the index, no folder on disk
+    orphans: list[str]  # folder on disk, not in the index
+    scanned: int  # number of folders listed
+    unreadable: list[str]  # folders that could not be listed and absent project roots, not compared
+
+
+def _is_below(path: str, roots: set[str]) -> bool:
+    """
+    True if the path or one of its parents is in 'roots'.
+    """
+    parts = path.split("/")
+    return any(index_cache.join_path(*parts[:i]) in roots for i in range(1, len(parts) + 1))
+
+
+def list_folders(path: str) -> list[str] | None:
+    """
+    Returns the names of the sub-folders of 'path' that can be project index nodes.
+    A missing folder has no sub-folders. An unreadable folder returns None: its content is
+    unknown, which is not the same as empty.
+    """
+    try:
+        with os.scandir(path) as entries:
+            return [entry.name for entry in entries
+                    if entry.is_dir() and not entry.name.startswith(".") and entry.name not in IGNORED_FOLDERS]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    except OSError as e:
+        logging.warning(f"Skipping unreadable folder {path}: {e}")
+        return None
+
+
+def scan_disk(projects_path: str, projects: list[str],
+              workers: int = DEFAULT_WORKERS) -> tuple[set[str], int, set[str]]:
+    """
+    Lists the project/group/item/task folders of the given projects on disk.
+
+    Every folder is listed as its own job in a bounded thread pool and the sub-folders
+    are queued as soon as their parent is listed, so on network storage the number of
+    directory reads in flight follows the worker count rather than the tree shape.
+
+    Args:
+        projects_path (str): PR_PROJECTS_PATH root.
+        projects (list[str]): Project folders to scan.
+        workers (int): Maximum number of concurrent directory listings.
+
+    Return:
+        tuple[set[str], int, set[str]]: "project/group/item/task" paths found on disk, number of
+            folders listed, and the paths whose content is unknown (unreadable folders and project
+            roots that do not exist, e.g. a storage that is not mounted).
+
+    """
+    found, unreadable = set(), set()
+    scanned = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        pending = {}
+        for project in projects:
+            if not os.path.isdir(os.path.join(projects_path, project)):
+                logging.warning(f"Skipping project {project}, its folder is absent in {projects_path}")
+                unreadable.add(project)
+                continue
+            found.add(project)
+            pending[executor.submit(list_folders, os.path.join(projects_path, project))] = (project,)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                parts = pending.pop(future)
+                scanned += 1
+                names = future.result()
+                if names is None:
+                    unreadable.add(index_cache.join_path(*parts))
+                    continue
+                for name in names:
+                    child = parts + (name,)
+                    found.add(index_cache.join_path(*child))
+                    if len(child) < len(index_store.LEVELS):
+                        folder = os.path.join(projects_path, *child)
+                        pending[executor.submit(list_folders, folder)] = child
+    return found, scanned, unreadable
+
+
+def reconcile(project_index: index_cache.ProjectIndex, projects_path: str, projects: list[str] | None = None,
+              workers: int = DEFAULT_WORKERS) -> ReconcileReport:
+    """
+    Compares the project index with the folders on disk.
+
+    Args:
+        project_index (ProjectIndex): Index to check.
+        projects_path (str): PR_PROJECTS_PATH root.
+        projects (list[str] | None): Projects to check, all the indexed projects if None.
+        workers (int): Maximum number of concurrent directory listings.
+
+    Return:
+        ReconcileReport: Missing folders and orphan folders, as sorted index paths. Nodes below
+            unreadable folders and absent project roots are never reported missing.
+
+    """
+    projects = projects or project_index.projects()
+    on_disk, scanned, unreadable = scan_disk(projects_path, projects, workers)
+
+    indexed = set()
+    for parts in index_store.iter_index_paths(project_index.data()):
+        if parts[0] in projects:
+            indexed.add(index_cache.join_path(*parts))
+
+    missing = [path for path in indexed - on_disk if not _is_below(path, unreadable)]
+    return ReconcileReport(sorted(missing), sorted(on_disk - indexed), scanned, sorted(unreadable))
+
+
+def repair(project_index: index_cache.ProjectIndex, report: ReconcileReport, projects_path: str) -> None:
+    """
+    Makes the index match the disk: orphan folders are added and missing folders are
+    removed, in a single index update. Raises RuntimeError, without changing anything, if a
+    project whose root folder is absent would be removed: an unmounted storage must not
+    empty the index.
+    """
+    absent = [path for path in report.missing
+              if "/" not in path and not os.path.isdir(os.path.join(projects_path, path))]
+    if absent:
+        raise RuntimeError(f"Refusing to remove project(s) {', '.join(absent)}: "
+                           f"their folder is absent in {projects_path}")
+
+    records = [{"op": "add", "path": path.split("/")} for path in report.orphans]
+    records += [{"op": "remove", "path": path.split("/")} for path in report.missing]
+    if not records:
+        return
+
+    def apply(data):
+        for record in records:
+            index_store.apply_journal_record(data, record)
+
+    project_index.update(apply)
@@ -0,0 +1,493 @@
+import heapq
+import logging
+import threading
+from typing import NamedTuple
+
+from project_index import fuzzy, index_cache, index_store, trie_search
+
+# Edits kept next to the search snapshot before a new snapshot is built in the background
+DELTA_LIMIT = 2000
+# Minimum trigram similarity of a fuzzy match
+MIN_SIMILARITY = 0.3
+# Paths scored by the substring and fuzzy pass of a path query
+PATH_SCAN_LIMIT = 5000
+
+# Match kinds, best first
+EXACT, PREFIX, SUBSTRING, FUZZY = 3, 2, 1, 0
+MATCH_KINDS = {EXACT: "exact", PREFIX: "prefix", SUBSTRING: "substring", FUZZY: "fuzzy"}
+
+
+class SearchResult(NamedTuple):
+    path: str
+    kind: str  # "exact", "prefix", "substring" or "fuzzy"
+    score: tuple  # higher is better
+
+
+def _child_path(parent: str, name: str) -> str:
+    return index_cache.join_path(parent, name) if parent else name
+
+
+class _Descending(str):
+    """
+    String ordered backwards, so equally scored results keep alphabetical order in a max-first sort.
+    """
+
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+    def __gt__(self, other):
+        return str.__lt__(self, other)
+
+
+def _path_keys(path: str) -> list[str]:
+    """
+    Multi-component keys of a path: every suffix starting at a component boundary,
+    so "seq042/sh0310/fx" also finds "show/seq042/sh0310/fx".
+    """
+    parts = path.lower().split("/")
+    return ["/".join(parts[i:]) for i in range(len(parts) - 1)]
+
+
+def _subsequence_span(query: str, key: str) -> int | None:
+    """
+    Length of the shortest-from-the-first-match window of 'key' holding the characters
+    of 'query' in order, or None if 'query' is not a subsequence of 'key'.
+    """
+    start = key.find(query[0])
+    if start < 0:
+        return None
+    pos = start
+    for char in query[1:]:
+        pos = key.find(char, pos + 1)
+        if pos < 0:
+            return None
+    return pos - start + 1
+
+
+def _similarity(query: str, key: str) -> float | None:
+    """
+    Trigram (Dice) similarity of two lower-cased words, None below MIN_SIMILARITY.
+    """
+    query_grams, key_grams = fuzzy.trigrams(query), fuzzy.trigrams(key)
+    similarity = 2 * len(query_grams & key_grams) / (len(query_grams) + len(key_grams))
+    return similarity if similarity >= MIN_SIMILARITY else None
+
+
+def match_score(query: str, key: str, similarity: float | None = None) -> tuple | None:
+    """
+    Scores a lower-cased key against a lower-cased query, or None if it does not match.
+
+    Exact matches rank above prefix matches, then substring and fuzzy matches. Fuzzy
+    matches are subsequences of the key ("fxd" in "fx_destruction") or, when given,
+    keys with a trigram similarity to the query (typos). Within a kind, keys closer in
+    length to the query and matches found earlier in the key rank higher.
+    """
+    if key == query:
+        return EXACT, 1.0, 0
+    coverage = len(query) / len(key)
+    if key.startswith(query):
+        return PREFIX, coverage, 0
+    pos = key.find(query)
+    if pos >= 0:
+        return SUBSTRING, coverage, -pos
+    span = _subsequence_span(query, key)
+    if span is not None:
+        return FUZZY, len(query) / span, -key.find(query[0])
+    if similarity:
+        return FUZZY, similarity, 0
+    return None
+
+
+def _path_score(query: str, path: str, similarity: float | None = None, skip=()) -> tuple | None:
+    """
+    Best score of a path against a path query over its multi-component keys, ignoring
+    the keys in 'skip'. 'similarity' is the one of the last components, it makes a fuzzy
+    match when the rest of the query is a subsequence of the parent path.
+    """
+    scores = [score for score in (match_score(query, key) for key in _path_keys(path) if key not in skip) if score]
+    if scores:
+        return max(scores)
+    if similarity and _subsequence_span(query.rpartition("/")[0], path.lower().rpartition("/")[0]) is not None:
+        return FUZZY, similarity, 0
+    return None
+
+
+def _path_candidates(snapshot: "_Snapshot", query: str):
+    """
+    Yields (path, similarity) for the paths whose name matches the last component of a
+    path query, names with a prefix match first, then the most similar ones. Stops after
+    PATH_SCAN_LIMIT paths, so the cost does not follow the number of indexed paths.
+    """
+    name = query.rpartition("/")[2]
+    if not name:
+        return
+    names = {key: _similarity(name, key) for key in snapshot.trie.autocomplete(name)}
+    if len(name) >= 3:
+        similar = snapshot.fuzzy.candidates(name)
+        for key in snapshot.fuzzy.containing(name):
+            similar.setdefault(key, _similarity(name, key))
+        for key in sorted(similar, key=lambda k: similar[k] or 0, reverse=True):
+            names.setdefault(key, similar[key])
+    scanned = 0
+    for key, similarity in names.items():
+        for path in snapshot.terms[key]:
+            yield path, similarity
+            scanned += 1
+            if scanned >= PATH_SCAN_LIMIT:
+                return
+
+
+def _hidden(path: str, removed) -> bool:
+    """
+    True if the path or one of its parents is in 'removed'.
+    """
+    while path:
+        if path in removed:
+            return True
+        path = path.rpartition("/")[0]
+    return False
+
+
+def _add_key(trie: trie_search.RadixTrie, terms: dict, key: str, path: str) -> None:
+    paths = terms.setdefault(key, set())
+    if not paths:
+        trie.insert(key)
+    paths.add(path)
+
+
+class _Snapshot:
+    """
+    Search structures of a set of paths. A snapshot is never modified once built, so
+    queries read it without holding any lock.
+    """
+    __slots__ = ("children", "trie", "terms", "fuzzy", "path_trie", "path_terms")
+
+    def __init__(self, paths=()):
+        self.children = {"": []}  # path -> child names, parents listed before their children
+        self.trie = trie_search.RadixTrie()
+        self.terms = {}  # lower-cased name -> paths
+        self.fuzzy = fuzzy.TrigramIndex()  # lower-cased names
+        self.path_trie = trie_search.RadixTrie()
+        self.path_terms = {}  # lower-cased multi-component path suffix -> paths
+        for path in paths:
+            self._add(path)
+
+    def _add(self, path: str) -> None:
+        if not path or path in self.children:
+            return
+        parent, _, name = path.rpartition("/")
+        if parent and parent not in self.children:
+            self._add(parent)
+        self.children[parent].append(name)
+        self.children[path] = []
+
+        _add_key(self.trie, self.terms, name.lower(), path)
+        self.fuzzy.add(name.lower())
+        for key in _path_keys(path):
+            _add_key(self.path_trie, self.path_terms, key, path)
+
+
+class SearchIndex:
+    """
+    Name search over the "project/group/item/task" paths shown in the Project Index tree.
+
+    Node names are kept lower-cased in a RadixTrie, each name pointing to the paths using it,
+    so a prefix lookup costs the prefix length plus the number of results. The index is not
+    persisted, it is built in the background from the project index when a tool opens.
+
+    The search structures live in an immutable snapshot. Edits made while the tree changes
+    only go to a small delta (paths added and paths removed since the snapshot), under a
+    lock held for the length of the edit. A query takes the snapshot and a copy of the
+    delta, then runs without the lock, so the UI thread never waits on a running query.
+    Once the delta holds DELTA_LIMIT edits, a new snapshot is built on a background thread.
+
+    Usage:
+        search_index = SearchIndex()
+        search_index.build_async(paths)  # returns at once, 'ready' is set once built
+        search_index.query("sh0310/fx")  # waits for 'ready', run it off the UI thread
+
+    """
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.ready.set()
+        self._lock = threading.RLock()
+        self._pending = []  # (method, args) edits made before the first build finished
+        self._snapshot = _Snapshot()
+        self._ops = []  # ("add" | "remove", path) edits made since the snapshot was built
+        self._added = {}  # paths added since the snapshot, in order
+        self._removed = set()  # snapshot paths hidden with everything below them
+        self._rebuild_thread = None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.subtree("")) - 1
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return bool(path) and self._visible(path)
+
+    def _visible(self, path: str) -> bool:
+        if path in self._added:
+            return True
+        return path in self._snapshot.children and not (self._removed and _hidden(path, self._removed))
+
+    # Incremental updates
+
+    def _apply(self, op: str, path: str) -> None:
+        if op == "add":
+            self._added[path] = None
+        else:
+            self._removed.add(path)
+            prefix = path + "/"
+            for added in [p for p in self._added if p == path or p.startswith(prefix)]:
+                del self._added[added]
+        self._ops.append((op, path))
+
+    def add(self, path: str) -> None:
+        """
+        Indexes a path, and its parents if they are not indexed yet.
+        """
+        with self._lock:
+            if not self.ready.is_set():
+                self._pending.append((self.add, (path,)))
+                return
+            if not path or self._visible(path):
+                return
+            parent = path.rpartition("/")[0]
+            if parent and not self._visible(parent):
+                self.add(parent)
+            self._apply("add", path)
+            self._schedule_rebuild()
+
+    def remove(self, path: str) -> None:
+        """
+        Removes a path and everything below it.
+        """
+        with self._lock:
+            if not self.ready.is_set():
+                self._pending.append((self.remove, (path,)))
+                return
+            if not path or not self._visible(path):
+                return
+            self._apply("remove", path)
+            self._schedule_rebuild()
+
+    def rename(self, path: str, new_name: str) -> None:
+        """
+        Renames the last component of a path, moving everything below it.
+        """
+        with self._lock:
+            if not self.ready.is_set():
+                self._pending.append((self.rename, (path, new_name)))
+                return
+            if path not in self:
+                return
+            new_path = _child_path(path.rpartition("/")[0], new_name)
+            subtree = list(self.subtree(path))
+            self.remove(path)
+            for old in subtree:
+                self.add(new_path + old[len(path):])
+
+    def subtree(self, path: str):
+        """
+        Yields a path and the indexed paths below it, parents first.
+        """
+        self.ready.wait()
+        with self._lock:
+            snapshot, added, removed = self._snapshot, list(self._added), set(self._removed)
+        seen = set()
+        if path == "" or (path in snapshot.children and not _hidden(path, removed)):
+            stack = [path]
+            while stack:
+                current = stack.pop()
+                seen.add(current)
+                yield current
+                stack.extend(child for child in (_child_path(current, name) for name in snapshot.children[current])
+                             if child not in removed)
+        prefix = path + "/" if path else ""
+        below = [p for p in added if p not in seen and (p == path or p.startswith(prefix))]
+        yield from sorted(below, key=lambda p: p.count("/"))
+
+    def build(self, paths) -> None:
+        """
+        Replaces the content of the index with the given paths.
+        """
+        snapshot = _Snapshot(paths)
+        with self._lock:
+            self._snapshot = snapshot
+            self._ops, self._added, self._removed = [], {}, set()
+            pending, self._pending = self._pending, []
+            self.ready.set()
+            # Edits made while the paths were read are applied on top of them
+            for method, args in pending:
+                method(*args)
+
+    def build_async(self, paths) -> threading.Thread:
+        """
+        Builds the index from 'paths' (an iterable, or a callable returning one) on a
+        background thread. Edits made in the meantime are kept and applied once it is built,
+        queries wait for it.
+        """
+        with self._lock:
+            self.ready.clear()
+
+        def build():
+            try:
+                self.build(paths() if callable(paths) else paths)
+            except Exception:
+                logging.exception("Could not build the search index")
+                self.build(())
+
+        thread = threading.Thread(target=build, name="SearchIndexBuild", daemon=True)
+        thread.start()
+        return thread
+
+    def _schedule_rebuild(self) -> None:
+        if len(self._ops) < DELTA_LIMIT or (self._rebuild_thread and self._rebuild_thread.is_alive()):
+            return
+        self._rebuild_thread = threading.Thread(target=self._rebuild, name="SearchIndexRebuild", daemon=True)
+        self._rebuild_thread.start()
+
+    def _rebuild(self) -> None:
+        """
+        Folds the delta into a new snapshot, off the UI thread. Edits made while the snapshot
+        is built are replayed on top of it.
+        """
+        with self._lock:
+            snapshot, done = self._snapshot, len(self._ops)
+            added, removed = list(self._added), set(self._removed)
+        paths = [path for path in snapshot.children if path and not _hidden(path, removed)] + added
+        rebuilt = _Snapshot(paths)
+        with self._lock:
+            pending = self._ops[done:]
+            self._snapshot = rebuilt
+            self._ops, self._added, self._removed = [], {}, set()
+            for op, path in pending:
+                self._apply(op, path)
+
+    def wait(self, timeout: float | None = None) -> None:
+        """
+        Waits for a background snapshot build to finish.
+        """
+        thread = self._rebuild_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # Lookups
+
+    def _state(self) -> tuple:
+        with self._lock:
+            return self._snapshot, list(self._added), frozenset(self._removed)
+
+    def search(self, prefix: str) -> list[str]:
+        """
+        Returns the paths whose last component starts with the prefix (case-insensitive).
+        """
+        self.ready.wait()
+        snapshot, added, removed = self._state()
+        prefix = prefix.lower()
+        results = []
+        for term in snapshot.trie.autocomplete(prefix):
+            results.extend(path for path in snapshot.terms[term] if not (removed and _hidden(path, removed)))
+        results.extend(path for path in added if path.rpartition("/")[2].lower().startswith(prefix))
+        return results
+
+    def query(self, text: str, limit: int = 50) -> list[SearchResult]:
+        """
+        Searches groups, items and tasks of every project, best matches first.
+
+        A query without '/' is matched against node names, a query with '/' against the
+        path ("sh0310/fx" finds "show/seq042/sh0310/fx_destruction"). Prefix matches come
+        from the RadixTrie. When there are fewer than 'limit' prefix matches, substring and
+        fuzzy (typo) matches of names come from the trigram index, only short queries scan
+        the names. Path queries only score the paths of the names matching their last
+        component, at most PATH_SCAN_LIMIT of them. Every candidate goes through a heap bounded to 'limit'
+        entries, so large result sets are never fully built.
+
+        Args:
+            text (str): Query, case-insensitive.
+            limit (int): Maximum number of results.
+
+        Return:
+            list[SearchResult]: At most 'limit' results, sorted by score.
+
+        Waits for a running build_async, so it is meant to run on a worker thread.
+
+        """
+        query = text.strip().strip("/").lower()
+        if not query or limit <= 0:
+            return []
+        self.ready.wait()
+        snapshot, added, removed = self._state()
+        if "/" in query:
+            trie, terms = snapshot.path_trie, snapshot.path_terms
+        else:
+            trie, terms = snapshot.trie, snapshot.terms
+
+        heap = []  # min-heap of (score, path), the worst kept result on top
+
+        def push(score: tuple, paths, snapshot_paths: bool = True) -> None:
+            if len(heap) == limit and score + (0,) < heap[0][0]:
+                return  # even the shallowest path of this key would not make it
+            for path in paths:
+                if snapshot_paths and removed and _hidden(path, removed):
+                    continue
+                # Shallower paths win ties, then alphabetical order
+                entry = (score + (-path.count("/"),), _Descending(path))
+                if len(heap) < limit:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        prefix_keys = trie.autocomplete(query)
+        for key in prefix_keys:
+            push(match_score(query, key), terms[key])
+
+        if len(heap) < limit and "/" in query:
+            prefix_keys = set(prefix_keys)
+            for path, similarity in _path_candidates(snapshot, query):
+                score = _path_score(query, path, similarity, skip=prefix_keys)
+                if score is not None:
+                    push(score, (path,))
+        elif len(heap) < limit:
+            prefix_keys = set(prefix_keys)
+            if len(query) < 3:
+                candidates = dict.fromkeys(terms)
+            else:
+                candidates = snapshot.fuzzy.candidates(query)
+                for key in snapshot.fuzzy.containing(query):
+                    candidates.setdefault(key, None)
+            for key, similarity in candidates.items():
+                if key in prefix_keys:
+                    continue
+                score = match_score(query, key, similarity)
+                if score is not None:
+                    push(score, terms[key])
+
+        # Paths added since the snapshot are few, they are scored one by one
+        for path in added:
+            name = path.rpartition("/")[2].lower()
+            if "/" in query:
+                score = _path_score(query, path, _similarity(query.rpartition("/")[2], name))
+            else:
+                score = match_score(query, name, _similarity(query, name))
+            if score is not None:
+                push(score, (path,), snapshot_paths=False)
+
+        seen, results = set(), []
+        for score, path in sorted(heap, reverse=True):
+            if path not in seen:
+                seen.add(path)
+                results.append(SearchResult(str(path), MATCH_KINDS[score[0]], score))
+        return results
+
+
+def get_search_index(project_index: index_cache.ProjectIndex) -> SearchIndex:
+    """
+    Returns a search index of the project index, built on a background thread so the tools
+    open at once. Queries made before it is built wait for it.
+    """
+    search_index = SearchIndex()
+    search_index.build_async(
+        lambda: (index_cache.join_path(*parts) for parts in index_store.iter_index_paths(project_index.data())))
+    return search_index
@@ -0,0 +1,105 @@
+try:
+    from PySide6 import QtCore
+except ImportError:
+    from PySide2 import QtCore
+
+# Delay after the last keystroke before a search starts
+SEARCH_DELAY_MS = 150
+
+
+class _SearchSignals(QtCore.QObject):
+    finished = QtCore.Signal(int, str, object)  # generation, text, results
+
+
+class _SearchTask(QtCore.QRunnable):
+    def __init__(self, generation: int, text: str, search, is_current, signals: _SearchSignals):
+        super(_SearchTask, self).__init__()
+        self.generation = generation
+        self.text = text
+        self.search = search
+        self.is_current = is_current
+        self.signals = signals
+
+    def run(self):
+        if not self.is_current(self.generation):
+            return  # superseded while queued
+        try:
+            results = self.search(self.text)
+        except Exception as e:
+            results = e
+        self.signals.finished.emit(self.generation, self.text, results)
+
+
+class DebouncedSearch(QtCore.QObject):
+    """
+    Runs a search function off the UI thread while the user types.
+
+    Requests are debounced with a single-shot timer, so only the text typed last before
+    a pause is searched. Searches run one at a time on a dedicated thread pool; a
+    search still queued when a new one is requested is skipped, and the results of a
+    superseded search that was already running are dropped. Only the results of the
+    latest request reach results_ready, on the UI thread.
+
+    The search function receives the text and must only read data that the UI thread
+    does not modify while it runs (an immutable snapshot or a locked index).
+
+    Usage:
+        search = DebouncedSearch(lambda text: index.query(text), parent=self)
+        search.results_ready.connect(self.apply_results)
+        line_edit.textEdited.connect(search.request)
+
+    """
+    results_ready = QtCore.Signal(str, object)  # text, results
+    failed = QtCore.Signal(str, object)  # text, exception
+
+    def __init__(self, search, delay_ms: int = SEARCH_DELAY_MS, parent=None):
+        super(DebouncedSearch, self).__init__(parent)
+        self.search = search
+        self._text = ""
+        self._generation = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._start)
+
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._signals = _SearchSignals(self)
+        self._signals.finished.connect(self._on_finished)
+
+    def request(self, text: str) -> None:
+        """
+        Schedules a search for the text, replacing any pending request.
+        """
+        self._text = text
+        self._generation += 1
+        self._timer.start()
+
+    def cancel(self) -> None:
+        """
+        Drops the pending request and the results of the running search.
+        """
+        self._timer.stop()
+        self._generation += 1
+
+    def _is_current(self, generation: int) -> bool:
+        return generation == self._generation
+
+    def _start(self) -> None:
+        self._pool.start(_SearchTask(self._generation, self._text, self.search, self._is_current, self._signals))
+
+    def _on_finished(self, generation: int, text: str, results) -> None:
+        if generation != self._generation:
+            return
+        if isinstance(results, Exception):
+            self.failed.emit(text, results)
+        else:
+            self.results_ready.emit(text, results)
+
+    def wait(self, msecs: int = -1) -> bool:
+        """
+        Waits for the running search to finish (used when closing the UI).
+        """
+        return self._pool.waitForDone(msecs)
@@ -5,9 +5,10 @@ import os
 import re
 import sys
 
-from project_index import trie_search, utils
+from project_index import fuzzy, index_cache, index_models, search_index, search_worker, trie_search, utils
+from tracepath import locking
 
-for module in (utils, trie_search):
+for module in (index_cache, trie_search, fuzzy, search_index, search_worker, index_models, utils):
     importlib.reload(module)
 
 logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
@@ -28,15 +29,19 @@ except ImportError as e:
     _usd = None
 
 
+# Maximum number of search results shown in the tree
+SEARCH_LIMIT = 50
+
+
 class TraceProjectIndex(QtWidgets.QMainWindow):
     def __init__(self, parent=None):
         super(TraceProjectIndex, self).__init__(parent=parent)
         # Set tool utils attr
         self.resize(900, 700)
         self.undo_stack = []
-        self._rename_cache = None
         self.setWindowTitle('Trace Project Index v0.1.6')
         self.searching = False
+        self.search_filtered = []  # nodes whose rows are filtered by the current search
         self.asset_repository = None
 
         # Get env vars
@@ -45,7 +50,10 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         if not framework:
             raise EnvironmentError("PR_TRACEPATH_FRAMEWORK is not set")
 
-        self.project_index_path = os.path.join(framework, "config/trace_project_index.json")
+        self.project_index = index_cache.get_project_index(framework)
+        self.search_index = search_index.get_search_index(self.project_index)
+        self.search_runner = search_worker.DebouncedSearch(
+            lambda text: self.search_index.query(text, SEARCH_LIMIT), parent=self)
         self.usd_template_path = os.path.join(framework, "config/usd_scene_template.json")
         self.local_asset_lib = os.path.join(framework, "config/local_asset_lib_data.json")
 
@@ -83,13 +91,15 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         self.search_line.setPlaceholderText("Search")
         self.central_layout.addWidget(self.search_line)
 
-        self.tree_widget = MyTreeWidget()
-        self.tree_widget.setHeaderLabels(["Projects:"])
+        self.tree_model = index_models.ProjectIndexModel(self.project_index, "Projects:", self,
+                                                         search=self.search_index)
+        self.tree_widget = MyTreeView()
+        self.tree_widget.setModel(self.tree_model)
         self.central_layout.addWidget(self.tree_widget)
         self.tree_widget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.tree_widget.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
         self.tree_widget.setFocus()
-        self.max_tree_depth = 3
+        self.max_tree_depth = index_models.MAX_TREE_DEPTH
 
         self.create_project_line_edit = QtWidgets.QLineEdit()
         self.create_project_line_edit.setPlaceholderText(
@@ -146,6 +156,9 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         # SIGNALS ---------------------------------
         self.search_line.textEdited.connect(self.run_search)
         self.search_line.textChanged.connect(self.reset_search_state)
+        self.search_runner.results_ready.connect(self.apply_search_results)
+        self.search_runner.failed.connect(
+            lambda text, error: logging.error(f"Search for '{text}' failed: {error}"))
 
         self.info_button.clicked.connect(self.show_info_popup)
 
@@ -154,10 +167,8 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         self.tree_widget.customContextMenuRequested.connect(self.open_menu)
         self.tree_widget.delete_key_pressed.connect(self.delete_tree_item)
 
-        self.tree_widget.itemChanged.connect(self.track_rename)
-        self.tree_widget.itemChanged.connect(self.validate_item_name)
-
-        self.tree_widget.itemSelectionChanged.connect(self.cache_selected_item_name)
+        self.tree_model.name_changed.connect(self.track_rename)
+        self.tree_model.name_changed.connect(self.validate_item_name)
 
         self.edit_asset_repo.stateChanged.connect(self.clear_local_asset_repo_path)
         self.create_project_line_edit.textEdited.connect(self.set_local_asset_repo)
@@ -212,73 +223,45 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
 
     def _tree_item(self, name, parent, removable=False):
         """
-        Defines a QTreeWidgetItem and adds it to the parent.
+        Defines a new tree node and adds it to the parent node.
         """
-        _parent = parent
-        count = 1
-
-        while _parent.parent():
-            count += 1
-            _parent = _parent.parent()
-
-        if count > self.max_tree_depth:
+        if parent.depth() + 1 > self.max_tree_depth:
             return
-
-        item = QtWidgets.QTreeWidgetItem(parent)
-        item.setText(0, name)
-
-        metadata = {"removable": removable,
-                    "type": "task" if count == 3 else "item" if count == 2 else "core"}
-
-        item.setData(0, QtCore.Qt.UserRole, metadata)
-        if removable:
-            item.setFlags(item.flags() | QtCore.Qt.ItemIsEditable)
-        else:
-            item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
-        return item
+        node = index_models.TreeNode(name, removable=removable)
+        self.tree_model.insert_node(parent, node)
+        return node
 
     def populate_tree(self):
         """
-        Executed on init. Populates the tree widget with existing projects from the project index JSON file.
+        Executed on init. Loads the projects from the project index, groups, items and tasks
+        are loaded by the tree model when their parent is expanded.
         """
-        if not os.path.isfile(self.project_index_path):
-            read = {}
-        else:
-            with open(self.project_index_path, "r") as read_file:
-                read = json.load(read_file)
-
-        root = self.tree_widget.invisibleRootItem()
-
-        for project_name, groups in read.items():
-            project = self._tree_item(project_name, root)
-
-            for group, items in groups['groups'].items():
-                group = self._tree_item(group, project)
-
-                for item, tasks in items['items'].items():
-                    item = self._tree_item(item, group)
-                    for task, _ in tasks['tasks'].items():
-                        self._tree_item(task, item)
+        try:
+            self.tree_model.fetch_node(self.tree_model.root)
+        except json.JSONDecodeError:
+            QtWidgets.QMessageBox.critical(
+                self,
+                "Error",
+                "The project index file is corrupted "
+                "and could not be read. Starting with an empty index."
+            )
 
     def get_selection(self):
         """
-        Returns the currently selected item.
-        If nothing is selected, returns the invisible root item.
+        Returns the currently selected tree node.
+        If nothing is selected, returns the root node.
         """
-        selected = self.tree_widget.selectedItems()
-        if selected:
-            return selected[0]
-        else:
-            return self.tree_widget.invisibleRootItem()
+        selected = self.tree_widget.selectionModel().selectedIndexes()
+        return self.tree_model.node_from_index(selected[0] if selected else QtCore.QModelIndex())
 
     def open_menu(self, position):
         """
         Opens the right-click context menu for the selected tree item.
         """
-        item = self.tree_widget.itemAt(position)
+        item = self.tree_widget.indexAt(position)
         menu = QtWidgets.QMenu(self)
 
-        if item:
+        if item.isValid():
             add_action = menu.addAction("Add \t\t(N)")
             add_action.triggered.connect(self.add_tree_item)
 
@@ -311,10 +294,10 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.critical(self, 'Error', message)
             raise RuntimeError(message)
 
-        self.tree_widget.expandItem(parent)
-        item.setSelected(True)
-        parent.setSelected(False)
-        self.tree_widget.editItem(item)
+        item_index = self.tree_model.index_from_node(item)
+        self.tree_widget.expand(self.tree_model.index_from_node(parent))
+        self.tree_widget.setCurrentIndex(item_index)
+        self.tree_widget.edit(item_index)
 
         self.undo_stack.append(('add', item, parent))
 
@@ -322,12 +305,10 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         """
         Handles the logic for deleting a tree item.
         """
-        selected = self.tree_widget.selectedItems()
+        selected = self.tree_widget.selectionModel().selectedIndexes()
         if selected:
-            item = selected[0]
-            metadata = item.data(0, QtCore.Qt.UserRole)
-            removable = metadata.get("removable", False)
-            if not removable:
+            item = self.tree_model.node_from_index(selected[0])
+            if not item.removable:
                 QtWidgets.QMessageBox.information(
                     self,
                     "Non-removable Item",
@@ -335,17 +316,11 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
                     "Please contact support for manual override or structural changes."
                 )
                 return
-            parent = item.parent()
+            parent = item.parent
 
-            # Save undo info
-            index = parent.indexOfChild(item) if parent else self.tree_widget.indexOfTopLevelItem(item)
-            self.undo_stack.append(('delete', item.clone(), parent, index))
-
-            if parent:
-                parent.removeChild(item)
-            else:
-                index = self.tree_widget.indexOfTopLevelItem(item)
-                self.tree_widget.takeTopLevelItem(index)
+            # Save undo info, the node is kept so it can be inserted back with its children
+            index = self.tree_model.take_node(item)
+            self.undo_stack.append(('delete', item, parent, index))
 
     def read_local_asset_lib_data(self) -> dict:
         if not os.path.isfile(self.local_asset_lib):
@@ -394,21 +369,13 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
             self.asset_repo_location.setReadOnly(True)
             self.set_local_asset_repo()
 
-    def get_asset_repo_path_parts(self, item, parts=None):
+    def get_asset_repo_path_parts(self, item):
         """
-        Recursively collect the names of a QTreeWidgetItem and all its parent items.
+        Collect the names of a tree node and all its parent nodes, starting from the node.
 
-        This function walks up the tree hierarchy starting from the given item,
-        adding each item's text label (column 0) to a list. It is used to
-        construct an asset-repository path.
+        It is used to construct an asset-repository path.
         """
-        if parts is None:
-            parts = [item.text(0)]
-        parent = item.parent()
-        if parent:
-            parts.append(parent.text(0))
-            self.get_asset_repo_path_parts(parent, parts)
-        return parts
+        return item.path_parts()[::-1]
 
     def create_local_asset_repo_path(self):
         """
@@ -423,43 +390,20 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
             return asset_repo_path
         return None
 
-    def validate_item_name(self, item, column):
+    def validate_item_name(self, item, old_name):
         """
         Validates the item's name:
         - Sets to 'Untitled' if empty
         - Replaces not alphanumeric characters with underscores
         """
-        text = item.text(0)
+        text = item.name
         if not text:
-            item.setText(0, "Untitled")
+            self.tree_model.set_name(item, "Untitled")
             return
         safe = re.sub(r'[^A-Za-z0-9_-]+', '_', text)
-        if safe != item.text(0):
-            # Block signals to prevent setText() from re-triggering itemChanged
-            # and triggering validate_item_name to run again in a loop.
-            old = self.tree_widget.blockSignals(True)
-            item.setText(0, safe)
-            self.tree_widget.blockSignals(old)
-
-    def open_project_index(self, index_path: str) -> dict:
-        """
-        Load the project index JSON
-        Returns {} if the file is missing or invalid JSON.
-        """
-        if os.path.isfile(index_path):
-            try:
-                with open(index_path, 'r') as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                QtWidgets.QMessageBox.critical(
-                    self,
-                    "Error",
-                    f"The project index file at {index_path} is corrupted "
-                    "and could not be read. Starting with an empty index."
-                )
-                return {}
-        else:
-            return {}
+        if safe != text:
+            # set_name() does not emit name_changed, so validate_item_name is not triggered again in a loop.
+            self.tree_model.set_name(item, safe)
 
     def update_project_index(self):
         """
@@ -468,24 +412,17 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         """
         input_name = self.create_project_line_edit.text()
 
-        os.makedirs(os.path.dirname(self.project_index_path), exist_ok=True)
-        project_index = self.open_project_index(self.project_index_path)
-
         # Build Project Index update data
         index = {}
-        for i in range(self.tree_widget.topLevelItemCount()):
-            top_item = self.tree_widget.topLevelItem(i)
-            if top_item.text(0) == input_name:
-                root = top_item
-                project_key = top_item.text(0)
-                index[project_key] = {}
-                self._walk(root, index[project_key], 0)
-                break
+        root = self.tree_model.top_level_node(input_name)
+        if root:
+            # The whole project subtree is written back, so load the parts that were never expanded
+            self.tree_model.fetch_node(root, recursive=True)
+            index[root.name] = {}
+            self._walk(root, index[root.name], 0)
 
-        project_index.update(index)
-
-        with open(self.project_index_path, 'w') as output_file:
-            json.dump(project_index, output_file, indent=4)
+        for project_key, project_data in index.items():
+            self.project_index.set_project(project_key, project_data)
 
     def update_local_asset_lib_data(self):
         asset_lib_path = self.asset_repo_location.text()
@@ -493,9 +430,7 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         current_project = self.create_project_line_edit.text()
         repo = asset_repo_read.get(current_project, None)
         if repo != asset_repo_read:
-            asset_repo_read[current_project] = asset_lib_path
-            with open(self.local_asset_lib, "w") as f:
-                json.dump(asset_repo_read, f, indent=4)
+            locking.update_json(self.local_asset_lib, lambda data: data.update({current_project: asset_lib_path}))
 
     def _walk(self, parent, index, level):
         """
@@ -513,9 +448,8 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
                 return
         index[label] = {}
 
-        for row in range(parent.childCount()):
-            child_item = parent.child(row)
-            name = child_item.text(0)
+        for child_item in parent.children:
+            name = child_item.name
             index[label][name] = {}
             self._walk(child_item, index[label][name], level + 1)
 
@@ -541,15 +475,7 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
             if reply != QtWidgets.QMessageBox.Yes:
                 return
 
-        root_item = self.tree_widget.invisibleRootItem()
-
-        root = None
-
-        for i in range(root_item.childCount()):
-            item = root_item.child(i)
-            if item.text(0) == input_name:
-                root = item
-                break
+        root = self.tree_model.top_level_node(input_name)
 
         if not root:
             QtWidgets.QMessageBox.critical(
@@ -563,7 +489,7 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         reply = QtWidgets.QMessageBox.question(
             self,
             "Confirm Folder Creation",
-            f"This action will create or update the folder structure for '{root.text(0)}'. Do you wish to continue?"
+            f"This action will create or update the folder structure for '{root.name}'. Do you wish to continue?"
             f"Please note: this action cannot be undone.",
             QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
         )
@@ -571,13 +497,14 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         if reply != QtWidgets.QMessageBox.Yes:
             return
 
-        show_folder_path = os.path.join(self.pr_projects_path, root.text(0))
+        show_folder_path = os.path.join(self.pr_projects_path, root.name)
         if not os.path.isdir(self.pr_projects_path):
             os.makedirs(self.pr_projects_path)
         if self.added_task_subfolders_check.isChecked():
             self.check_dcc_name()
         self.set_item_removable(root, False)  # lock the project itself
 
+        self.tree_model.fetch_node(root, recursive=True)
         self._create_folders_recursive(root, show_folder_path)
 
         self.update_project_index()
@@ -588,37 +515,27 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
 
     def set_item_removable(self, item, removable: bool):
         """
-        Sets the 'removable' metadata flag for a QTreeWidgetItem..
+        Sets the 'removable' flag for a tree node.
         This is used during folder structure creation to lock or unlock items from deletion
-        and editing. The removable state is stored in the item's UserRole metadata
+        and editing. Only removable nodes are editable in the tree model.
         """
-        meta = item.data(0, QtCore.Qt.UserRole) or {}
-        meta["removable"] = removable
-        item.setData(0, QtCore.Qt.UserRole, meta)
-
-        if removable:
-            item.setFlags(item.flags() | QtCore.Qt.ItemIsEditable)
-        else:
-            item.setFlags(item.flags() & ~QtCore.Qt.ItemIsEditable)
+        self.tree_model.set_removable(item, removable)
 
     def _create_folders_recursive(self, item, current_path):
         """
         Recursively creates folders based on the tree widget structure.
         Also creates software-specific subfolders for task nodes.
         """
-        for i in range(item.childCount()):
-
-            child = item.child(i)
+        for child in item.children:
             self.set_item_removable(child, False)
 
-            folder_name = child.text(0)
-            metadata = child.data(0, QtCore.Qt.UserRole)
-            item_type = metadata.get("type")
+            folder_name = child.name
+            item_type = child.type()
 
             folder_path = os.path.join(current_path, folder_name)
 
             if item_type == "item" and _usd is not None:
-                stage = os.path.join(str(folder_path), f"main/v001/{child.text(0)}_v001.usda")
+                stage = os.path.join(str(folder_path), f"main/v001/{child.name}_v001.usda")
                 _usd.create_scene_from_json(self.usd_template_path, stage)
 
             if item_type == "task" and self.added_task_subfolders_check.isChecked():
@@ -644,7 +561,6 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         self.asset_repo_location.setHidden(True)
         self.added_task_subfolders_check.setChecked(False)
         self.undo_stack = []
-        self._rename_cache = None
 
     def check_dcc_name(self):
         """
@@ -697,38 +613,79 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
     # Search
     def run_search(self):
         """
-        Runs a search using a Trie and updates the search_output QListWidget
-        with the matching results.
+        Schedules a search of every level of the index. The search runs off the UI thread
+        once typing pauses, its results are applied by apply_search_results.
         """
         if not self.searching and self.search_line.text():
-            # self.search_output.clearSelection()
             self.searching = True
 
-        search_text = self.search_line.text().lower()
-
-        trie = trie_search.Trie()
-
-        list_items = []
-        for i in range(self.tree_widget.topLevelItemCount()):
-            top_item = self.tree_widget.topLevelItem(i)
-            list_items.append(top_item)
-
-        for prim in list_items:
-            trie.insert(prim.text(0).lower())
-
-        search_results = set(trie.autocomplete(search_text))
-
-        for i in range(self.tree_widget.topLevelItemCount()):
-            item = self.tree_widget.topLevelItem(i)
+        search_text = self.search_line.text()
+        if not search_text.strip():
+            self.search_runner.cancel()
+            self.clear_search_filter()
+            return
+        self.search_runner.request(search_text)
 
-            if item.text(0).lower() in search_results or self.search_line.text() == '':
-                item.setHidden(False)
-            else:
-                item.setHidden(True)
+    def apply_search_results(self, search_text: str, results: list):
+        """
+        Filters the tree down to the search results, expanding their parents and
+        selecting the best one. Results of a text that is no longer typed are ignored.
+        """
+        if search_text != self.search_line.text():
+            return
+        self.clear_search_filter()
+
+        visible, expanded = set(), set()
+        for result in results:
+            parts = result.path.split("/")
+            visible.update(index_cache.join_path(*parts[:depth]) for depth in range(1, len(parts) + 1))
+            expanded.update(index_cache.join_path(*parts[:depth]) for depth in range(1, len(parts)))
+        self._filter_children(self.tree_model.root, "", visible, expanded)
+
+        if results:
+            best = self.tree_model.node_at(results[0].path)
+            if best:
+                index = self.tree_model.index_from_node(best)
+                self.tree_widget.setCurrentIndex(index)
+                self.tree_widget.scrollTo(index)
+
+    def _filter_children(self, node, path: str, visible: set, expanded: set):
+        """
+        Hides the children of a node that are not part of the search results and
+        expands the ones leading to deeper results.
+        """
+        self.tree_model.fetch_node(node)
+        parent_index = self.tree_model.index_from_node(node)
+        self.search_filtered.append(node)
+        for row, child in enumerate(node.children):
+            child_path = index_cache.join_path(path, child.name) if path else child.name
+            self.tree_widget.setRowHidden(row, parent_index, child_path not in visible)
+            if child_path in expanded:
+                self.tree_widget.expand(self.tree_model.index_from_node(child))
+                self._filter_children(child, child_path, visible, expanded)
+
+    def clear_search_filter(self):
+        """
+        Shows again every row hidden by the previous search.
+        """
+        for node in self.search_filtered:
+            if not self.tree_model.is_attached(node):
+                continue
+            parent_index = self.tree_model.index_from_node(node)
+            for row in range(len(node.children)):
+                self.tree_widget.setRowHidden(row, parent_index, False)
+        self.search_filtered = []
 
     def reset_search_state(self, text):
         if not text:
             self.searching = False
+            self.search_runner.cancel()
+            self.clear_search_filter()
+
+    def closeEvent(self, event):
+        self.search_runner.cancel()
+        self.search_runner.wait()
+        super(TraceProjectIndex, self).closeEvent(event)
 
     # Ctrl + Z Logic
     def undo_action(self):
@@ -743,44 +700,24 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
 
         if action[0] == 'add':
             _, item, parent = action
-            if parent:
-                parent.removeChild(item)
-            else:
-                index = self.tree_widget.indexOfTopLevelItem(item)
-                self.tree_widget.takeTopLevelItem(index)
+            self.tree_model.take_node(item)
 
         elif action[0] == 'delete':
             _, item, parent, index = action
-            if parent:
-                parent.insertChild(index, item)
-            else:
-                self.tree_widget.insertTopLevelItem(index, item)
+            self.tree_model.insert_node(parent, item, index)
         elif action[0] == 'rename':
             _, item, old_name, new_name = action
-            item.setText(0, old_name)
+            self.tree_model.set_name(item, old_name)
 
-    def cache_selected_item_name(self):
-        """
-        Stores the current item's name to track renames.
-        """
-        selected = self.tree_widget.selectedItems()
-        if selected:
-            self._rename_cache = selected[0].text(0)
-        else:
-            self._rename_cache = None
-
-    def track_rename(self, item, column):
+    def track_rename(self, item, old_name):
         """
         Tracks rename actions and adds them to the undo stack.
         """
-        old_name = self._rename_cache
-        new_name = item.text(column)
+        new_name = item.name
 
         if old_name and old_name != new_name:
             self.undo_stack.append(('rename', item, old_name, new_name))
 
-        self._rename_cache = None
-
     def show_info_popup(self):
         """
         Displays the help popup window when the info button is clicked.
@@ -804,7 +741,7 @@ class TraceProjectIndex(QtWidgets.QMainWindow):
         )
 
 
-class MyTreeWidget(QtWidgets.QTreeWidget):
+class MyTreeView(QtWidgets.QTreeView):
     delete_key_pressed = QtCore.Signal()
 
     def mousePressEvent(self, event):
@@ -813,7 +750,7 @@ class MyTreeWidget(QtWidgets.QTreeWidget):
         """
         if not self.indexAt(event.position().toPoint()).isValid():
             self.selectionModel().clear()
-        return super(MyTreeWidget, self).mousePressEvent(event)
+        return super(MyTreeView, self).mousePressEvent(event)
 
     def keyPressEvent(self, event):
         """
@@ -822,7 +759,7 @@ class MyTreeWidget(QtWidgets.QTreeWidget):
         if event.key() in (QtCore.Qt.Key_Delete, QtCore.Qt.Key_Backspace):
             self.delete_key_pressed.emit()
         else:
-            super(MyTreeWidget, self).keyPressEvent(event)
+            super(MyTreeView, self).keyPressEvent(event)
 
 
 if __name__ == "__main__":
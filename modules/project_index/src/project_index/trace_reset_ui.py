@@ -1,16 +1,17 @@
 import importlib
-import json
 import logging
 import os
 import shutil
 import subprocess
 import sys
-from functools import partial, reduce
+from functools import partial
 from pathlib import Path
 
-from project_index import _usd
+from project_index import _usd, fuzzy, index_cache, index_models, search_index, search_worker, trie_search, watcher
+from tracepath import events, publish
 
-importlib.reload(_usd)
+for module in (_usd, index_cache, trie_search, fuzzy, search_index, search_worker, index_models, watcher):
+    importlib.reload(module)
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
@@ -20,6 +21,18 @@ except ImportError:
     from PySide2 import QtCore, QtGui, QtWidgets
 
 
+class WatchEventBridge(QtCore.QObject):
+    """
+    Forwards watcher and publish events from their background thread to the UI thread.
+    """
+    event = QtCore.Signal(object)
+
+
+# Maximum number of search results listed
+SEARCH_LIMIT = 50
+PUBLISH_PAGE_SIZE = 100
+
+
 class TraceResetUI(QtWidgets.QMainWindow):
     def __init__(self, parent=None):
         super(TraceResetUI, self).__init__(parent=parent)
@@ -31,9 +44,10 @@ class TraceResetUI(QtWidgets.QMainWindow):
         if not framework:
             raise EnvironmentError("PR_TRACEPATH_FRAMEWORK is not set")
 
-        self.project_index_path = os.path.join(framework, "config/trace_project_index.json")
-        with open(self.project_index_path, "r") as read_file:
-            self.pr_index_read = json.load(read_file)
+        self.project_index = index_cache.get_project_index(framework)
+        self.search_index = search_index.get_search_index(self.project_index)
+        self.search_runner = search_worker.DebouncedSearch(
+            lambda text: self.search_index.query(text, SEARCH_LIMIT), parent=self)
 
         self.pr_projects_path = os.environ.get("PR_PROJECTS_PATH")
         if not self.pr_projects_path:
@@ -56,6 +70,16 @@ class TraceResetUI(QtWidgets.QMainWindow):
         self.display_layout = QtWidgets.QVBoxLayout()
         self.display_widget.setLayout(self.display_layout)
 
+        # Search
+        self.search_line = QtWidgets.QLineEdit()
+        self.search_line.setPlaceholderText("Search")
+        self.display_layout.addWidget(self.search_line)
+
+        self.search_results = self._list_view()
+        self.search_results.setMaximumHeight(120)
+        self.search_results.setHidden(True)
+        self.display_layout.addWidget(self.search_results)
+
         # Project elements layout
         self.project_elements_layout = QtWidgets.QHBoxLayout()
         self.display_layout.addLayout(self.project_elements_layout)
@@ -67,7 +91,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
         self.projects_label = QtWidgets.QLabel("Projects")
         self.projects_layout.addWidget(self.projects_label)
 
-        self.projects = QtWidgets.QListWidget(self)
+        self.projects = self._list_view()
         self.projects_layout.addWidget(self.projects)
 
         self.projects.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
@@ -80,7 +104,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
         self.groups_label = QtWidgets.QLabel("Groups")
         self.groups_layout.addWidget(self.groups_label)
 
-        self.groups = QtWidgets.QListWidget(self)
+        self.groups = self._list_view()
         self.groups_layout.addWidget(self.groups)
 
         # Item List
@@ -90,7 +114,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
         self.items_label = QtWidgets.QLabel("Items")
         self.items_layout.addWidget(self.items_label)
 
-        self.items = QtWidgets.QListWidget(self)
+        self.items = self._list_view()
         self.items_layout.addWidget(self.items)
 
         # Task List
@@ -100,7 +124,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
         self.tasks_label = QtWidgets.QLabel("Tasks")
         self.tasks_layout.addWidget(self.tasks_label)
 
-        self.tasks = QtWidgets.QListWidget(self)
+        self.tasks = self._list_view()
         self.tasks_layout.addWidget(self.tasks)
 
         # Main USD list
@@ -109,7 +133,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
 
         self.main_usd_label = QtWidgets.QLabel("Main Versions")
         self.usd_list_layout.addWidget(self.main_usd_label)
-        self.main_usd = QtWidgets.QListWidget(self)
+        self.main_usd = self._list_view()
         self.usd_list_layout.addWidget(self.main_usd)
 
         # USD Layer Composition data info message:
@@ -160,10 +184,10 @@ class TraceResetUI(QtWidgets.QMainWindow):
         self.populate_project_list()
 
         # SIGNALS ---------------------------------
-        self.projects.itemSelectionChanged.connect(self.on_project_changed)
-        self.groups.itemSelectionChanged.connect(self.on_group_changed)
-        self.items.itemSelectionChanged.connect(self.on_pr_item_changed)
-        self.main_usd.itemSelectionChanged.connect(self.on_main_usd_version_changed)
+        self.projects.selectionModel().selectionChanged.connect(self.on_project_changed)
+        self.groups.selectionModel().selectionChanged.connect(self.on_group_changed)
+        self.items.selectionModel().selectionChanged.connect(self.on_pr_item_changed)
+        self.main_usd.selectionModel().selectionChanged.connect(self.on_main_usd_version_changed)
 
         for widget in (self.projects, self.groups, self.items, self.tasks):
             widget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
@@ -177,14 +201,49 @@ class TraceResetUI(QtWidgets.QMainWindow):
 
         self.delete_btn.clicked.connect(self.on_del_exec)
 
+        self.search_line.textEdited.connect(self.run_search)
+        self.search_line.returnPressed.connect(self.jump_to_first_result)
+        self.search_runner.results_ready.connect(self.show_search_results)
+        self.search_runner.failed.connect(
+            lambda text, error: logging.error(f"Search for '{text}' failed: {error}"))
+        self.search_results.clicked.connect(lambda index: self.jump_to_path(index.data()))
+
+        # Folders created or deleted on disk refresh the lists showing them
+        self.watch_bridge = WatchEventBridge(self)
+        self.watch_bridge.event.connect(self.on_watch_event)
+        self._watch_callback = self.watch_bridge.event.emit
+        self.watcher = watcher.get_watcher(self.pr_projects_path)
+        self.watcher.subscribe(self._watch_callback)
+
+        # New publishes of the selected item refresh the main USD versions, only the selected
+        # project is followed (see on_project_changed)
+        self.publish_bridge = WatchEventBridge(self)
+        self.publish_bridge.event.connect(self.on_publish_event)
+        self._publish_callback = self.publish_bridge.event.emit
+        self.publish_events = None
+
         # PROJECT COMPONENTS BROWSING ---------------------------------
 
+    def _list_view(self) -> QtWidgets.QListView:
+        """
+        Creates a list view backed by its own IndexListModel.
+        The rows are only rendered for the visible part of the list.
+        """
+        view = QtWidgets.QListView(self)
+        view.setModel(index_models.IndexListModel(view))
+        view.setUniformItemSizes(True)
+        return view
+
+    def clear_lists(self, *widgets):
+        for widget in widgets:
+            widget.model().clear()
+
     def get_selection(self, widget) -> str | None:
         """
-        Returns the name of the selected QtListWidgetItem or None
+        Returns the name of the selected row or None
         """
-        selected = widget.selectedItems()
-        return selected[0].text() if selected else None
+        selected = widget.selectionModel().selectedIndexes()
+        return selected[0].data() if selected else None
 
     def selected_project(self) -> str:
         return self.get_selection(self.projects)
@@ -198,146 +257,141 @@ class TraceResetUI(QtWidgets.QMainWindow):
     def selected_task(self) -> str:
         return self.get_selection(self.tasks)
 
-    def create_list_item(self, item_name: str, parent_widget: QtWidgets.QListWidget, metadata=None):
+    def create_list_item(self, item_name: str, parent_widget: QtWidgets.QListView, metadata=None) -> tuple:
         """
-        Creates a QListWidgetItem, embeds metadata, and adds it to the parent widget.
+        Creates a list row (name, metadata) for the parent widget's model.
         The function modifies the provided metadata by adding the 'item_name' and
         'parent' (parent widget) if metadata is not None.
         """
-        item = QtWidgets.QListWidgetItem(item_name)
         if metadata:
             metadata["item_name"] = item_name
             metadata["parent"] = parent_widget
-            item.setData(QtCore.Qt.UserRole, metadata)
-        parent_widget.addItem(item)
+        return item_name, metadata
+
+    def follow_publish_events(self, project: str | None):
+        """
+        Follows the publish events of the project show_data folder with a subscriber of this
+        window, the subscriber of the previously selected project is stopped.
+        """
+        show_data = Path(self.pr_projects_path) / project / "show_data" if project else None
+        if self.publish_events is not None:
+            if self.publish_events.logs[0].show_data == show_data:
+                return
+            self.publish_events.stop()
+            self.publish_events = None
+        if show_data:
+            self.publish_events = events.EventSubscriber([show_data])
+            self.publish_events.subscribe(events.version_cache_invalidator())
+            self.publish_events.subscribe(self._publish_callback)
+            self.publish_events.start()
 
     def populate_project_list(self):
         """
         Populates the project list (self.projects) during initialization
         or when the tool is reset.
         """
-        for i in self.pr_index_read.keys():
+        rows = []
+        for i in self.project_index.projects():
             meta = {"preview_path": i, "project": i, "type": "project"}
-            self.create_list_item(i, self.projects, meta)
-
-    def get_nested_data(self, data: dict, data_keys: list) -> dict or None:
-        """
-        Retrieve data from the nested dictionary (project_index)
-        """
-        if not isinstance(data, dict):
-            logging.warning("Invalid data provided; data must be a dictionary.")
-            return
-        result = reduce(lambda df, data_key: df.get(data_key) if isinstance(df, dict) else None, data_keys,
-                        data)
-        return result
+            rows.append(self.create_list_item(i, self.projects, meta))
+        self.projects.model().set_rows(rows)
 
     def on_project_changed(self):
         """
         Executes when the user changes the project selection.
         Clears all dependent widgets and, based on the newly selected project,
-        populates the groups QListWidget.
+        populates the groups list.
         """
-        self.main_usd.clear()
-        self.tasks.clear()
-        self.items.clear()
-        self.groups.clear()
+        self.clear_lists(self.main_usd, self.tasks, self.items, self.groups)
         project = self.selected_project()
+        self.follow_publish_events(project)
         if not project:
             return
-        data_keys = [project, "groups"]
-
-        groups = self.get_nested_data(self.pr_index_read, data_keys)
+        groups = self.project_index.children(project)
         if not groups:
             logging.warning(f"No 'groups' data found in the index for project: '{project}'. Skipping population.")
             return
-        for group, meta in groups.items():
+        rows = []
+        for group in groups:
             meta = {"preview_path": f"{project}/{group}", "project": project, "type": "group"}
-            self.create_list_item(group, self.groups, meta)
+            rows.append(self.create_list_item(group, self.groups, meta))
+        self.groups.model().set_rows(rows)
 
     def on_group_changed(self):
         """
         Executes when the user changes the group selection.
         Clears all dependent widgets and, based on the newly selected group,
-        populates the items QListWidget.
+        populates the items list.
         """
-        self.main_usd.clear()
-        self.tasks.clear()
-        self.items.clear()
+        self.clear_lists(self.main_usd, self.tasks, self.items)
         project = self.selected_project()
         group = self.selected_group()
         if not group or not project:
             return
 
-        data_keys = [project, "groups", group, "items"]
-
-        pr_items = self.get_nested_data(self.pr_index_read, data_keys)
+        pr_items = self.project_index.children(f"{project}/{group}")
         if not pr_items:
             logging.warning(
                 f"No 'items' data found in the index for project: '{project}', group: '{group}'. Skipping population.")
             return
-        for pr_item, meta in pr_items.items():
+        rows = []
+        for pr_item in pr_items:
             meta = {"preview_path": f"{project}/{group}/{pr_item}", "project": project, "type": "item"}
-            self.create_list_item(pr_item, self.items, meta)
+            rows.append(self.create_list_item(pr_item, self.items, meta))
+        self.items.model().set_rows(rows)
 
-    def read_published_data(self, show_data: str) -> dict | None:
+    def get_publish_store(self, project: str) -> publish.PublishStore:
         """
-        Reads project published data file
+        Returns the publish store of a project (show_data/published.db)
         """
-        try:
-            with open(show_data, "r") as data_read:
-                published_data = json.load(data_read)
-            return published_data
-        except FileNotFoundError:
-            logging.error(f"Show data file \n{show_data} is not found")
-            return None
+        return publish.get_publish_store(Path(self.pr_projects_path) / project / "show_data")
 
     def on_pr_item_changed(self):
         """
         Executes when the user changes the item selection.
         Clears all dependent widgets and, based on the newly selected item,
-        populates the tasks and main_usd QListWidgets.
+        populates the tasks and main_usd lists.
         Tasks and Main USD are populated at the same time because Main USD versioning
         is handled on a per-item basis and combines all the latest task edits.
         """
-        self.main_usd.clear()
-        self.tasks.clear()
+        self.clear_lists(self.main_usd, self.tasks)
         project = self.selected_project()
         group = self.selected_group()
         pr_item = self.selected_item()
         if not pr_item or not group or not project:
             return
 
-        data_keys = [project, "groups", group, "items", pr_item, "tasks"]
-        pr_tasks = self.get_nested_data(self.pr_index_read, data_keys)
+        pr_tasks = self.project_index.children(f"{project}/{group}/{pr_item}")
         if pr_tasks:
-            for pr_task, meta in pr_tasks.items():
+            rows = []
+            for pr_task in pr_tasks:
                 meta = {"preview_path": f"{project}/{group}/{pr_item}/{pr_task}",
                         "project": project, "type": "task"}
-                self.create_list_item(pr_task, self.tasks, meta)
+                rows.append(self.create_list_item(pr_task, self.tasks, meta))
+            self.tasks.model().set_rows(rows)
         else:
             logging.warning(
                 f"No 'tasks' data found in the index for project: '{project}', group: '{group}', "
                 f"item: '{pr_item}'. Skipping population.")
 
-        show_data = os.path.join(self.pr_projects_path, project, "show_data/published_data.json")
-
-        published_data = self.read_published_data(show_data)
-
-        if not published_data:
-            logging.warning(f"Failed to read published data file for project: '{project}'. Skipping version load.")
-            return
-
+        # Latest versions first, the next page is fetched when the list is scrolled to its end
         data_key = f"{group}_{pr_item}"
-        if not data_key in published_data.keys():
+        pages = self.get_publish_store(project).pages(PUBLISH_PAGE_SIZE, publish_key=data_key,
+                                                      shot_manifest=True)
+
+        def next_rows():
+            rows = []
+            for record in next(pages, []):
+                meta = {"preview_path": record.path,
+                        "project": project, "type": "main_usd", "publish_key": data_key}
+                rows.append(self.create_list_item(record.path.split("/")[-1], self.main_usd, meta))
+            return rows
+
+        rows = next_rows()
+        if not rows:
             logging.warning(f"No published versions found for key '{group}_{pr_item}' in project data.")
             return
-
-        for version in published_data[data_key].keys():
-            ver_preview_name = version.split("/")[-1]
-
-            meta = {"preview_path": version,
-                    "project": project, "type": "main_usd"}
-            self.create_list_item(ver_preview_name, self.main_usd, meta)
+        self.main_usd.model().set_rows(rows, next_rows)
 
     def on_main_usd_version_changed(self):
         """
@@ -345,13 +399,10 @@ class TraceResetUI(QtWidgets.QMainWindow):
 
         """
         self.usd_data.clear()
-        selected = self.main_usd.selectedItems()
+        selected = self.main_usd.selectionModel().selectedIndexes()
         if not selected:
             return
-        selected_main = selected[0]
-        if not selected_main:
-            return
-        usd_file_path = selected_main.data(QtCore.Qt.UserRole)["preview_path"]
+        usd_file_path = selected[0].data(QtCore.Qt.UserRole)["preview_path"]
         if not os.path.isfile(usd_file_path):
             logging.error(f"Published USD file '{usd_file_path}' was not found. Skipping loading process.")
             return
@@ -401,7 +452,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
         return item
 
     # PROJECT FOLDERS AND DATA MODIFICATION ---------------------------------
-    def open_context_menu(self, widget: QtWidgets.QListWidget, position: QtCore.QPoint, functions: dict):
+    def open_context_menu(self, widget: QtWidgets.QAbstractItemView, position: QtCore.QPoint, functions: dict):
         """
         Opens a context menu for the selected item.
         Parameters:
@@ -411,7 +462,11 @@ class TraceResetUI(QtWidgets.QMainWindow):
                    and each value is the function to execute when that action
                    is triggered.
         """
-        item = widget.itemAt(position)
+        if isinstance(widget, QtWidgets.QListWidget):
+            item = widget.itemAt(position)
+        else:
+            index = widget.indexAt(position)
+            item = QtCore.QPersistentModelIndex(index) if index.isValid() else None
         menu = QtWidgets.QMenu(self)
         if item:
             for action_text, func_to_execute in functions.items():
@@ -420,24 +475,24 @@ class TraceResetUI(QtWidgets.QMainWindow):
 
         menu.exec(widget.viewport().mapToGlobal(position))
 
-    def open_mark_to_del_menu(self, widget: QtWidgets.QListWidget, position: QtCore.QPoint):
+    def open_mark_to_del_menu(self, widget: QtWidgets.QListView, position: QtCore.QPoint):
         """
-        Opens a menu to stage item to delete, connected to every QListWidget that outputs elements of the project
+        Opens a menu to stage item to delete, connected to every list that outputs elements of the project
         """
         functions = {"Mark to delete": self.add_to_delete_list}
         self.open_context_menu(widget, position, functions)
 
-    def add_to_delete_list(self, orig_item: QtWidgets.QListWidgetItem):
+    def add_to_delete_list(self, orig_index: QtCore.QPersistentModelIndex):
         """
         Stages an item for deletion, creating a copy of the item in the marked_to_delete list.
         """
-        metadata = orig_item.data(QtCore.Qt.UserRole)
+        metadata = orig_index.data(QtCore.Qt.UserRole)
         if not metadata or "preview_path" not in metadata or "parent" not in metadata:
             logging.warning("No/invalid metadata; cannot stage for deletion.")
             return
-        orig_item.setHidden(True)
         preview_path = metadata["preview_path"]
         parent_widget = metadata["parent"]
+        parent_widget.setRowHidden(orig_index.row(), True)
 
         item = QtWidgets.QListWidgetItem(preview_path)
         item.setData(QtCore.Qt.UserRole + 1, metadata)
@@ -451,42 +506,34 @@ class TraceResetUI(QtWidgets.QMainWindow):
         functions = {"Restore item": self.restore_item_from_del_list}
         self.open_context_menu(self.marked_to_delete, position, functions)
 
-    def _find_item_by_name(self, item_name: str,
-                           parent_widget: QtWidgets.QListWidget) -> QtWidgets.QListWidgetItem | None:
-        """Return the QListWidgetItem matching the given text, or None if not found."""
-        for i in range(parent_widget.count()):
-            item = parent_widget.item(i)
-            if item and item.text() == item_name:
-                return item
-        return None
-
     def restore_item_from_del_list(self, item: QtWidgets.QListWidgetItem):
         """
         Removes an item from the deletion list and restores its visibility
-        in the original project context QListWidget.
+        in the original project context list.
         """
         self.marked_to_delete.takeItem(self.marked_to_delete.row(item))
         item_name = item.data(QtCore.Qt.UserRole + 1)["item_name"]
         parent_widget = item.data(QtCore.Qt.UserRole + 1)["parent"]
-        found_item = self._find_item_by_name(item_name, parent_widget)
-        if not found_item:
+        row = parent_widget.model().row_of(item_name)
+        if row is None:
             logging.warning(f"Could not find '{item_name}' in parent to restore")
             return
-        if found_item.isHidden():
-            found_item.setHidden(False)
+        if parent_widget.isRowHidden(row):
+            parent_widget.setRowHidden(row, False)
             parent_widget.clearSelection()
-            parent_widget.setCurrentItem(found_item)
+            parent_widget.setCurrentIndex(parent_widget.model().index(row))
 
-    def _restore_selection(self, prev_selection: str, parent_widget: QtWidgets.QListWidget):
+    def _restore_selection(self, prev_selection: str, parent_widget: QtWidgets.QListView):
         """
-        Restores the previously selected QListWidgetItems after a cleanup and folder deletion
+        Restores the previously selected rows after a cleanup and folder deletion
         operation, once the tool has been reset.
         """
-        found_item = self._find_item_by_name(prev_selection, parent_widget)
-        if found_item:
-            parent_widget.setCurrentItem(found_item)
-        else:
-            parent_widget.setCurrentRow(0)
+        model = parent_widget.model()
+        row = model.row_of(prev_selection)
+        if row is None:
+            row = 0
+        if row < model.rowCount():
+            parent_widget.setCurrentIndex(model.index(row))
 
     def open_inspect_usd_file_menu(self, position: QtCore.QPoint):
         """
@@ -495,11 +542,11 @@ class TraceResetUI(QtWidgets.QMainWindow):
         functions = {"Open in USD View": self.open_in_usd_view, "Mark to delete": self.add_to_delete_list}
         self.open_context_menu(self.main_usd, position, functions)
 
-    def open_in_usd_view(self, item: QtWidgets.QListWidgetItem):
+    def open_in_usd_view(self, index: QtCore.QPersistentModelIndex):
         """
         Opens usd view to inspect a selected main usd file
         """
-        usd_file_path = item.data(QtCore.Qt.UserRole)["preview_path"]
+        usd_file_path = index.data(QtCore.Qt.UserRole)["preview_path"]
         cmd = ["usdview", usd_file_path]
         try:
             subprocess.Popen(cmd)
@@ -509,7 +556,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
     def clean_up_ui(self):
         """
         Executed after all data modifications (folders on disk, project_index, and show_data) are complete.
-        Saves the current project, group, and item selections in temporary variables and clears all QListWidgets.
+        Saves the current project, group, and item selections in temporary variables and clears all lists.
         Runs a new query on projects using the latest updated data, and then restores the previous selection.
         """
         if self.marked_to_delete.count() == 0:
@@ -525,12 +572,7 @@ class TraceResetUI(QtWidgets.QMainWindow):
         _cur_gr = self.selected_group()
         _cur_itm = self.selected_item()  # Use standard Python casing
 
-        self.main_usd.clear()
-        self.tasks.clear()
-        self.items.clear()
-        self.groups.clear()
-
-        self.projects.clear()
+        self.clear_lists(self.main_usd, self.tasks, self.items, self.groups, self.projects)
 
         self.populate_project_list()
 
@@ -551,30 +593,31 @@ class TraceResetUI(QtWidgets.QMainWindow):
                 QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
         ) != QtWidgets.QMessageBox.Yes:
             return
-        removed, failed = [], []
+        removed, failed, index_paths = [], [], []
         for item in items_to_process:
             marked_item_meta = item.data(QtCore.Qt.UserRole + 1)
 
             path_to_remove = Path(self.pr_projects_path) / item.text()
             try:
                 if marked_item_meta["type"] == "main_usd":
-                    show_data = os.path.join(self.pr_projects_path, marked_item_meta["project"],
-                                             "show_data/published_data.json")
-                    published_data = self.read_published_data(show_data) or {}
-                    self.remove_meta_key_recursive(published_data, item.text())
-                    with open(show_data, "w") as write_file:
-                        json.dump(published_data, write_file, indent=4)
+                    self.get_publish_store(marked_item_meta["project"]).remove(
+                        marked_item_meta["publish_key"], item.text())
 
                 self.remove_filesystem_item(path_to_remove)
 
-                self.remove_meta_key_recursive(self.pr_index_read, marked_item_meta["item_name"])
+                if marked_item_meta["type"] != "main_usd":
+                    # Project index entries are staged by their full project/group/item/task path
+                    index_paths.append(marked_item_meta["preview_path"])
                 removed.append(str(path_to_remove))
             except Exception as e:
                 failed.append(str(path_to_remove))
                 logging.error(f"Failed to delete {path_to_remove} or update index: {e}")
                 continue  # Move to the next item
-        with open(self.project_index_path, "w") as write_file:
-            json.dump(self.pr_index_read, write_file, indent=4)
+
+        # All staged index entries are removed in a single index transaction
+        self.project_index.remove_many(index_paths)
+        for index_path in index_paths:
+            self.search_index.remove(index_path)
 
         self.clean_up_ui()
 
@@ -592,6 +635,106 @@ class TraceResetUI(QtWidgets.QMainWindow):
         )
         logging.info(f"All message: {msg}")
 
+    # FOLDER WATCHER ---------------------------------
+    def on_watch_event(self, event: watcher.WatchEvent):
+        """
+        Refreshes the list showing the parent of a group, item, task or version folder
+        created or deleted on disk, keeping the current selection and the staged rows hidden.
+        """
+        if event.level != "version":
+            if event.kind == "created":
+                self.search_index.add(event.index_path)
+            else:
+                self.search_index.remove(event.index_path)
+
+        selection = (self.selected_project(), self.selected_group(), self.selected_item())
+        if event.level == "version":
+            if not all(selection):
+                return
+            item_path = index_cache.join_path(*selection)
+            if event.index_path == item_path or event.index_path.startswith(item_path + "/"):
+                self.on_pr_item_changed()
+                self._hide_staged_rows()
+            return
+
+        depth = len(event.parts)
+        if tuple(event.parts[:-1]) != selection[:depth - 1]:
+            return
+        refresh = {2: self.on_project_changed, 3: self.on_group_changed, 4: self.on_pr_item_changed}[depth]
+        refresh()
+        # Re-selecting a row repopulates the lists below it through the selection signals
+        for name, widget in list(zip(selection, (self.projects, self.groups, self.items)))[depth - 1:]:
+            row = widget.model().row_of(name) if name else None
+            if row is None:
+                break
+            widget.setCurrentIndex(widget.model().index(row))
+        self._hide_staged_rows()
+
+    def on_publish_event(self, event: events.PublishEvent):
+        """
+        Lists the versions published to the selected item as soon as they are announced.
+        """
+        project, group, pr_item = self.selected_project(), self.selected_group(), self.selected_item()
+        if event.show == project and event.publish_key == f"{group}_{pr_item}":
+            self.on_pr_item_changed()
+            self._hide_staged_rows()
+
+    def _hide_staged_rows(self):
+        for i in range(self.marked_to_delete.count()):
+            metadata = self.marked_to_delete.item(i).data(QtCore.Qt.UserRole + 1)
+            parent_widget = metadata["parent"]
+            row = parent_widget.model().row_of(metadata["item_name"])
+            if row is not None:
+                parent_widget.setRowHidden(row, True)
+
+    # SEARCH ---------------------------------
+    def run_search(self, text: str):
+        """
+        Schedules a search of every project, group, item and task. The search runs off the
+        UI thread once typing pauses, its results are listed by show_search_results.
+        """
+        if not text.strip():
+            self.search_runner.cancel()
+            self.show_search_results(text, [])
+            return
+        self.search_runner.request(text)
+
+    def show_search_results(self, text: str, results: list):
+        """
+        Lists the search results. Results of a text that is no longer typed are ignored.
+        """
+        if text != self.search_line.text():
+            return
+        self.search_results.model().set_rows([(result.path, None) for result in results])
+        self.search_results.setHidden(not results)
+
+    def jump_to_first_result(self):
+        model = self.search_results.model()
+        if model.rowCount():
+            self.jump_to_path(model.index(0).data())
+
+    def jump_to_path(self, path: str):
+        """
+        Selects the project, group, item and task of a "project/group/item/task" path.
+        Every selection populates the next list through the selection signals.
+        """
+        for name, widget in zip(path.split("/"), (self.projects, self.groups, self.items, self.tasks)):
+            row = widget.model().row_of(name)
+            if row is None:
+                logging.warning(f"'{path}' is not in the project index anymore.")
+                break
+            index = widget.model().index(row)
+            widget.setCurrentIndex(index)
+            widget.scrollTo(index)
+        self._hide_staged_rows()
+
+    def closeEvent(self, event):
+        self.watcher.unsubscribe(self._watch_callback)
+        self.follow_publish_events(None)
+        self.search_runner.cancel()
+        self.search_runner.wait()
+        super(TraceResetUI, self).closeEvent(event)
+
     def remove_filesystem_item(self, path_to_remove: Path):
         """
         Removes files from disk
@@ -615,20 +758,6 @@ class TraceResetUI(QtWidgets.QMainWindow):
         except PermissionError as e:
             logging.error(f"Permission denied while removing {path_to_remove}\n{e}")
 
-    def remove_meta_key_recursive(self, meta: dict, key_to_delete: str):
-        """
-        Recursively deletes an entry by key from a nested dictionary.
-        """
-        if isinstance(meta, dict):
-            # Attempt to delete the key, returns None if the key is not found in the first step of the iteration
-            meta.pop(key_to_delete, None)
-            # Iterate over the remaining items to continue the recursion.
-            # Iterates over a copy of the keys (list(meta.items()))
-            for key, value in list(meta.items()):
-                # Recurse into the value if it is another dictionary
-                if isinstance(value, dict):
-                    self.remove_meta_key_recursive(value, key_to_delete)
-
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
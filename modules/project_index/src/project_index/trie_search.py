@@ -22,6 +22,29 @@ class Trie:
 
         cur.end_of_word = True
 
+    def remove(self, word: str) -> bool:
+        """
+        Removes a word from the Trie and prunes the nodes no other word uses.
+        Returns False if the word was not in the Trie.
+        """
+        path = [self.root]
+        for char in word:
+            node = path[-1].children.get(char)
+            if node is None:
+                return False
+            path.append(node)
+        if not path[-1].end_of_word:
+            return False
+        path[-1].end_of_word = False
+
+        # Walk back up, dropping the nodes that no longer lead to any word
+        for depth in range(len(word), 0, -1):
+            node = path[depth]
+            if node.end_of_word or node.children:
+                break
+            del path[depth - 1].children[word[depth - 1]]
+        return True
+
     def starts_with_prefix(self, prefix):
         """
         Searches for the node corresponding to the prefix.
@@ -52,3 +75,124 @@ class Trie:
         if node:
             self.collect_words(node, prefix, results)
         return results
+
+
+class RadixNode:
+    __slots__ = ("label", "children", "end_of_word")
+
+    def __init__(self, label: str = "", end_of_word: bool = False):
+        self.label = label  # edge label leading to this node
+        self.children = {}  # first character of the child label -> child node
+        self.end_of_word = end_of_word
+
+
+class RadixTrie:
+    """
+    Compact (Patricia) variant of Trie with the same insert/remove/autocomplete API.
+
+    Chains of single-child nodes are collapsed into one node holding the whole edge
+    label, so a name costs one small __slots__ node per branch point instead of one
+    node and dictionary per character. Words are collected iteratively and joined once
+    per result.
+    """
+
+    def __init__(self):
+        self.root = RadixNode()
+
+    def insert(self, word: str) -> None:
+        node, i = self.root, 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None:
+                node.children[word[i]] = RadixNode(word[i:], end_of_word=True)
+                return
+
+            label = child.label
+            common = 0
+            limit = min(len(label), len(word) - i)
+            while common < limit and label[common] == word[i + common]:
+                common += 1
+
+            if common < len(label):
+                # Split the edge: the shared part becomes a new node above the child
+                split = RadixNode(label[:common])
+                child.label = label[common:]
+                split.children[child.label[0]] = child
+                node.children[word[i]] = split
+                child = split
+            node = child
+            i += common
+        node.end_of_word = True
+
+    def remove(self, word: str) -> bool:
+        """
+        Removes a word and merges the nodes left with a single child.
+        Returns False if the word was not in the Trie.
+        """
+        parent, node, i = None, self.root, 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None or not word.startswith(child.label, i):
+                return False
+            parent, node = node, child
+            i += len(child.label)
+        if not node.end_of_word:
+            return False
+        node.end_of_word = False
+
+        if parent is None:
+            return True
+        if not node.children:
+            del parent.children[node.label[0]]
+            if parent is not self.root and not parent.end_of_word and len(parent.children) == 1:
+                self._merge(parent)
+        elif len(node.children) == 1:
+            self._merge(node)
+        return True
+
+    @staticmethod
+    def _merge(node: RadixNode) -> None:
+        (child,) = node.children.values()
+        node.label += child.label
+        node.children = child.children
+        node.end_of_word = child.end_of_word
+
+    def starts_with_prefix(self, prefix: str) -> tuple[RadixNode, str] | None:
+        """
+        Searches for the node holding the words starting with the prefix.
+        The prefix can end inside an edge, the full text leading to the node is returned with it.
+        """
+        node, i = self.root, 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None
+            if prefix.startswith(child.label, i):
+                i += len(child.label)
+                node = child
+            elif child.label.startswith(prefix[i:]):
+                return child, prefix[:i] + child.label
+            else:
+                return None
+        return node, prefix
+
+    def autocomplete(self, prefix: str) -> list[str]:
+        """
+        Collects a list of all words in the Trie that start with the prefix.
+        """
+        found = self.starts_with_prefix(prefix)
+        if not found:
+            return []
+        node, text = found
+
+        results = [text] if node.end_of_word else []
+        labels = [text]
+        stack = [(child, 1) for child in reversed(node.children.values())]
+        while stack:
+            node, depth = stack.pop()
+            del labels[depth:]
+            labels.append(node.label)
+            if node.end_of_word:
+                results.append("".join(labels))
+            stack.extend((child, depth + 1) for child in reversed(node.children.values()))
+        return results
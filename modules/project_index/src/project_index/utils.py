@@ -1,4 +1,4 @@
-import difflib
+import functools
 import logging
 import json
 import os
@@ -6,6 +6,9 @@ import re
 
 from pathlib import Path
 
+from project_index import fuzzy, index_cache
+from tracepath import context
+
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
 
@@ -34,15 +37,19 @@ def create_dcc_folder_structure(dcc_name: str, parent_folder: str):
             os.makedirs(folder_path)
 
 
+@functools.lru_cache(maxsize=8)
+def _dcc_name_index(known_dccs: tuple) -> fuzzy.TrigramIndex:
+    return fuzzy.TrigramIndex(known_dccs)
+
+
 def dcc_template_check(_dcc: str, templ_file: dict) -> str | None:
     """
     Checks whether the given DCC exists in the template file.
     If not, returns the closest matching suggestion (if any).
     """
-    known_dccs = list(templ_file.keys())
-    if _dcc in known_dccs:
+    if _dcc in templ_file:
         return None
-    suggestion = difflib.get_close_matches(_dcc, known_dccs, n=1)
+    suggestion = _dcc_name_index(tuple(templ_file.keys())).suggest(_dcc, limit=1)
     return suggestion[0] if suggestion else None
 
 
@@ -50,9 +57,7 @@ def dcc_template_check(_dcc: str, templ_file: dict) -> str | None:
 # CLI Create task tool
 
 def get_context():
-    context = os.path.join(os.environ.get("PR_PROJECTS_PATH"), os.environ.get("PR_SHOW"), os.environ.get("PR_GROUP"),
-                           os.environ.get("PR_ITEM"))
-    return context
+    return context.get_context().require("group", "item").item_root
 
 
 def create_task(name: str, dcc_list: list):
@@ -133,43 +138,29 @@ def check_dcc_name(dcc_list: list):
 
 
 def update_project_index(task):
-    framework = os.getenv("PR_TRACEPATH_FRAMEWORK")
-    project_index_path = os.path.join(framework, "config/trace_project_index.json")
-    project = os.environ.get("PR_SHOW")
-    group = os.environ.get("PR_GROUP")
-    item = os.environ.get("PR_ITEM")
-    dirname = os.path.dirname(project_index_path)
-    if not os.path.isdir(dirname):
-        os.makedirs(dirname)
-    if os.path.exists(project_index_path):
-        with open(project_index_path, 'r') as f:
-            data = json.load(f)
-
-    try:
-        tasks = data[project]["groups"][group]["items"][item]["tasks"]
-    except KeyError as e:
-        raise KeyError(f"Missing key in project index: {e}")
+    ctx = context.get_context().require("group", "item")
+    project, group, item = ctx.show, ctx.group, ctx.item
 
-    # Add task if it doesn't exist
-    if task not in tasks:
-        tasks[task] = {}
+    project_index = index_cache.get_project_index()
+    if not project_index.exists(project, group, item):
+        raise KeyError(f"Missing key in project index: {project}/{group}/{item}")
 
-    # Write updated data back
-        with open(project_index_path, 'w') as f:
-            json.dump(data, f, indent=4)
+    # Add task if it doesn't exist
+    if task not in project_index.tasks(project, group, item):
+        project_index.add(project, group, item, task)
 
 
 def add_dcc_folders(dcc_list: list):
     """
     Called from CLI creates subfolders on add function executed
     """
-    context = os.path.join(get_context(), os.environ.get("PR_TASK"))
+    task_context = context.get_context().require("group", "item", "task").task_root
 
-    if not os.path.isdir(context):
-        logging.error(f"Not valid context {context}")
+    if not os.path.isdir(task_context):
+        logging.error(f"Not valid context {task_context}")
     else:
         checked_dcc = check_dcc_name(dcc_list)
 
         for dcc in checked_dcc:
-            create_dcc_folder_structure(dcc, context)
+            create_dcc_folder_structure(dcc, task_context)
         logging.info(f"Created DCC folder(s) '{checked_dcc}'")
@@ -0,0 +1,430 @@
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import re
+import select
+import struct
+import sys
+import threading
+from typing import NamedTuple
+
+from project_index import index_cache, index_store
+from tracepath import versions
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+# Folders living next to groups/items/tasks that are not project index nodes
+IGNORED_FOLDERS = {"main", "show_data"}
+VERSION_FOLDER = re.compile(r"^v\d+$")
+
+POLL_INTERVAL = 2.0
+
+# inotify constants (linux/inotify.h)
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class WatchEvent(NamedTuple):
+    """
+    A folder of a show that was created or deleted.
+    """
+    kind: str  # "created" or "deleted"
+    level: str  # "group", "item", "task" or "version"
+    parts: tuple  # folder path parts relative to the projects root, the show first
+    path: str  # absolute folder path
+
+    @property
+    def index_path(self) -> str:
+        """
+        "project/group/item/task" path of the event, or of the item/task owning a version folder.
+        """
+        if self.level != "version":
+            return index_cache.join_path(*self.parts)
+        return index_cache.join_path(*self.parts[:self.parts.index("main")])
+
+
+# Show layout
+
+def classify(parts: tuple) -> str | None:
+    """
+    Returns the level of a show folder from its parts (show first), or None if the
+    folder is neither a project index node nor a version folder.
+
+    Layout:
+        <show>/<group>/<item>/<task>
+        <show>/<group>/<item>/main/v001
+        <show>/<group>/<item>/<task>/main/<name>/v001
+
+    """
+    depth = len(parts)
+    if 2 <= depth <= len(index_store.LEVELS):
+        if not any(name in IGNORED_FOLDERS or name.startswith(".") for name in parts[1:]):
+            return index_store.LEVELS[depth - 1]
+    if VERSION_FOLDER.match(parts[-1]):
+        if (depth == 5 and parts[3] == "main") or (depth == 7 and parts[4] == "main"):
+            return "version"
+    return None
+
+
+def is_watched(parts: tuple) -> bool:
+    """
+    Whether the children of a show folder can be groups, items, tasks or version folders.
+    """
+    depth = len(parts)
+    if depth <= len(index_store.LEVELS):
+        return classify(parts) is not None or depth == 1 or (depth == 4 and parts[3] == "main")
+    return (depth == 5 and parts[4] == "main") or (depth == 6 and parts[4] == "main")
+
+
+def _sub_folders(path: str) -> list[str] | None:
+    """
+    Returns the sub-folder names of a folder, [] if it does not exist anymore and None if it
+    cannot be listed: an unreadable folder is not an empty one.
+    """
+    try:
+        with os.scandir(path) as entries:
+            return [entry.name for entry in entries if entry.is_dir() and not entry.name.startswith(".")]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    except OSError as e:
+        logging.warning(f"Cannot list {path}: {e}")
+        return None
+
+
+# Backends
+
+class WatchLimitError(OSError):
+    """
+    The inotify watch limit (fs.inotify.max_user_watches) is exhausted.
+    """
+
+
+class PollingBackend:
+    """
+    Portable backend: lists the watched folders every 'interval' seconds and compares
+    them with the previous listing. A listing that fails keeps the previous one, and a
+    folder is only reported deleted once it is really gone.
+    """
+    name = "polling"
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+        self._listings = {}  # path -> sub-folder names, None until the folder could be listed
+
+    def add(self, path: str) -> list[str]:
+        names = _sub_folders(path)
+        self._listings[path] = None if names is None else set(names)
+        return names or []
+
+    def remove(self, path: str) -> None:
+        self._listings.pop(path, None)
+
+    def read(self, stop: threading.Event) -> list[tuple[str, str]]:
+        if stop.wait(self.interval):
+            return []
+        events = []
+        for path, before in list(self._listings.items()):
+            if not os.path.isdir(path):
+                # Removing the deleted parents drops their listings too
+                continue
+            names = _sub_folders(path)
+            if names is None:
+                continue
+            after = set(names)
+            if before is not None:
+                # Names missing from a partial listing are kept while their folder exists
+                after |= {name for name in before - after if os.path.isdir(os.path.join(path, name))}
+            self._listings[path] = after
+            if before is None:
+                continue  # first readable listing, the folders were reported by add
+            events += [("created", os.path.join(path, name)) for name in sorted(after - before)]
+            events += [("deleted", os.path.join(path, name)) for name in sorted(before - after)]
+        return events
+
+    def close(self) -> None:
+        self._listings.clear()
+
+
+class InotifyBackend:
+    """
+    Linux backend: one inotify watch per watched folder, events are pushed by the kernel.
+    """
+    name = "inotify"
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._paths = {}  # watch descriptor -> path
+        self._watches = {}  # path -> watch descriptor
+
+    def add(self, path: str) -> list[str]:
+        wd = self._add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error == errno.ENOSPC:
+                raise WatchLimitError(error, f"inotify watch limit reached while watching {path}")
+            logging.warning(f"Cannot watch {path}: {os.strerror(error)}")
+            return []
+        self._paths[wd] = path
+        self._watches[path] = wd
+        # Folders created before the watch was in place are reported by the caller
+        return _sub_folders(path) or []
+
+    def remove(self, path: str) -> None:
+        wd = self._watches.pop(path, None)
+        if wd is not None:
+            self._paths.pop(wd, None)
+            self._rm_watch(self._fd, wd)
+
+    def read(self, stop: threading.Event) -> list[tuple[str, str]]:
+        ready, _, _ = select.select([self._fd], [], [], 0.5)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events, offset = [], 0
+        while offset < len(buffer):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                logging.warning("inotify queue overflow, some folder events were lost. Run 'trace_index reconcile'.")
+                continue
+            parent = self._paths.get(wd)
+            if parent is None or not mask & IN_ISDIR:
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                events.append(("created", path))
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(("deleted", path))
+        return events
+
+    def close(self) -> None:
+        os.close(self._fd)
+        self._paths.clear()
+        self._watches.clear()
+
+
+def create_backend(polling: bool = False, interval: float = POLL_INTERVAL):
+    """
+    Returns the inotify backend on Linux, the polling one elsewhere or if inotify is unavailable.
+    """
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyBackend()
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable ({e}), falling back to polling")
+    return PollingBackend(interval)
+
+
+# Watcher
+
+class ProjectWatcher:
+    """
+    Long-running watcher of the PR_PROJECTS_PATH/<show> trees.
+
+    Creation and deletion of groups, items, tasks and version folders are turned into
+    WatchEvents and passed to every subscriber from the watcher thread. Folders created
+    together (mkdir -p) are all reported, including the ones created before their parent
+    was watched.
+
+    The show trees are walked on the watcher thread, start() returns straight away. If
+    inotify runs out of watches, the watcher switches to polling for every folder.
+
+    Usage:
+        watcher = ProjectWatcher(projects_path, ["show"])
+        watcher.subscribe(callback)
+        watcher.start()
+
+    """
+
+    def __init__(self, projects_path: str, shows: list[str], backend=None):
+        self.projects_path = os.path.abspath(projects_path)
+        self.shows = list(shows)
+        self.backend = backend or create_backend()
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._watched = set()
+        self._stop = threading.Event()
+        self.ready = threading.Event()  # set once the show trees are watched
+        self._thread = None
+
+    # Subscriptions
+
+    def subscribe(self, callback) -> None:
+        """
+        Registers a callable called with each WatchEvent, from the watcher thread.
+        """
+        with self._subscribers_lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        with self._subscribers_lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _publish(self, event: WatchEvent) -> None:
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error(f"Watch subscriber failed on {event.path}: {e}")
+
+    # Folder tracking
+
+    def _parts(self, path: str) -> tuple:
+        return tuple(os.path.relpath(path, self.projects_path).split(os.sep))
+
+    def _watch(self, path: str, report: bool) -> None:
+        """
+        Watches a folder and the watchable folders below it.
+        With 'report', the folders found below it are published as created.
+        """
+        if path in self._watched:
+            return
+        self._watched.add(path)
+        try:
+            names = self.backend.add(path)
+        except WatchLimitError as e:
+            self._fall_back_to_polling(e)
+            names = self.backend.add(path)
+        for name in names:
+            if self._stop.is_set():
+                return
+            child = os.path.join(path, name)
+            if report:
+                self._handle("created", child)
+            elif is_watched(self._parts(child)):
+                self._watch(child, report=False)
+
+    def _fall_back_to_polling(self, error: OSError) -> None:
+        logging.warning(f"{error}. Raise fs.inotify.max_user_watches to use inotify, polling every folder instead.")
+        inotify, self.backend = self.backend, PollingBackend()
+        inotify.close()
+        for path in self._watched:
+            self.backend.add(path)
+
+    def _unwatch(self, path: str) -> None:
+        prefix = path + os.sep
+        for watched in [p for p in self._watched if p == path or p.startswith(prefix)]:
+            self._watched.discard(watched)
+            self.backend.remove(watched)
+
+    def _handle(self, kind: str, path: str) -> None:
+        parts = self._parts(path)
+        level = classify(parts)
+        if kind == "deleted":
+            self._unwatch(path)
+        if level:
+            self._publish(WatchEvent(kind, level, parts, path))
+        if kind == "created" and is_watched(parts):
+            self._watch(path, report=True)
+
+    # Thread
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.ready.clear()
+        self._thread = threading.Thread(target=self.run, name="ProjectWatcher", daemon=True)
+        self._thread.start()
+
+    def _watch_shows(self) -> None:
+        for show in self.shows:
+            show_path = os.path.join(self.projects_path, show)
+            if os.path.isdir(show_path):
+                self._watch(show_path, report=False)
+            else:
+                logging.warning(f"Show folder not found, not watched: {show_path}")
+        logging.info(f"Watching {len(self._watched)} folders with {self.backend.name}")
+
+    def run(self) -> None:
+        self._watch_shows()
+        self.ready.set()
+        while not self._stop.is_set():
+            for kind, path in self.backend.read(self._stop):
+                self._handle(kind, path)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        self.backend.close()
+        self._watched.clear()
+
+
+# Subscribers
+
+def index_updater(project_index: index_cache.ProjectIndex):
+    """
+    Returns a subscriber that mirrors group/item/task folder events into the project index.
+    """
+    def update(event: WatchEvent):
+        if event.level == "version":
+            return
+        if event.kind == "created" and not project_index.exists(*event.parts):
+            project_index.add(*event.parts)
+        elif event.kind == "deleted":
+            project_index.remove_many([event.index_path])
+    return update
+
+
+def version_cache_invalidator(version_cache: versions.VersionCache | None = None):
+    """
+    Returns a subscriber that drops the cached versions of a folder when a version folder
+    is created or deleted in it, so new versions show up before its mtime is checked.
+    """
+    version_cache = version_cache or versions.get_version_cache()
+
+    def update(event: WatchEvent):
+        if event.level == "version":
+            version_cache.invalidate(os.path.dirname(event.path))
+    return update
+
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+def get_watcher(projects_path: str | None = None, shows: list[str] | None = None) -> ProjectWatcher:
+    """
+    Returns the shared, running watcher of the process for the projects root, creating
+    it on first use. The watcher keeps the shared project index and version cache up to date.
+    """
+    projects_path = os.path.abspath(projects_path or os.getenv("PR_PROJECTS_PATH"))
+    with _watchers_lock:
+        if projects_path not in _watchers:
+            project_index = index_cache.get_project_index()
+            watcher = ProjectWatcher(projects_path, shows or project_index.projects())
+            watcher.subscribe(index_updater(project_index))
+            watcher.subscribe(version_cache_invalidator())
+            watcher.start()
+            _watchers[projects_path] = watcher
+        return _watchers[projects_path]
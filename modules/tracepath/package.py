@@ -7,4 +7,5 @@ def commands():
     global env
 
     env.PYTHONPATH.append("{root}/python")
-    env.STYLE_TRACEPATH.set("{root}/resources")
\ No newline at end of file
+    env.STYLE_TRACEPATH.set("{root}/resources")
+    alias("trace_publish", "python -m tracepath.cli_publish")
\ No newline at end of file
@@ -1,10 +1,15 @@
 import os
-import re
 from pathlib import Path
 
 import hou
 
-from tracepath import core_utils
+from tracepath import core_utils, events, publish, templates, versions
+from tracepath.context import Context, get_context, node_context
+
+# Published versions listed in the version menu of the Load USD Stage HDA
+VERSION_MENU_SIZE = 50
+# Node user data holding the output version folder reserved by apply_autoversion
+RESERVED_VERSION_KEY = "tracepath_reserved_version"
 
 
 # Generic functions for Load and Write USD HDAs in houdini
@@ -21,7 +26,7 @@ def get_node_env_data(node: hou.Node) -> dict:
         "pr_group", "pr_item", "pr_task" environment variables.
 
     """
-    core_utils.check_required_env(["PR_GROUP", "PR_ITEM", "PR_TASK"])
+    get_context().require("group", "item", "task")
     node_data = {
         "pr_group": node.parm("grp").eval(),
         "pr_item": node.parm("item").eval(),
@@ -30,6 +35,23 @@ def get_node_env_data(node: hou.Node) -> dict:
     return node_data
 
 
+def get_node_context(node: hou.Node) -> Context:
+    """
+    Context of an HDA: the process context with the group, item and task of the node parameters.
+    The same Context object is returned while the parameters do not change.
+
+    Args:
+        node (hou.Node): Houdini TracePath Load USD Stage or USD Write HDA
+
+    Return:
+        Context: The node context.
+
+    """
+    node_data = get_node_env_data(node)
+    return node_context(get_context(), node_data["pr_group"], node_data["pr_item"],
+                                node_data["pr_task"])
+
+
 def get_manifest_context(node: hou.Node, templ) -> str:
     """
     Resolve the full context path for the USD shot manifest using template and environment values.
@@ -43,14 +65,10 @@ def get_manifest_context(node: hou.Node, templ) -> str:
         str: The resolved path to the main shot manifest folder.
 
     """
-    env_vars = core_utils.get_env()
-    node_vars = get_node_env_data(node)
-    all_node_data = {**env_vars, **node_vars}
-
-    templ_folder, _ = core_utils.get_path_structure_templ(templ)
-    context = templ_folder.format(**all_node_data)
+    all_node_data = get_node_context(node).template_values()
 
-    return context
+    templ_folder, _ = templates.get_template(templ)
+    return templ_folder.format_map(all_node_data)
 
 
 # Load USD Stage HDA
@@ -66,13 +84,60 @@ def set_latest_version(node: hou.Node, context: str):
         None
 
     """
-    version = core_utils.get_latest_version_number(str(context))
+    version = core_utils.get_latest_version_number(str(context), written=True)
 
     if not version:
         version = 1
     node.parm("version").set(version)
 
 
+def version_menu(node: hou.Node) -> list[str]:
+    """
+    Menu of the version parameter: the latest published shot manifest versions of the node item,
+    labeled with their publish comment. Only the first page of the publish history is read.
+    Used in the HDA version parameter menu script.
+
+    Args:
+        node (hou.Node): A Houdini node TracePath Load USD Stage HDA.
+
+    Return:
+        list[str]: Houdini menu items, alternating version and label.
+
+    """
+    store = core_utils.get_publish_store(core_utils.get_show_data_folder())
+    menu, seen = [], set()
+    for record in store.query(VERSION_MENU_SIZE, publish_key=get_publish_key(node), shot_manifest=True):
+        if record.version is None or record.version in seen:
+            continue
+        seen.add(record.version)
+        label = f"v{record.version:03d}  {record.comment}" if record.comment else f"v{record.version:03d}"
+        menu += [str(record.version), label]
+    return menu
+
+
+def _announce_publish(event: events.PublishEvent) -> None:
+    import hdefereval
+
+    message = f"New version published: {event.path}"
+    hdefereval.executeDeferred(lambda: hou.ui.setStatusMessage(message, severity=hou.severityType.Message))
+
+
+def start_publish_events() -> events.EventSubscriber:
+    """
+    Subscribes the session to the publish events of the current show (run from 123.py).
+    Published versions drop the cached versions of their folder right away, so version lookups
+    and the version menus list them without a rescan, and are announced in the status bar.
+
+    Return:
+        EventSubscriber: The running subscriber of the show.
+
+    """
+    subscriber = events.get_subscriber([core_utils.get_show_data_folder()])
+    if hou.isUIAvailable():
+        subscriber.subscribe(_announce_publish)
+    return subscriber
+
+
 def load_shot_manifest(node: hou.Node) -> str:
     """
     Load the path to the main shot manifest file based on the version selected in the HDA.
@@ -108,19 +173,18 @@ def get_usd_output_path(node: hou.Node, template) -> str:
         str: A path to the usd file to write to.
 
     """
-    env_vars = core_utils.get_env()
-    node_vars = get_node_env_data(node)
+    node_vars = get_node_context(node).template_values()
 
     node_vars["name"] = node.parm("name").eval()
     node_vars["version"] = str(node.parm("version").eval()).zfill(3)
     node_vars["file_format"] = node.parm("format").evalAsString()
     node_vars["padding"] = ".$F4" if node.evalParm("trange") else ""
-    all_node_data = {**env_vars, **node_vars}
 
-    templ = core_utils.get_path_structure_templ(template)
-    if not templ:
-        raise RuntimeError(f"Template '{template}' not found.")
-    output_path = templ.format(**all_node_data)
+    try:
+        templ = templates.get_template(template)
+    except KeyError:
+        raise RuntimeError(f"Template '{template}' not found.") from None
+    output_path = templ.format_map(node_vars)
     return output_path
 
 
@@ -144,7 +208,9 @@ def get_first_frame_cache(node: hou.Node) -> float:
 
 def apply_autoversion(node: hou.Node):
     """
-    This function called from HDA to version up the file
+    This function called from HDA to version up the file, right before the write (pre-render).
+    The version folder is reserved once: while the folder this node reserved is still empty,
+    calling it again keeps that version instead of reserving another one.
 
     Args:
         node (hou.Node): A Houdini node TracePath Load USD Stage or USD Write HDA.
@@ -153,13 +219,16 @@ def apply_autoversion(node: hou.Node):
         None
 
     """
-    version = 1
     if node.parm("autoversion").eval() == 1:
+        # The version folder is claimed now, so concurrent writers of the same output never share it
         context = Path(node.parm("lopoutput").evalAsString()).parent.parent
-        if context.exists():
-            latest_version = core_utils.get_latest_version_number(str(context))
-            if latest_version:
-                version = latest_version + 1
+        reserved = node.userData(RESERVED_VERSION_KEY)
+        if reserved and Path(reserved).parent == context and Path(reserved).is_dir() \
+                and not any(Path(reserved).iterdir()):
+            version = versions.parse_version(Path(reserved).name)
+        else:
+            version, reserved = core_utils.reserve_version(str(context))
+            node.setUserData(RESERVED_VERSION_KEY, reserved)
     else:
         version = node.parm("version").eval()
 
@@ -168,7 +237,8 @@ def apply_autoversion(node: hou.Node):
 
 def version_up_shot_manifest(node: hou.Node) -> str:
     """
-    Create a versioned up output path, using re extract the version number and increase the version.
+    Create a versioned up output path, the version number is parsed from the latest manifest path
+    with the shot manifest template and increased.
     This function called from Write USD HDA
 
     node (hou.Node): A Houdini node TracePath Load USD Stage or USD Write HDA.
@@ -180,35 +250,26 @@ def version_up_shot_manifest(node: hou.Node) -> str:
     new_output_path = ""
     context = Path(get_manifest_context(node, "usd_shot_manifest_output"))
     if context.exists():
-        latest_version = core_utils.get_latest_version_number(str(context))
+        latest_version = core_utils.get_latest_version_number(str(context), written=True)
         if latest_version:
             output_path = core_utils.find_file_in_context(str(context), latest_version)
-            if output_path:
-                path = Path(output_path)
-                parent_folder = path.parent
-                file_name = path.name
-
-                match = re.search(r"v(\d+)", parent_folder.name)
-
-                if match:
-                    version = match.group(1)
-                    version_up = int(version) + (
-                        1 if hou.frame() == node.parm("f1").eval() or node.parm("trange").eval() == 0 else 0)
-
-                    new_version = str(version_up).zfill(len(version))
-                    new_folder_name = parent_folder.name.replace(version, new_version)
-                    new_folder = parent_folder.parent / new_folder_name
+            parsed = templates.parse_path(output_path, ["usd_shot_manifest_output"]) if output_path else None
+            if parsed:
+                version = parsed.values["version"]
+                version_up = parsed.version + (
+                    1 if hou.frame() == node.parm("f1").eval() or node.parm("trange").eval() == 0 else 0)
+                new_version = str(version_up).zfill(len(version))
 
-                    new_file_name = file_name.replace(f"v{version}", f"v{new_version}")
-                    new_output_path = new_folder / new_file_name
+                _, templ_file = templates.get_template("usd_shot_manifest_output")
+                new_output_path = context / templ_file.format_map({**parsed.values, "version": new_version})
 
     if not new_output_path:
-        node_vars = {}
+        node_vars = get_node_env_data(node)
         node_vars["version"] = "001"
         node_vars["file_format"] = node.parm("format").evalAsString()
 
-        _, templ_file = core_utils.get_path_structure_templ("usd_shot_manifest_output")
-        new_file_path = Path(templ_file.format(**node_vars))
+        _, templ_file = templates.get_template("usd_shot_manifest_output")
+        new_file_path = Path(templ_file.format_map(node_vars))
         new_output_path = context / new_file_path
 
     return str(new_output_path)
@@ -264,13 +325,31 @@ def write_publish_comment(node: hou.Node) -> None:
     data_folder = core_utils.get_show_data_folder()
     key = get_publish_key(node)
 
-    published_data = core_utils.get_published_data(data_folder)
-    published_data.setdefault(key, {})
-    published_data[key][file] = comment
-
-    core_utils.write_published_data(data_folder, published_data)
+    core_utils.get_publish_store(data_folder).add(key, file, comment)
     node.parm("comment").set("")
-    hou.ui.displayMessage(f"Shot manifest: \n{file} \npublished successfully!", severity=hou.severityType.Message)
+    if hou.isUIAvailable():
+        hou.ui.displayMessage(f"Shot manifest: \n{file} \npublished successfully!", severity=hou.severityType.Message)
+
+
+def publish_nodes(nodes: list[hou.Node], comment: str | None = None) -> int:
+    """
+    Publishes the shot manifests of many TracePath USD Write HDAs in one transaction, without any
+    UI call. Meant for farm jobs and hython scripts writing many outputs at once.
+
+    Args:
+        nodes (list[hou.Node]): Houdini nodes TracePath USD Write HDA.
+        comment (str | None): Comment of every publish, the comment parameter of each node if None.
+
+    Return:
+        int: The number of published files.
+
+    """
+    records = [{
+        "publish_key": get_publish_key(node),
+        "path": node.parm("shot_manifest_output").eval(),
+        "comment": node.parm("comment").eval() if comment is None else comment,
+    } for node in nodes]
+    return publish.publish_batch(records, core_utils.get_show_data_folder())
 
 
 def read_publish_comment(node: hou.Node) -> str | None:
@@ -287,14 +366,7 @@ def read_publish_comment(node: hou.Node) -> str | None:
     file_path = node.parm("shot_manifest_read").evalAsString()
     data_folder = core_utils.get_show_data_folder()
     key = get_publish_key(node)
-    published_data = core_utils.get_published_data(data_folder)
-
-    file_to_comment = published_data.get(key, {})
-    for f, comment in file_to_comment.items():
-        if f == file_path:
-            return comment
-
-    return None
+    return core_utils.get_publish_store(data_folder).comment(key, file_path)
 
 
 # Save HIP file
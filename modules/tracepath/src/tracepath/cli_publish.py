@@ -0,0 +1,188 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+
+from tracepath import events, publish
+from tracepath.context import get_context
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+
+def _timestamp(value: str) -> float:
+    """
+    Parses an ISO date or date and time ("2025-03-01", "2025-03-01T14:30") into epoch seconds.
+    """
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{value}', expected YYYY-MM-DD[THH:MM[:SS]]") from None
+
+
+def _store(namespace) -> publish.PublishStore | None:
+    changes = {name: value for name, value in (("projects_path", namespace.projects_path),
+                                               ("show", namespace.show)) if value}
+    try:
+        ctx = get_context().replace(**changes).require()
+    except RuntimeError as e:
+        logging.error(f"{e}. Use --projects-path and --show.")
+        return None
+    return publish.get_publish_store(os.path.join(ctx.show_root, "show_data"))
+
+
+def query(namespace):
+    store = _store(namespace)
+    if store is None:
+        return 1
+    filters = {
+        "group": namespace.group,
+        "item": namespace.item,
+        "task": namespace.task,
+        "user": namespace.user,
+        "text": namespace.text,
+        "since": namespace.since,
+        "until": namespace.until,
+    }
+    if namespace.count:
+        print(store.count(**filters))
+        return 0
+
+    if namespace.limit is None:
+        records = store.iter_records(ascending=namespace.ascending, **filters)
+    else:
+        records = store.query(namespace.limit, namespace.offset, namespace.ascending, **filters)
+    for record in records:
+        if namespace.json:
+            print(json.dumps(record.to_dict()))
+            continue
+        version = f"v{record.version:03d}" if record.version is not None else "-"
+        created = datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M") if record.created else "-"
+        print(f"{version}  {created}  {record.user or '-'}  {record.path}  {record.comment}")
+    return 0
+
+
+def _read_records(stream) -> list[dict]:
+    """
+    Reads publish records from a JSON list or from JSON lines (one record per line).
+    """
+    text = stream.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def add(namespace):
+    store = _store(namespace)
+    if store is None:
+        return 1
+    if namespace.file == "-":
+        records = _read_records(sys.stdin)
+    else:
+        with open(namespace.file) as f:
+            records = _read_records(f)
+    try:
+        count = store.add_many(records, namespace.user)
+    except (KeyError, ValueError) as e:
+        logging.error(f"Nothing was published: {e}")
+        return 1
+    print(f"Published {count} file(s) to {store.db_path}")
+    return 0
+
+
+def export(namespace):
+    store = _store(namespace)
+    if store is None:
+        return 1
+    print(store.export_json(namespace.output))
+    return 0
+
+
+def serve(namespace):
+    broker = events.EventBroker(namespace.socket)
+    try:
+        broker.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (OSError, RuntimeError) as e:
+        logging.error(f"Could not start the publish event broker: {e}")
+        return 1
+    return 0
+
+
+def follow(namespace):
+    store = _store(namespace)
+    if store is None:
+        return 1
+
+    def show_event(event: events.PublishEvent):
+        version = f"v{event.version:03d}" if event.version is not None else "-"
+        context = "/".join(part for part in (event.group, event.item, event.task) if part)
+        print(f"{version}  {context}  {event.user or '-'}  {event.path}", flush=True)
+
+    subscriber = events.EventSubscriber([store.show_data], namespace.socket)
+    subscriber.subscribe(show_event)
+    subscriber.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.stop()
+    return 0
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Publish history of a show")
+    show_parser = argparse.ArgumentParser(add_help=False)
+    show_parser.add_argument("--show", help="Show to read (defaults to PR_SHOW)")
+    show_parser.add_argument("--projects-path", help="Projects root (defaults to PR_PROJECTS_PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    query_parser = subparsers.add_parser("query", parents=[show_parser],
+                                         help="List publish records, latest version first")
+    query_parser.add_argument("--group", help="Group (sequence) of the publishes")
+    query_parser.add_argument("--item", help="Item (shot, asset) of the publishes")
+    query_parser.add_argument("--task", help="Task of the publishes")
+    query_parser.add_argument("--user", help="Publishing user")
+    query_parser.add_argument("--text", help="Text the comment contains (case insensitive)")
+    query_parser.add_argument("--since", type=_timestamp, help="Published on or after this date")
+    query_parser.add_argument("--until", type=_timestamp, help="Published before this date")
+    query_parser.add_argument("--limit", type=int, help="Number of records of the page (streams all if not set)")
+    query_parser.add_argument("--offset", type=int, default=0, help="Records to skip before the page")
+    query_parser.add_argument("--ascending", action="store_true", help="Oldest version first")
+    query_parser.add_argument("--count", action="store_true", help="Only print the number of matching records")
+    query_parser.add_argument("--json", action="store_true", help="Print one JSON record per line")
+    query_parser.set_defaults(func=query)
+
+    add_parser = subparsers.add_parser("add", parents=[show_parser],
+                                       help="Publish many files in one transaction (farm jobs)")
+    add_parser.add_argument("file", nargs="?", default="-",
+                            help="JSON list or JSON lines of records with a 'path' and optionally a "
+                                 "'publish_key', 'comment' and 'metadata' (defaults to stdin)")
+    add_parser.add_argument("--user", help="Publishing user (defaults to the current user)")
+    add_parser.set_defaults(func=add)
+
+    export_parser = subparsers.add_parser("export", parents=[show_parser],
+                                          help="Export the publish records in the published_data.json format")
+    export_parser.add_argument("--output", help="Output JSON path (defaults to show_data/published_data.json)")
+    export_parser.set_defaults(func=export)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the local publish event broker")
+    serve_parser.add_argument("--socket", help="Unix socket path (defaults to PR_PUBLISH_EVENTS_SOCKET or a "
+                                               "per-user socket in the temp folder)")
+    serve_parser.set_defaults(func=serve)
+
+    follow_parser = subparsers.add_parser("follow", parents=[show_parser],
+                                          help="Print the new publishes of the show as they happen")
+    follow_parser.add_argument("--socket", help="Unix socket of the event broker")
+    follow_parser.set_defaults(func=follow)
+
+    namespace = parser.parse_args(args)
+    return namespace.func(namespace)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
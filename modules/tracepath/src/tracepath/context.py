@@ -0,0 +1,145 @@
+import functools
+import os
+import threading
+
+# Context fields and the environment variables they are read from
+ENV_VARS = {
+    "projects_path": "PR_PROJECTS_PATH",
+    "show": "PR_SHOW",
+    "group": "PR_GROUP",
+    "item": "PR_ITEM",
+    "task": "PR_TASK",
+}
+FIELDS = tuple(ENV_VARS)
+
+
+def _join(*parts) -> str | None:
+    if not all(parts):
+        return None
+    return os.path.normpath(os.path.join(*parts))
+
+
+class Context:
+    """
+    Immutable project context: projects root, show, group, item and task, with the show,
+    item and task folders joined once when the context is built.
+
+    A context is hashable (the hash is computed once) and compares by its fields, so it can
+    key caches. Tools get the context built from the PR_* environment with get_context(), HDAs
+    derive the context of a node with replace() or node_context().
+
+    Usage:
+        ctx = get_context().require("group", "item", "task")
+        ctx.task_root  # "<projects>/<show>/<group>/<item>/<task>"
+        ctx.template_values()  # {"pr_projects_path": ..., "pr_show": ..., ...}
+
+    """
+    __slots__ = ("projects_path", "show", "group", "item", "task", "show_root", "item_root", "task_root", "_hash")
+
+    def __init__(self, projects_path: str | None = None, show: str | None = None, group: str | None = None,
+                 item: str | None = None, task: str | None = None):
+        set_attr = object.__setattr__
+        set_attr(self, "projects_path", projects_path or None)
+        set_attr(self, "show", show or None)
+        set_attr(self, "group", group or None)
+        set_attr(self, "item", item or None)
+        set_attr(self, "task", task or None)
+        set_attr(self, "show_root", _join(projects_path, show))
+        set_attr(self, "item_root", _join(projects_path, show, group, item))
+        set_attr(self, "task_root", _join(projects_path, show, group, item, task))
+        set_attr(self, "_hash", hash(self.fields()))
+
+    @classmethod
+    def from_env(cls, environ=None) -> "Context":
+        environ = os.environ if environ is None else environ
+        return cls(*(environ.get(var) for var in ENV_VARS.values()))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Context is immutable, use replace() to change '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError("Context is immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, Context):
+            return NotImplemented
+        return self._hash == other._hash and self.fields() == other.fields()
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in FIELDS)
+        return f"Context({values})"
+
+    def __reduce__(self):
+        return Context, self.fields()
+
+    def fields(self) -> tuple:
+        return self.projects_path, self.show, self.group, self.item, self.task
+
+    def replace(self, **changes) -> "Context":
+        """
+        Returns a copy of the context with some fields changed.
+        """
+        unknown = set(changes).difference(FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown context fields: {', '.join(sorted(unknown))}")
+        values = dict(zip(FIELDS, self.fields()))
+        values.update(changes)
+        return Context(**values)
+
+    def missing(self, *fields) -> list[str]:
+        """
+        Returns the environment variables of the given fields (all fields if none) that are not set.
+        """
+        return [ENV_VARS[name] for name in fields or FIELDS if not getattr(self, name)]
+
+    def require(self, *fields) -> "Context":
+        """
+        Returns the context itself, raises RuntimeError if one of the given fields is not set.
+        The projects path and show are always required.
+        """
+        miss = self.missing("projects_path", "show", *fields)
+        if miss:
+            raise RuntimeError("Missing environment variables: " + ", ".join(miss))
+        return self
+
+    def template_values(self) -> dict:
+        """
+        Returns the context as the "pr_*" values of the folder_structure.json templates.
+        """
+        return {
+            "pr_projects_path": self.projects_path,
+            "pr_show": self.show,
+            "pr_group": self.group,
+            "pr_item": self.item,
+            "pr_task": self.task,
+        }
+
+
+_current = None
+_current_lock = threading.Lock()
+
+
+def get_context() -> Context:
+    """
+    Returns the context of the process, built from the PR_* environment variables.
+    The context is built once and again only if one of the variables changes.
+    """
+    global _current
+    fields = tuple(os.environ.get(var) or None for var in ENV_VARS.values())
+    ctx = _current
+    if ctx is None or ctx.fields() != fields:
+        with _current_lock:
+            ctx = _current = Context(*fields)
+    return ctx
+
+
+@functools.lru_cache(maxsize=256)
+def node_context(base: Context, group: str | None, item: str | None, task: str | None) -> Context:
+    """
+    Returns the context of a node (HDA) overriding the group, item and task of a base
+    context. Contexts are cached, repeated evaluations of a node reuse the same one.
+    """
+    return base.replace(group=group, item=item, task=task)
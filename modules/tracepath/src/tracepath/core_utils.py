@@ -1,11 +1,15 @@
-import json
 import logging
 import os
-import re
 from pathlib import Path
 
+from tracepath import publish, templates, versions
+from tracepath.context import get_context
+
 logging.basicConfig(level=logging.ERROR, format="%(levelname)s: %(message)s")
 
+# Versions tried by a reservation before giving up
+RESERVE_ATTEMPTS = 100
+
 
 # Generic functions to load environment and work with files in a project context
 
@@ -21,9 +25,10 @@ def get_env() -> dict:
               environment variable.
 
     """
+    ctx = get_context()
     env_data = {
-        "pr_projects_path": os.getenv("PR_PROJECTS_PATH"),
-        "pr_show": os.getenv("PR_SHOW")
+        "pr_projects_path": ctx.projects_path,
+        "pr_show": ctx.show
     }
     return env_data
 
@@ -32,9 +37,10 @@ def get_path_structure_templ(template: str) -> str | list | None:
     """
     Retrieve a path structure template from the folder_structure.json file.
 
-    This function loads the JSON file located alongside this module and
-    returns the value associated with the specified template key. The value
-    may be a string or a list, depending on how the template is defined.
+    The JSON file located alongside this module is loaded once and again only when it
+    changes, see tracepath.templates. Returns the value associated with the specified
+    template key. The value may be a string or a list, depending on how the template is
+    defined. Prefer templates.get_template for paths formatted repeatedly.
 
     Args:
         template (str): The name of the template key to retrieve.
@@ -45,21 +51,21 @@ def get_path_structure_templ(template: str) -> str | list | None:
             - None if the key is not found.
 
     """
-    json_path = Path(__file__).parent / "folder_structure.json"
-
+    template_set = templates.get_template_set()
     try:
-        with open(json_path) as f:
-            folder_structure = json.load(f)
-        return folder_structure[template]
+        value = template_set.raw(template)
     except KeyError:
-        logging.error(f"Template key '{template}' not found in {json_path.name}")
+        logging.error(f"Template key '{template}' not found in {template_set.path.name}")
         return None
+    return list(value) if isinstance(value, list) else value
 
 
 def find_file_in_context(base_path: str, version: int) -> str | None:
     """
     Find a version folder and a file inside a version folder.
     Shot manifest context is sources from the template, but the actual file is sources by listing folders.
+    Version folders ("v003") and their files are resolved through the cached version catalog
+    of the context, only a folder named exactly after the version matches.
 
     Args:
         base_path (str): A path to the folder with the versions
@@ -71,43 +77,95 @@ def find_file_in_context(base_path: str, version: int) -> str | None:
             - None if no file matching the version exists within the given path.
 
     """
-    node_version = str(version).zfill(3)
-    base = Path(base_path)
-    results = []
-    for subfolder in base.iterdir():
-        if subfolder.is_dir() and node_version in subfolder.name:
-            for file in subfolder.iterdir():
-
-                if node_version in file.name:
-                    results.append(file)
-    return results[0] if results else None
+    return versions.get_version_cache().catalog(base_path).find_file(int(version))
 
 
-def get_latest_version_number(context: str) -> int | None:
+def get_latest_version_number(context: str, written: bool = False) -> int | None:
     """
     Get the highest version number from versioned subfolders in a given context.
+    Versions are read from the process version cache, the folder is only listed again
+    when it changed.
 
     Args:
         context (str): A path to the folder that contains version
+        written (bool): Only count version folders holding a file of their version, so empty
+            folders reserved by running or failed writes are never loaded.
 
     Return:
         int: The latest version number
 
     """
-    context_path = Path(context)
-    if not context_path.exists():
-        return None
+    if written:
+        return versions.get_version_cache().catalog(context).latest_written()
+    return versions.get_version_cache().latest(context)
 
-    versioned_dirs = []
-    for d in context_path.iterdir():
-        match = re.search(r'\d+', d.name)
-        if match:
-            versioned_dirs.append(int(match.group()))
-    if versioned_dirs:
-        version = sorted(versioned_dirs, reverse=True)[0]
-        return version
-    else:
-        return None
+
+def reserve_version(context: str, make_path=None, create_file: bool = False, start: int = 1,
+                    attempts: int = RESERVE_ATTEMPTS) -> tuple[int, str]:
+    """
+    Atomically claims the next free version of a context folder.
+
+    The version path is created with an exclusive create (mkdir, or O_EXCL for files), which
+    fails if another saver or publisher created it first, in that case the following version
+    is tried. Concurrent callers therefore always get different versions, without a lock.
+    The created folder or empty file is the reservation, the caller writes into it or over it.
+
+    Args:
+        context (str): A path to the folder that contains the versions, created if missing.
+        make_path (callable | None): Returns the path of a version number, "<context>/v001" if None.
+        create_file (bool): Reserve a file (scene files) instead of a folder.
+        start (int): Lowest version to reserve.
+        attempts (int): Number of versions tried before giving up.
+
+    Return:
+        tuple[int, str]: The reserved version and its path.
+
+    """
+    if make_path is None:
+        def make_path(version):
+            return os.path.join(context, "v%03d" % version)
+
+    os.makedirs(context, exist_ok=True)
+    version_cache = versions.get_version_cache()
+    version = max(start, version_cache.next(context))
+    for _ in range(attempts):
+        path = make_path(version)
+        try:
+            if create_file:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+            else:
+                os.mkdir(path)
+        except FileExistsError:
+            version += 1
+            continue
+        version_cache.invalidate(context)
+        return version, path
+    raise RuntimeError(f"Could not reserve a version in {context} after {attempts} attempts")
+
+
+def release_version(path: str) -> bool:
+    """
+    Removes a version reserved with reserve_version if nothing was written into it yet,
+    when the write it was reserved for failed.
+
+    Args:
+        path (str): The reserved folder, or placeholder file.
+
+    Return:
+        bool: True if the reservation was removed.
+
+    """
+    try:
+        if os.path.isdir(path):
+            os.rmdir(path)  # fails if anything was written into it
+        elif os.path.getsize(path) == 0:
+            os.remove(path)
+        else:
+            return False
+    except OSError:
+        return False
+    versions.get_version_cache().invalidate(os.path.dirname(os.path.normpath(path)))
+    return True
 
 
 # Publishing
@@ -120,46 +178,35 @@ def get_show_data_folder() -> Path:
         Path: A path to the folder that contains project data
 
     """
-    env_vars = get_env()
-    return Path(env_vars["pr_projects_path"]) / env_vars["pr_show"] / "show_data"
+    return Path(get_context().require().show_root) / "show_data"
 
 
-def get_published_data(data_folder: Path) -> dict:
+def get_publish_store(data_folder: Path) -> publish.PublishStore:
     """
-    Loads the published assets data from a JSON file.
-
-    If the JSON file does not exist, it creates an empty one and returns an empty dictionary.
-
-    Args:
-        data_folder (Path): Path to the folder that contains the published data JSON file.
+    Helper function to get the publish store (show_data/published.db) of a data folder.
 
     Return:
-        dict: loaded dictionary from the path.
+        PublishStore: Indexed publish records of the show.
 
     """
-    data_folder.mkdir(parents=True, exist_ok=True)
-    published_data_path = data_folder / "published_data.json"
+    return publish.get_publish_store(data_folder)
 
-    if not published_data_path.exists():
-        published_data_path.write_text('{}')
 
-    return json.loads(published_data_path.read_text())
-
-
-def write_published_data(data_folder: Path, published_data: dict) -> None:
+def get_published_data(data_folder: Path) -> dict:
     """
-    Writes the published assets data to a JSON file.
+    Loads the published assets data in the published_data.json format.
+
+    Records come from the publish store, prefer its lookups (comment, files) to loading
+    the whole history, and its add and remove methods to rewriting it.
 
     Args:
-        data_folder (Path): Path to the folder that contains the published data JSON file.
-        published_data (dict): A dictionary containing the data to write.
+        data_folder (Path): Path to the folder that contains the published data.
 
     Return:
-        None
+        dict: {publish key: {file path: comment}}.
 
     """
-    published_data_path = data_folder / "published_data.json"
-    published_data_path.write_text(json.dumps(published_data, indent=4))
+    return get_publish_store(data_folder).to_dict()
 
 
 # Save or open DCC scene files
@@ -187,22 +234,7 @@ def make_scene_path(dcc, ext, scene_name, ) -> str | None:
     """
 
     if scene_name != "":
-        check_required_env(["PR_PROJECTS_PATH", "PR_SHOW", "PR_ITEM", "PR_GROUP", "PR_TASK"])
-        env_data = {
-            "pr_projects_path": os.getenv("PR_PROJECTS_PATH"),
-            "pr_show": os.getenv("PR_SHOW"),
-            "pr_item": os.getenv("PR_ITEM"),
-            "pr_group": os.getenv("PR_GROUP"),
-            "pr_task": os.getenv("PR_TASK"),
-            "dcc": dcc,
-            "name": scene_name,
-            "version": "001",
-            "ext": ext,
-        }
-        templ = get_path_structure_templ("scene_file")
-        if not templ:
-            raise RuntimeError("Template 'scene_file' not found.")
-
+        templ, env_data = _scene_file_data(dcc, ext, scene_name)
         scene_path = os.path.normpath(templ.format(**env_data))
         scenes_folder = os.path.dirname(scene_path)
         if not os.path.isdir(scenes_folder) or not os.path.isfile(scene_path):
@@ -214,6 +246,48 @@ def make_scene_path(dcc, ext, scene_name, ) -> str | None:
         return None
 
 
+def reserve_scene_path(dcc, ext, scene_name) -> str | None:
+    """
+    Reserve the next scene file version, the reserved path holds an empty file until the
+    scene is saved over it. Used when saving, make_scene_path only previews the path.
+
+    Args:
+        dcc (str): Name of the current DCC application.
+        ext: (str): File extension
+        scene_name (str): The base name of the scene file.
+
+    Return:
+        str | None: The reserved scene file path, None if no scene name is provided.
+
+    """
+    if scene_name == "":
+        return None
+    templ, env_data = _scene_file_data(dcc, ext, scene_name)
+
+    def make_path(version):
+        env_data["version"] = "%03d" % version
+        return os.path.normpath(templ.format_map(env_data))
+
+    scenes_folder = os.path.dirname(make_path(1))
+    _, scene_path = reserve_version(scenes_folder, make_path, create_file=True)
+    return scene_path
+
+
+def _scene_file_data(dcc, ext, scene_name) -> tuple[templates.PathTemplate, dict]:
+    env_data = get_context().require("group", "item", "task").template_values()
+    env_data.update({
+        "dcc": dcc,
+        "name": scene_name,
+        "version": "001",
+        "ext": ext,
+    })
+    try:
+        templ = templates.get_template("scene_file")
+    except KeyError:
+        raise RuntimeError("Template 'scene_file' not found.") from None
+    return templ, env_data
+
+
 def get_task_context() -> str:
     """
     Solve a task context path based on an environment variables.
@@ -222,12 +296,7 @@ def get_task_context() -> str:
         str: A context path.
 
     """
-    check_required_env(["PR_PROJECTS_PATH", "PR_SHOW", "PR_ITEM", "PR_GROUP", "PR_TASK"])
-    context = os.path.join(os.environ.get("PR_PROJECTS_PATH"), os.environ.get("PR_SHOW"),
-                           os.environ.get("PR_GROUP"),
-                           os.environ.get("PR_ITEM"), os.getenv("PR_TASK"))
-    context = os.path.normpath(context)
-    return context
+    return get_context().require("group", "item", "task").task_root
 
 
 def check_required_env(keys):
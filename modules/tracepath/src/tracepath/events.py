@@ -0,0 +1,493 @@
+import collections
+import getpass
+import json
+import logging
+import os
+import selectors
+import socket
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import NamedTuple
+
+from tracepath import locking, versions
+
+logging.basicConfig(level=logging.ERROR, format="%(levelname)s: %(message)s")
+
+EVENTS_FILE_NAME = "publish_events.jsonl"
+# Size of the events file at which it is rotated, only the current and the previous file are kept
+MAX_EVENTS_SIZE = 4 * 1024 * 1024
+SOCKET_ENV = "PR_PUBLISH_EVENTS_SOCKET"
+POLL_INTERVAL = 1.0
+# Seconds a publisher waits for the broker before it only relies on the events file
+CONNECT_TIMEOUT = 0.2
+# Event ids remembered to drop an event received twice (socket and events file)
+SEEN_EVENTS = 10000
+
+# First line sent by a client to the broker
+SUBSCRIBE = b"SUB\n"
+PUBLISH = b"PUB\n"
+
+
+class PublishEvent(NamedTuple):
+    """
+    A new version of a group/item/task was published.
+    """
+    id: str
+    show: str | None
+    group: str | None
+    item: str | None
+    task: str | None
+    version: int | None
+    path: str
+    publish_key: str
+    user: str | None
+    created: float
+
+    @classmethod
+    def create(cls, show: str | None, publish_key: str, path: str, group: str | None = None,
+               item: str | None = None, task: str | None = None, version: int | None = None,
+               user: str | None = None, created: float | None = None) -> "PublishEvent":
+        return cls(uuid.uuid4().hex, show, group, item, task, version, str(path), publish_key,
+                   user, time.time() if created is None else created)
+
+    @classmethod
+    def from_json(cls, line: str | bytes) -> "PublishEvent":
+        return cls(**json.loads(line))
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict())
+
+    @property
+    def versions_folder(self) -> str | None:
+        """
+        Folder holding the version folder of the published file ("<item>/main" for "<item>/main/v003/..."),
+        or None if the path has no version folder.
+        """
+        path = Path(self.path)
+        for parent in path.parents:
+            if versions.VERSION_FOLDER.match(parent.name):
+                return str(parent.parent)
+        return None
+
+
+def get_socket_path() -> str:
+    """
+    Returns the Unix socket of the local event broker, PR_PUBLISH_EVENTS_SOCKET or a per-user
+    socket in the temp folder.
+    """
+    return os.getenv(SOCKET_ENV) or os.path.join(tempfile.gettempdir(),
+                                                 f"tracepath_publish_events_{getpass.getuser()}.sock")
+
+
+def _connect(socket_path: str, timeout: float | None = CONNECT_TIMEOUT) -> socket.socket | None:
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+class EventLog:
+    """
+    Events file of a show (show_data/publish_events.jsonl), one JSON event per line.
+
+    Events are appended while holding the lock of the file (locking.FileLock). A single
+    O_APPEND write is not enough on NFS, where the client emulates O_APPEND and concurrent
+    publishers of different hosts can overwrite each other's lines. Once the file reaches
+    'max_size' it is renamed to "publish_events.jsonl.1", replacing the previous one, so the
+    events never take more than twice that size.
+
+    Readers keep a position (file inode, byte offset) and only consume complete lines. After
+    a rotation they finish the rotated file before reading the new one.
+    """
+
+    def __init__(self, show_data: str | Path, max_size: int = MAX_EVENTS_SIZE):
+        self.show_data = Path(show_data)
+        self.path = self.show_data / EVENTS_FILE_NAME
+        self.rotated_path = self.path.with_name(EVENTS_FILE_NAME + ".1")
+        self.max_size = max_size
+
+    def append(self, events: list[PublishEvent]) -> None:
+        data = "".join(event.to_json() + "\n" for event in events).encode()
+        self.show_data.mkdir(parents=True, exist_ok=True)
+        with locking.FileLock(self.path):
+            if self.end()[1] >= self.max_size:
+                os.replace(self.path, self.rotated_path)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o664)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
+
+    def end(self) -> tuple[int | None, int]:
+        """
+        Returns the position of the end of the file, (None, 0) if it does not exist.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None, 0
+        return stat.st_ino, stat.st_size
+
+    def _read_lines(self, f, offset: int, size: int) -> tuple[list[PublishEvent], int]:
+        if size <= offset:
+            return [], offset
+        f.seek(offset)
+        data = f.read(size - offset)
+        complete = data.rfind(b"\n") + 1
+        events = []
+        for line in data[:complete].splitlines():
+            try:
+                events.append(PublishEvent.from_json(line))
+            except (ValueError, TypeError) as e:
+                logging.warning(f"Skipping invalid event in {self.path}: {e}")
+        return events, offset + complete
+
+    def read(self, position: tuple[int | None, int]) -> tuple[list[PublishEvent], tuple[int | None, int]]:
+        """
+        Returns the events written after 'position' and the position to read from next time.
+        A file smaller than the offset was replaced, it is read again from its start.
+        """
+        inode, offset = position
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return [], (None, 0)
+        events = []
+        with f:
+            stat = os.fstat(f.fileno())
+            if inode is not None and stat.st_ino != inode:
+                # Rotated since the last read, the end of the previous file is read first
+                try:
+                    with open(self.rotated_path, "rb") as rotated:
+                        rotated_stat = os.fstat(rotated.fileno())
+                        if rotated_stat.st_ino == inode:
+                            events, _ = self._read_lines(rotated, offset, rotated_stat.st_size)
+                except FileNotFoundError:
+                    pass
+                offset = 0
+            elif stat.st_size < offset:
+                offset = 0
+            new_events, offset = self._read_lines(f, offset, stat.st_size)
+        return events + new_events, (stat.st_ino, offset)
+
+
+def emit(show_data: str | Path, events: list[PublishEvent], socket_path: str | None = None) -> None:
+    """
+    Publishes events: appends them to the events file of the show and sends them to the local
+    broker, if one is running, so subscribers get them straight away.
+    """
+    if not events:
+        return
+    EventLog(show_data).append(events)
+    sock = _connect(socket_path or get_socket_path())
+    if sock is None:
+        return
+    try:
+        sock.sendall(PUBLISH + "".join(event.to_json() + "\n" for event in events).encode())
+    except OSError as e:
+        logging.warning(f"Could not send publish events to the broker: {e}")
+    finally:
+        sock.close()
+
+
+class _Seen:
+    """
+    Bounded set of the latest event ids.
+    """
+
+    def __init__(self, size: int = SEEN_EVENTS):
+        self._ids = collections.OrderedDict()
+        self.size = size
+
+    def add(self, event_id: str) -> bool:
+        """
+        Remembers an id, returns False if it was already seen.
+        """
+        if event_id in self._ids:
+            return False
+        self._ids[event_id] = None
+        if len(self._ids) > self.size:
+            self._ids.popitem(last=False)
+        return True
+
+
+class EventBroker:
+    """
+    Local publish event broker on a Unix socket.
+
+    Publishers connect, send "PUB" and their events, subscribers connect, send "SUB" and receive
+    every event as a JSON line, as soon as it is published on this host. Publishes of other
+    hosts (farm jobs) reach the subscribers through the events files they poll.
+
+    Usage:
+        broker = EventBroker()
+        broker.serve_forever()
+
+    """
+
+    def __init__(self, socket_path: str | None = None, interval: float = POLL_INTERVAL):
+        self.socket_path = socket_path or get_socket_path()
+        self.interval = interval
+        self._subscribers = set()
+        self._stop = threading.Event()
+
+    def _listen(self) -> socket.socket:
+        probe = _connect(self.socket_path)
+        if probe is not None:
+            probe.close()
+            raise RuntimeError(f"A publish event broker is already running on {self.socket_path}")
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # left by a broker that did not stop cleanly
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        server.listen()
+        server.setblocking(False)
+        return server
+
+    def _relay(self, lines: list[bytes]) -> None:
+        data = b""
+        for line in lines:
+            try:
+                json.loads(line)
+            except ValueError:
+                continue
+            data += line + b"\n"
+        if not data:
+            return
+        for sock in list(self._subscribers):
+            try:
+                sock.sendall(data)
+            except OSError:
+                self._drop(sock)
+
+    def _drop(self, sock: socket.socket) -> None:
+        self._subscribers.discard(sock)
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+        sock.close()
+
+    def _read(self, sock: socket.socket, buffers: dict) -> None:
+        try:
+            data = sock.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            buffers.pop(sock, None)
+            self._drop(sock)
+            return
+        buffer = buffers.get(sock, b"") + data
+        *lines, buffers[sock] = buffer.split(b"\n")
+        if sock in self._subscribers:
+            return
+        if lines and lines[0] + b"\n" == SUBSCRIBE:
+            self._subscribers.add(sock)
+            sock.setblocking(True)
+            sock.settimeout(CONNECT_TIMEOUT)
+            return
+        if lines and lines[0] + b"\n" == PUBLISH:
+            lines = lines[1:]
+        self._relay([line for line in lines if line])
+
+    def serve_forever(self) -> None:
+        server = self._listen()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(server, selectors.EVENT_READ)
+        buffers = {}
+        logging.info(f"Publish event broker listening on {self.socket_path}")
+        try:
+            while not self._stop.is_set():
+                for key, _ in self._selector.select(self.interval):
+                    if key.fileobj is server:
+                        client, _ = server.accept()
+                        client.setblocking(False)
+                        self._selector.register(client, selectors.EVENT_READ)
+                    else:
+                        self._read(key.fileobj, buffers)
+        finally:
+            for key in list(self._selector.get_map().values()):
+                key.fileobj.close()
+            self._selector.close()
+            self._subscribers.clear()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+class EventSubscriber:
+    """
+    Receives publish events in a background thread and passes them to its subscribers.
+
+    The events files of the given show_data folders are tailed every 'interval' seconds, which
+    needs nothing running and also gets the publishes of other hosts. When the local broker
+    runs, the events published on this host arrive from it straight away; the same events
+    read again from the files are dropped by id. Only events published after start() are
+    delivered, and only the events of the shows of the show_data folders.
+
+    Usage:
+        subscriber = EventSubscriber([show_data])
+        subscriber.subscribe(callback)
+        subscriber.start()
+
+    """
+
+    def __init__(self, show_data_folders: list | tuple, socket_path: str | None = None,
+                 interval: float = POLL_INTERVAL):
+        self.logs = [EventLog(folder) for folder in show_data_folders]
+        # Publishers name the show after the folder holding show_data, which is either the
+        # symlinked show root the tools use or its target, depending on how it was opened
+        self.shows = {log.show_data.parent.name for log in self.logs}
+        self.shows.update(log.show_data.resolve().parent.name for log in self.logs)
+        self.socket_path = socket_path or get_socket_path()
+        self.interval = interval
+        self._offsets = []
+        self._seen = _Seen()
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._socket = None
+        self._thread = None
+
+    # Subscriptions
+
+    def subscribe(self, callback) -> None:
+        """
+        Registers a callable called with each PublishEvent, from the subscriber thread.
+        """
+        with self._subscribers_lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback) -> None:
+        with self._subscribers_lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _publish(self, events: list[PublishEvent]) -> None:
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for event in events:
+            # The broker relays the publishes of every show of the host
+            if event.show not in self.shows or not self._seen.add(event.id):
+                continue
+            for callback in subscribers:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logging.error(f"Publish event subscriber failed on {event.path}: {e}")
+
+    # Sources
+
+    def _poll_logs(self) -> None:
+        for i, log in enumerate(self.logs):
+            events, self._offsets[i] = log.read(self._offsets[i])
+            self._publish(events)
+
+    def _listen_broker(self, sock: socket.socket) -> None:
+        """
+        Delivers the events sent by the broker until it goes away or the subscriber stops,
+        polling the events files whenever the broker stays silent for 'interval' seconds.
+        """
+        self._socket = sock
+        buffer = b""
+        try:
+            sock.settimeout(self.interval)
+            sock.sendall(SUBSCRIBE)
+            while not self._stop.is_set():
+                try:
+                    data = sock.recv(65536)
+                except socket.timeout:
+                    self._poll_logs()
+                    continue
+                if not data:
+                    break
+                *lines, buffer = (buffer + data).split(b"\n")
+                events = []
+                for line in lines:
+                    try:
+                        events.append(PublishEvent.from_json(line))
+                    except (ValueError, TypeError) as e:
+                        logging.warning(f"Skipping invalid publish event: {e}")
+                self._publish(events)
+        except OSError:
+            pass
+        finally:
+            self._socket = None
+            sock.close()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._offsets = [log.end() for log in self.logs]
+        self._thread = threading.Thread(target=self.run, name="PublishEventSubscriber", daemon=True)
+        self._thread.start()
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            sock = _connect(self.socket_path)
+            if sock is not None:
+                self._listen_broker(sock)
+                continue
+            self._poll_logs()
+            self._stop.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        sock = self._socket
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+# Subscribers
+
+def version_cache_invalidator(version_cache: versions.VersionCache | None = None):
+    """
+    Returns a subscriber that drops the cached versions of the folder a new version was
+    published to, so the next lookup lists it without waiting for a folder mtime change.
+    """
+    version_cache = version_cache or versions.get_version_cache()
+
+    def update(event: PublishEvent):
+        folder = event.versions_folder
+        if folder:
+            version_cache.invalidate(folder)
+    return update
+
+
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+
+def get_subscriber(show_data_folders: list | tuple) -> EventSubscriber:
+    """
+    Returns the shared, running event subscriber of the process for these show_data folders,
+    creating it on first use. The subscriber keeps the shared version cache up to date.
+    """
+    key = tuple(sorted(os.path.abspath(folder) for folder in show_data_folders))
+    with _subscribers_lock:
+        if key not in _subscribers:
+            subscriber = EventSubscriber(key)
+            subscriber.subscribe(version_cache_invalidator())
+            subscriber.start()
+            _subscribers[key] = subscriber
+        return _subscribers[key]
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logging.basicConfig(level=logging.ERROR, format="%(levelname)s: %(message)s")
+
+
+# Advisory file locks
+
+class FileLock:
+    """
+    Advisory lock guarding a shared file, held on a sibling '<file>.lock' file.
+
+    Exclusive locks are used by writers, shared locks by readers that need a consistent
+    view of files that are updated in several steps. Only cooperating tools honour it.
+
+    Usage:
+        with FileLock(path):
+            ...
+
+    """
+
+    def __init__(self, path: str | Path, shared: bool = False, timeout: float = 30.0, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.shared = shared
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd = None
+
+    def acquire(self) -> None:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(fd, (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+                else:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for lock: {self.lock_path}")
+                time.sleep(self.poll_interval)
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if fcntl:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+# Atomic writes and optimistic updates
+
+def atomic_write_text(path: str | Path, text: str) -> None:
+    """
+    Write a text file atomically.
+
+    The content is written to a temporary file in the same folder and renamed over the
+    target, so readers only ever see the previous or the new complete file.
+
+    Args:
+        path (str | Path): File to write.
+        text (str): New file content.
+
+    Return:
+        None
+
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def file_version(path: str | Path) -> tuple | None:
+    """
+    Cheap version stamp of a file, changes whenever the file is rewritten or replaced.
+
+    Return:
+        tuple | None: (inode, mtime in ns, size), or None if the file does not exist.
+
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def read_json(path: str | Path, default=None):
+    """
+    Load a JSON file, returning 'default' (an empty dict if not given) when the file does not exist.
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {} if default is None else default
+
+
+def write_json(path: str | Path, data) -> None:
+    """
+    Write a JSON file atomically while holding its exclusive lock.
+    """
+    with FileLock(path):
+        atomic_write_text(path, json.dumps(data, indent=4))
+
+
+def update_json(path: str | Path, update, retries: int = 5):
+    """
+    Read-modify-write a shared JSON file without losing concurrent edits.
+
+    The file is read and modified without holding the lock. The lock is only taken to
+    check that nobody wrote the file in the meantime (optimistic version check) and to
+    write the result atomically. On a conflict the update is retried on the fresh data,
+    after 'retries' conflicts the whole read-modify-write runs under the lock.
+
+    Args:
+        path (str | Path): JSON file to update.
+        update (callable): Called with the loaded data, modifies it in place or returns the new data.
+        retries (int): Number of optimistic attempts before falling back to locking.
+
+    Return:
+        The data written to the file.
+
+    """
+    for attempt in range(retries):
+        version = file_version(path)
+        data = read_json(path)
+        result = update(data)
+        data = data if result is None else result
+        with FileLock(path):
+            if file_version(path) == version:
+                atomic_write_text(path, json.dumps(data, indent=4))
+                return data
+        logging.info(f"Concurrent write detected on {Path(path).name}, retrying ({attempt + 1}/{retries})")
+
+    with FileLock(path):
+        data = read_json(path)
+        result = update(data)
+        data = data if result is None else result
+        atomic_write_text(path, json.dumps(data, indent=4))
+        return data
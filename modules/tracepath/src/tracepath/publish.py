@@ -0,0 +1,459 @@
+import contextlib
+import getpass
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+from tracepath import events, locking, templates
+from tracepath.context import get_context
+
+logging.basicConfig(level=logging.ERROR, format="%(levelname)s: %(message)s")
+
+PUBLISH_DB_NAME = "published.db"
+PUBLISHED_JSON_NAME = "published_data.json"
+# Records per page when a query is streamed
+PAGE_SIZE = 200
+
+
+class PublishRecord(NamedTuple):
+    """
+    A publish record returned by PublishStore.query. Fields parsed from the path are None when
+    the path does not match a tracepath template.
+    """
+    id: int
+    publish_key: str
+    path: str
+    comment: str
+    group: str | None
+    item: str | None
+    task: str | None
+    version: int | None
+    user: str | None
+    created: float
+    metadata: dict | None
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "PublishRecord":
+        metadata = row[-1]
+        return cls(*row[:-1], json.loads(metadata) if metadata else None)
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class PublishStore:
+    """
+    Publish records of a show, stored in show_data/published.db (embedded SQLite).
+
+    A record is keyed by its publish key ("<group>_<item>") and file path, so adding,
+    reading or removing a publish touches one indexed row instead of loading and
+    rewriting the whole published_data.json. The group, item, task and version of a
+    record are parsed from its path with the tracepath templates.
+
+    On first use an existing published_data.json is imported, export_json writes the
+    records back in that format for tools still reading it.
+
+    Usage:
+        store = get_publish_store(show_data)
+        store.add("seq010_sh0010", path, "first lighting pass")
+        store.comment("seq010_sh0010", path)
+        store.query(group="seq010", item="sh0010", limit=20)  # latest 20 versions
+
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS publish (
+            id INTEGER PRIMARY KEY,
+            publish_key TEXT NOT NULL,
+            path TEXT NOT NULL,
+            comment TEXT NOT NULL DEFAULT '',
+            grp TEXT,
+            item TEXT,
+            task TEXT,
+            version INTEGER,
+            user TEXT,
+            created REAL NOT NULL,
+            metadata TEXT,
+            UNIQUE (publish_key, path)
+        );
+        CREATE INDEX IF NOT EXISTS publish_key_version ON publish (publish_key, version);
+        CREATE INDEX IF NOT EXISTS publish_key_order ON publish (publish_key, COALESCE(version, -1), id);
+        CREATE INDEX IF NOT EXISTS publish_context_order ON publish (grp, item, task, COALESCE(version, -1), id);
+        CREATE INDEX IF NOT EXISTS publish_created ON publish (created);
+        CREATE TABLE IF NOT EXISTS store_info (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, show_data: str | Path):
+        self.show_data = Path(show_data)
+        self.show_data.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.show_data / PUBLISH_DB_NAME
+        # show_data usually lives on shared storage where WAL is not safe, keep the rollback journal
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._pending_events = []
+        self.conn.executescript(self.SCHEMA)
+        self._import_legacy_json()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Groups several changes in one transaction, committed at the end of the block.
+        The write lock is taken up front (BEGIN IMMEDIATE), so a read-modify-write in the
+        block cannot interleave with another publisher. Nested blocks join the outer one.
+        """
+        with self._lock:
+            if self.conn.in_transaction:
+                yield self
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self
+            except BaseException:
+                self.conn.rollback()
+                self._pending_events.clear()
+                raise
+            self.conn.commit()
+            self._emit_events()
+
+    def _emit_events(self) -> None:
+        """
+        Announces the records added by the committed transaction on the publish event bus.
+        A failure is logged and does not undo the publish.
+        """
+        pending, self._pending_events = self._pending_events, []
+        if not pending:
+            return
+        show = self.show_data.parent.name
+        new_events = [events.PublishEvent.create(show, *record[:2], *record[3:9]) for record in pending]
+        try:
+            events.emit(self.show_data, new_events)
+        except OSError as e:
+            logging.error(f"Could not emit publish events for {self.show_data}: {e}")
+
+    # Records
+
+    @staticmethod
+    def _record(publish_key: str | None, path: str, comment: str, user: str | None, created: float | None,
+                metadata: dict | None) -> tuple:
+        parsed = templates.parse_path(path)
+        if not publish_key:
+            if not parsed or not parsed.group or not parsed.item:
+                raise ValueError(f"No publish key given for '{path}' and none can be parsed from it")
+            publish_key = f"{parsed.group}_{parsed.item}"
+        return (
+            publish_key, path, comment or "",
+            parsed.group if parsed else None,
+            parsed.item if parsed else None,
+            parsed.task if parsed else None,
+            parsed.version if parsed else None,
+            user if user is not None else getpass.getuser(),
+            created if created is not None else time.time(),
+            json.dumps(metadata) if metadata else None,
+        )
+
+    _UPSERT = """
+        INSERT INTO publish (publish_key, path, comment, grp, item, task, version, user, created, metadata)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (publish_key, path) DO UPDATE SET
+            comment = excluded.comment, grp = excluded.grp, item = excluded.item, task = excluded.task,
+            version = excluded.version, user = excluded.user, created = excluded.created,
+            metadata = excluded.metadata
+    """
+    # Used by imports: records already stored only get their comment updated
+    _UPSERT_COMMENT = """
+        INSERT INTO publish (publish_key, path, comment, grp, item, task, version, user, created, metadata)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (publish_key, path) DO UPDATE SET comment = excluded.comment
+    """
+
+    def add(self, publish_key: str, path: str, comment: str = "", user: str | None = None,
+            created: float | None = None, metadata: dict | None = None) -> None:
+        """
+        Records a published file, replacing the record of the same key and path.
+
+        Args:
+            publish_key (str): "<group>_<item>" key of the publish.
+            path (str): Published file path.
+            comment (str): Publish comment.
+            user (str | None): Publishing user, the current user if None.
+            created (float | None): Publish time (epoch seconds), now if None.
+            metadata (dict | None): Extra JSON serializable data.
+
+        """
+        record = self._record(publish_key, str(path), comment, user, created, metadata)
+        with self.transaction():
+            self.conn.execute(self._UPSERT, record)
+            self._pending_events.append(record)
+
+    def add_many(self, records: Iterable[dict], user: str | None = None, created: float | None = None) -> int:
+        """
+        Records many published files in one transaction, replacing the records of the same key
+        and path. Nothing is written if one of the records is invalid.
+
+        Args:
+            records (Iterable[dict]): Records with a "path" and optionally a "publish_key" (parsed
+                from the path if missing), "comment", "user", "created" and "metadata".
+            user (str | None): User of the records that have none, the current user if None.
+            created (float | None): Publish time of the records that have none, now if None.
+
+        Return:
+            int: The number of records written.
+
+        """
+        user = getpass.getuser() if user is None else user
+        created = time.time() if created is None else created
+        rows = [self._record(record.get("publish_key"), str(record["path"]), record.get("comment", ""),
+                             record.get("user", user), record.get("created", created), record.get("metadata"))
+                for record in records]
+        with self.transaction():
+            self.conn.executemany(self._UPSERT, rows)
+            self._pending_events.extend(rows)
+        return len(rows)
+
+    def remove(self, publish_key: str, path: str) -> bool:
+        """
+        Removes a published file record. Returns False if there was no such record.
+        """
+        with self.transaction():
+            cursor = self.conn.execute("DELETE FROM publish WHERE publish_key = ? AND path = ?",
+                                       (publish_key, str(path)))
+        return cursor.rowcount > 0
+
+    def comment(self, publish_key: str, path: str) -> str | None:
+        """
+        Returns the comment of a published file, or None if it was not published.
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT comment FROM publish WHERE publish_key = ? AND path = ?",
+                                    (publish_key, str(path))).fetchone()
+        return row[0] if row else None
+
+    def files(self, publish_key: str) -> dict[str, str]:
+        """
+        Returns the published files of a key with their comments, in publish order.
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT path, comment FROM publish WHERE publish_key = ? ORDER BY id",
+                                     (publish_key,)).fetchall()
+        return dict(rows)
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            rows = self.conn.execute("SELECT DISTINCT publish_key FROM publish ORDER BY publish_key").fetchall()
+        return [row[0] for row in rows]
+
+    # Queries
+
+    _COLUMNS = "id, publish_key, path, comment, grp, item, task, version, user, created, metadata"
+    # Records without a parsed version sort below version 0
+    _VERSION = "COALESCE(version, -1)"
+
+    @staticmethod
+    def _where(publish_key: str | None = None, group: str | None = None, item: str | None = None,
+               task: str | None = None, since: float | None = None, until: float | None = None,
+               user: str | None = None, text: str | None = None,
+               shot_manifest: bool = False) -> tuple[list[str], list]:
+        conditions, params = [], []
+        if shot_manifest:
+            conditions.append("task IS NULL")
+        for column, value in (("publish_key", publish_key), ("grp", group), ("item", item), ("task", task),
+                              ("user", user)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created < ?")
+            params.append(until)
+        if text:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            conditions.append("comment LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        return conditions, params
+
+    def _select(self, conditions: list[str], order: str) -> str:
+        sql = f"SELECT {self._COLUMNS} FROM publish"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql + f" ORDER BY {self._VERSION} {order}, id {order} LIMIT ?"
+
+    def query(self, limit: int | None = None, offset: int = 0, ascending: bool = False,
+              **filters) -> list[PublishRecord]:
+        """
+        Returns one page of publish records, sorted by version (latest first unless 'ascending').
+
+        Args:
+            limit (int | None): Maximum number of records, all of them if None.
+            offset (int): Number of matching records to skip.
+            ascending (bool): Sort from the oldest version to the latest.
+            **filters: Any of publish_key, group, item, task, user (exact match), since and until
+                (publish time range in epoch seconds, until excluded), text (comment substring,
+                case insensitive) and shot_manifest (only item shot manifests, no task layer records).
+
+        Return:
+            list[PublishRecord]: The matching records of the page.
+
+        """
+        conditions, params = self._where(**filters)
+        sql = self._select(conditions, "ASC" if ascending else "DESC") + " OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [PublishRecord.from_row(row) for row in rows]
+
+    def count(self, **filters) -> int:
+        """
+        Returns the number of records matching the query filters.
+        """
+        conditions, params = self._where(**filters)
+        sql = "SELECT COUNT(*) FROM publish"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def pages(self, page_size: int = PAGE_SIZE, ascending: bool = False, **filters) -> Iterator[list[PublishRecord]]:
+        """
+        Streams the records matching the query filters, one page at a time, in query() order.
+
+        Each page continues after the last record of the previous one (keyset pagination), so
+        records published or removed between two pages do not shift the following pages. No
+        cursor stays open while the caller holds a page.
+        """
+        conditions, params = self._where(**filters)
+        order, compare = ("ASC", ">") if ascending else ("DESC", "<")
+        last = None
+        while True:
+            page_conditions, page_params = list(conditions), list(params)
+            if last is not None:
+                page_conditions.append(f"({self._VERSION}, id) {compare} (?, ?)")
+                page_params += [-1 if last.version is None else last.version, last.id]
+            with self._lock:
+                rows = self.conn.execute(self._select(page_conditions, order), page_params + [page_size]).fetchall()
+            if not rows:
+                return
+            page = [PublishRecord.from_row(row) for row in rows]
+            yield page
+            if len(page) < page_size:
+                return
+            last = page[-1]
+
+    def iter_records(self, page_size: int = PAGE_SIZE, ascending: bool = False, **filters) -> Iterator[PublishRecord]:
+        """
+        Streams the records matching the query filters one by one, see pages().
+        """
+        for page in self.pages(page_size, ascending, **filters):
+            yield from page
+
+    # published_data.json compatibility
+
+    def to_dict(self) -> dict:
+        """
+        Returns the records in the published_data.json format: {publish_key: {path: comment}}.
+        """
+        data = {}
+        with self._lock:
+            rows = self.conn.execute("SELECT publish_key, path, comment FROM publish ORDER BY id").fetchall()
+        for publish_key, path, comment in rows:
+            data.setdefault(publish_key, {})[path] = comment
+        return data
+
+    def load_dict(self, data: dict, replace: bool = True, created: float = 0.0) -> None:
+        """
+        Loads records in the published_data.json format, in one transaction.
+        With 'replace', records that are not in 'data' are removed. Records already stored
+        keep their user and publish time, new ones get an unknown user and 'created'.
+        """
+        records = [self._record(publish_key, path, comment, "", created, None)
+                   for publish_key, files in data.items() for path, comment in files.items()]
+        with self.transaction():
+            if replace:
+                keep = {(publish_key, path) for publish_key, files in data.items() for path in files}
+                stored = self.conn.execute("SELECT publish_key, path FROM publish").fetchall()
+                self.conn.executemany("DELETE FROM publish WHERE publish_key = ? AND path = ?",
+                                      [row for row in stored if row not in keep])
+            self.conn.executemany(self._UPSERT_COMMENT, records)
+
+    def export_json(self, json_path: str | Path | None = None) -> Path:
+        """
+        Writes the records as a published_data.json file (show_data/published_data.json by default).
+        """
+        json_path = Path(json_path) if json_path else self.show_data / PUBLISHED_JSON_NAME
+        locking.write_json(json_path, self.to_dict())
+        logging.info(f"Exported published data to {json_path}")
+        return json_path
+
+    def _imported_json(self) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM store_info WHERE key = 'imported_json'").fetchone() is not None
+
+    def _import_legacy_json(self) -> None:
+        # Checked with a plain read first, the write lock of the shared database is only taken
+        # by the first opener, which imports published_data.json
+        if self._imported_json():
+            return
+        json_path = self.show_data / PUBLISHED_JSON_NAME
+        with self.transaction():
+            if self._imported_json():
+                return
+            if json_path.exists():
+                # The publish times are unknown, the file time is the closest known one
+                self.load_dict(locking.read_json(json_path), replace=False, created=json_path.stat().st_mtime)
+                logging.info(f"Imported {json_path} into {self.db_path}")
+            self.conn.execute("INSERT INTO store_info (key, value) VALUES ('imported_json', ?)", (str(time.time()),))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_publish_store(show_data: str | Path) -> PublishStore:
+    """
+    Returns the publish store of a show_data folder, opened once per process.
+    Stores are shared by resolved path, but keep the path they were opened with: the show named
+    in their publish events is the folder holding show_data as the tools see it, not the target
+    of a symlinked show root.
+    """
+    key = Path(show_data).resolve()
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = PublishStore(os.path.abspath(show_data))
+        return _stores[key]
+
+
+def publish_batch(records: Iterable[dict], show_data: str | Path | None = None, user: str | None = None,
+                  created: float | None = None) -> int:
+    """
+    Headless publish of many files at once, for farm jobs running in hython or plain Python.
+    Records are written in one transaction (see PublishStore.add_many), nothing is displayed.
+
+    Args:
+        records (Iterable[dict]): Records with a "path" and optionally a "publish_key", "comment",
+            "user", "created" and "metadata".
+        show_data (str | Path | None): show_data folder of the show, the one of the PR_* context if None.
+        user (str | None): User of the records that have none, the current user if None.
+        created (float | None): Publish time of the records that have none, now if None.
+
+    Return:
+        int: The number of records written.
+
+    Usage:
+        publish_batch([{"path": layer, "comment": "farm cache"} for layer in layers])
+
+    """
+    if show_data is None:
+        show_data = Path(get_context().require().show_root) / "show_data"
+    return get_publish_store(show_data).add_many(records, user, created)
@@ -112,7 +112,15 @@ class SaveFileDialog(QtWidgets.QDialog):
 
     def save_scene(self):
         if self.name_input.text():
-            _houdini.save_scene(self.scene_path)
+            # The previewed version may have been taken meanwhile, save to a reserved one
+            name = re.sub(r'[^a-zA-Z0-9]', '_', self.name_input.text())
+            self.scene_path = core_utils.reserve_scene_path("houdini", _houdini.hip_ext_from_session(), name)
+            try:
+                _houdini.save_scene(self.scene_path)
+            except Exception:
+                # Do not leave an empty placeholder taking the version
+                core_utils.release_version(self.scene_path)
+                raise
             self.close()
         else:
             hou.ui.displayMessage(
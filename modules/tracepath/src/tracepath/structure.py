@@ -1,16 +1,16 @@
-import os
+from tracepath.context import get_context
 
 
 # ==========================================
 # USD HDA functions to solve the env variables
 
 def get_env_group():
-    return os.environ.get("PR_GROUP")
+    return get_context().group
 
 
 def get_env_item():
-    return os.environ.get("PR_ITEM")
+    return get_context().item
 
 
 def get_env_task():
-    return os.environ.get("PR_TASK")
+    return get_context().task
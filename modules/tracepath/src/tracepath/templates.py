@@ -0,0 +1,312 @@
+import json
+import os
+import re
+import string
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+FOLDER_STRUCTURE_PATH = Path(__file__).parent / "folder_structure.json"
+
+# What a field matches when a path is parsed back, any other field is one path component
+FIELD_PATTERNS = {
+    "pr_projects_path": r".*?",
+    "version": r"\d+",
+    "padding": r"(?:\.\d+)?",  # ".$F4" once written: ".1001", or nothing
+    "file_format": r"\.[^./]+",
+    "ext": r"\.[^./]+",
+}
+COMPONENT_PATTERN = r"[^/]+"
+
+
+class TemplateError(RuntimeError):
+    """
+    A template of folder_structure.json is invalid or was formatted with missing fields.
+    """
+
+
+class PathContext(NamedTuple):
+    """
+    Context parsed back from a path by a template. Fields the template does not have are None.
+    """
+    template: str
+    projects_path: str | None
+    show: str | None
+    group: str | None
+    item: str | None
+    task: str | None
+    name: str | None
+    version: int | None
+    frame: int | None
+    dcc: str | None
+    ext: str | None
+    values: dict  # raw field values ("version": "003")
+
+
+def _context(template: str, values: dict) -> PathContext:
+    version = values.get("version")
+    padding = values.get("padding")
+    return PathContext(
+        template,
+        values.get("pr_projects_path"),
+        values.get("pr_show"),
+        values.get("pr_group"),
+        values.get("pr_item"),
+        values.get("pr_task"),
+        values.get("name"),
+        int(version) if version else None,
+        int(padding[1:]) if padding else None,
+        values.get("dcc"),
+        values.get("file_format") or values.get("ext"),
+        values,
+    )
+
+
+def _normalize(path) -> str:
+    path = os.fspath(path)
+    return path.replace(os.sep, "/") if os.sep != "/" else path
+
+
+class PathTemplate:
+    """
+    A compiled path template of folder_structure.json ("{pr_projects_path}/{pr_show}/...").
+
+    The template is parsed once: its fields are known up front and formatting is a single
+    str.format_map call. Missing fields are reported together, by name.
+
+    Usage:
+        templ = get_template("scene_file")
+        templ.fields  # frozenset({"pr_show", ...})
+        templ.format(pr_show="show", ...)
+
+    """
+    __slots__ = ("name", "pattern", "fields", "_format_map", "_parsed", "_regex")
+
+    def __init__(self, name: str, pattern: str):
+        self.name = name
+        self.pattern = pattern
+        fields = []
+        try:
+            parsed = list(string.Formatter().parse(pattern))
+        except ValueError as e:
+            raise TemplateError(f"Template '{name}' is malformed: {e}") from None
+        for _, field, format_spec, conversion in parsed:
+            if field is None:
+                continue
+            if not field.isidentifier() or format_spec or conversion:
+                raise TemplateError(f"Template '{name}' field '{{{field}}}' must be a plain name")
+            fields.append(field)
+        self.fields = frozenset(fields)
+        self._format_map = pattern.format_map
+        self._parsed = parsed
+        self._regex = None
+
+    def __repr__(self):
+        return f"PathTemplate({self.name!r}, {self.pattern!r})"
+
+    def missing(self, values: dict) -> list[str]:
+        return sorted(self.fields.difference(values))
+
+    def format(self, **values) -> str:
+        return self.format_map(values)
+
+    def format_map(self, values: dict) -> str:
+        """
+        Formats the template with a mapping. Extra values are ignored.
+        """
+        try:
+            return self._format_map(values)
+        except KeyError:
+            raise TemplateError(f"Template '{self.name}' is missing: {', '.join(self.missing(values))}") from None
+
+    def regex_source(self, prefix: str = "", root: str | None = None) -> str:
+        """
+        Unanchored regex matching the paths of the template. A field used twice must hold the
+        same value in both places. Group names are the field names, prefixed with 'prefix'.
+        With 'root', the projects path must be that folder.
+        """
+        parts, seen = [], set()
+        for literal, field, _, _ in self._parsed:
+            parts.append(re.escape(literal))
+            if field is None:
+                continue
+            group = prefix + field
+            if field in seen:
+                parts.append(f"(?P={group})")
+                continue
+            seen.add(field)
+            if field == "pr_projects_path" and root is not None:
+                pattern = re.escape(_normalize(root).rstrip("/"))
+            else:
+                pattern = FIELD_PATTERNS.get(field, COMPONENT_PATTERN)
+            parts.append(f"(?P<{group}>{pattern})")
+        return "".join(parts)
+
+    def parse(self, path) -> dict | None:
+        """
+        Returns the raw field values of a path made from this template, or None if it does not match.
+        """
+        if self._regex is None:
+            self._regex = re.compile(self.regex_source())
+        match = self._regex.fullmatch(_normalize(path))
+        return match.groupdict() if match else None
+
+
+def compile_template(name: str, value: str | list) -> PathTemplate | tuple[PathTemplate, ...]:
+    """
+    Compiles a folder_structure.json value: a string gives a PathTemplate, a list (a folder
+    and a file part, like "usd_shot_manifest_output") gives a tuple of PathTemplates.
+    """
+    if isinstance(value, str):
+        return PathTemplate(name, value)
+    if isinstance(value, list) and all(isinstance(part, str) for part in value):
+        return tuple(PathTemplate(name, part) for part in value)
+    raise TemplateError(f"Template '{name}' must be a string or a list of strings")
+
+
+class TemplateSet:
+    """
+    The compiled templates of a folder_structure.json file.
+
+    The file is read and compiled on first use and again only when its mtime or size
+    changes, each lookup costs one stat.
+    """
+
+    def __init__(self, path: str | Path = FOLDER_STRUCTURE_PATH):
+        self.path = Path(path)
+        self._templates = {}
+        self._raw = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        stat = os.stat(self.path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp == self._stamp:
+                return
+            with open(self.path) as f:
+                raw = json.load(f)
+            self._templates = {name: compile_template(name, value) for name, value in raw.items()}
+            self._raw = raw
+            self._stamp = stamp
+
+    def get(self, name: str) -> PathTemplate | tuple[PathTemplate, ...]:
+        """
+        Returns a compiled template, raises KeyError if the file has no such template.
+        """
+        self._load()
+        return self._templates[name]
+
+    def raw(self, name: str) -> str | list:
+        """
+        Returns a template as written in the file.
+        """
+        self._load()
+        return self._raw[name]
+
+    def names(self) -> list[str]:
+        self._load()
+        return list(self._templates)
+
+
+class PathParser:
+    """
+    Parses paths back into PathContexts with the templates of a TemplateSet, without any
+    environment setup.
+
+    Every template is compiled into one anchored alternative of a single regex, so each
+    path is classified by one regex match whatever the number of templates. Templates are
+    tried from the most specific (most literal characters) to the least specific. The
+    two-part templates (folder, file) are matched as their joined path.
+
+    Usage:
+        parser = PathParser(root=projects_path)  # a known root makes matching several times faster
+        parser.parse("/projects/show/seq010/sh0010/main/v003/sh0010_v003.usda").version  # 3
+        contexts = parser.classify(paths)
+
+    """
+
+    def __init__(self, template_set: "TemplateSet | None" = None, names: list[str] | None = None,
+                 root: str | None = None):
+        self.template_set = template_set or get_template_set()
+        self.names = names
+        self.root = root
+        self._stamp = None
+        self._regex = None
+        self._groups = {}  # alternative group -> (template name, fields, field groups)
+
+    def _compile(self) -> re.Pattern:
+        self.template_set._load()
+        if self._regex is not None and self._stamp == self.template_set._stamp:
+            return self._regex
+        candidates = []
+        for name in self.names or self.template_set.names():
+            template = self.template_set.get(name)
+            if isinstance(template, tuple):
+                template = PathTemplate(name, "".join(part.pattern for part in template))
+            literal = sum(len(part[0]) for part in template._parsed)
+            candidates.append((literal, name, template))
+        candidates.sort(key=lambda candidate: -candidate[0])
+
+        alternatives, groups = [], {}
+        for i, (_, name, template) in enumerate(candidates):
+            prefix = f"t{i}_"
+            alternatives.append(f"(?P<t{i}>{template.regex_source(prefix, self.root)})")
+            fields = tuple(template.fields)
+            groups[f"t{i}"] = (name, fields, tuple(prefix + field for field in fields))
+        self._regex = re.compile("|".join(alternatives) or "(?!)")
+        self._groups = groups
+        self._stamp = self.template_set._stamp
+        return self._regex
+
+    def _match(self, match: re.Match) -> PathContext:
+        name, fields, groups = self._groups[match.lastgroup]
+        return _context(name, dict(zip(fields, match.group(*groups))))
+
+    def parse(self, path) -> PathContext | None:
+        """
+        Returns the context of a path, or None if no template matches it.
+        """
+        match = self._compile().fullmatch(_normalize(path))
+        return self._match(match) if match else None
+
+    def classify(self, paths) -> list[PathContext | None]:
+        """
+        Parses many paths (a folder scan) with one compiled regex, in order.
+        """
+        fullmatch = self._compile().fullmatch
+        results = []
+        for path in paths:
+            match = fullmatch(_normalize(path))
+            results.append(self._match(match) if match else None)
+        return results
+
+
+_template_set = TemplateSet()
+_parsers = {}
+
+
+def get_template_set() -> TemplateSet:
+    return _template_set
+
+
+def get_template(name: str) -> PathTemplate | tuple[PathTemplate, ...]:
+    """
+    Returns a compiled template of the tracepath folder_structure.json.
+    """
+    return _template_set.get(name)
+
+
+def parse_path(path, names: list[str] | None = None, root: str | None = None) -> PathContext | None:
+    """
+    Returns the context of a path made from the tracepath templates, or None.
+    The parser of each template selection is compiled once per process.
+    """
+    key = (tuple(names) if names else None, root)
+    parser = _parsers.get(key)
+    if parser is None:
+        parser = _parsers[key] = PathParser(names=names, root=root)
+    return parser.parse(path)
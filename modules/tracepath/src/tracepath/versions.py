@@ -0,0 +1,193 @@
+import os
+import re
+import threading
+import time
+
+# Version token of a folder or file name: the last "v<digits>" ("v003", "shot_v003.hip")
+VERSION_PATTERN = re.compile(r"v(\d+)(?!.*v\d)")
+# Version folder name, nothing else ("v003")
+VERSION_FOLDER = re.compile(r"^v(\d+)$")
+
+# Directory mtimes this close to the listing time may hide a change made in the same
+# timestamp tick (coarse network filesystems), such listings are re-read on next use
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def parse_version(name: str) -> int | None:
+    """
+    Returns the version number of a folder or file name, or None if it is not versioned.
+    """
+    match = VERSION_PATTERN.search(name)
+    return int(match.group(1)) if match else None
+
+
+def _is_fresh(mtime_ns: int, listed_ns: int, current_mtime_ns: int) -> bool:
+    return mtime_ns == current_mtime_ns and listed_ns - mtime_ns > RACY_WINDOW_NS
+
+
+class VersionCatalog:
+    """
+    Version folders of a context folder ("v001", "v002"...) and the files inside them.
+
+    Folders are matched strictly, so version 1 never resolves to "v0010" or "v001_old".
+    The files of a version folder are listed on first use and cached while the folder
+    mtime is unchanged.
+    """
+    __slots__ = ("context", "folders", "_files")
+
+    def __init__(self, context: str, folders: dict[int, str]):
+        self.context = context
+        self.folders = folders  # version -> folder path
+        self._files = {}  # version -> (mtime_ns, listed_ns, files)
+
+    def versions(self) -> list[int]:
+        return sorted(self.folders)
+
+    def folder(self, version: int) -> str | None:
+        return self.folders.get(int(version))
+
+    def files(self, version: int) -> tuple[str, ...]:
+        """
+        Returns the files of a version folder named with that version ("shot_v003.usda"), sorted.
+        """
+        version = int(version)
+        folder = self.folders.get(version)
+        if folder is None:
+            return ()
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            return ()
+        cached = self._files.get(version)
+        if cached and _is_fresh(cached[0], cached[1], mtime_ns):
+            return cached[2]
+
+        listed_ns = time.time_ns()
+        with os.scandir(folder) as entries:
+            files = tuple(sorted(entry.path for entry in entries
+                                 if entry.is_file() and parse_version(entry.name) == version))
+        self._files[version] = (mtime_ns, listed_ns, files)
+        return files
+
+    def latest_written(self) -> int | None:
+        """
+        Returns the highest version whose folder holds a file of that version, skipping the
+        empty folders reserved by writes that are still running or that failed.
+        """
+        for version in reversed(self.versions()):
+            if self.files(version):
+                return version
+        return None
+
+    def find_file(self, version: int) -> str | None:
+        """
+        Returns the first file of a version, or None if the version or its file does not exist.
+        """
+        files = self.files(version)
+        return files[0] if files else None
+
+
+class _Entry:
+    __slots__ = ("mtime_ns", "listed_ns", "versions", "catalog")
+
+    def __init__(self, mtime_ns: int, listed_ns: int, versions: tuple, catalog: VersionCatalog):
+        self.mtime_ns = mtime_ns
+        self.listed_ns = listed_ns
+        self.versions = versions
+        self.catalog = catalog
+
+
+class VersionCache:
+    """
+    Parsed, sorted version numbers of versioned folders, keyed by directory path.
+
+    A directory is listed once in a single scandir pass that gives both its version
+    numbers and its VersionCatalog. Later calls only stat it and reuse them while its
+    mtime is unchanged (creating or deleting an entry changes the mtime of its
+    parent directory). Folders known to have changed can be dropped with invalidate.
+
+    Usage:
+        cache = get_version_cache()
+        cache.latest(context)  # 12
+        cache.next(context)  # 13
+
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, context: str) -> _Entry | None:
+        context = os.path.normpath(str(context))
+        try:
+            mtime_ns = os.stat(context).st_mtime_ns
+        except (FileNotFoundError, NotADirectoryError):
+            self.invalidate(context)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(context)
+        if entry and _is_fresh(entry.mtime_ns, entry.listed_ns, mtime_ns):
+            return entry
+
+        listed_ns = time.time_ns()
+        versions, folders = set(), {}
+        with os.scandir(context) as entries:
+            for dir_entry in entries:
+                version = parse_version(dir_entry.name)
+                if version is None:
+                    continue
+                versions.add(version)
+                if VERSION_FOLDER.match(dir_entry.name) and dir_entry.is_dir():
+                    folders[version] = dir_entry.path
+        entry = _Entry(mtime_ns, listed_ns, tuple(sorted(versions)), VersionCatalog(context, folders))
+        with self._lock:
+            self._entries[context] = entry
+        return entry
+
+    def all(self, context: str) -> tuple[int, ...]:
+        """
+        Returns the version numbers found in the context folder, sorted, or () if it does not exist.
+        """
+        entry = self._entry(context)
+        return entry.versions if entry else ()
+
+    def catalog(self, context: str) -> VersionCatalog:
+        """
+        Returns the version folders of the context folder, empty if it does not exist.
+        """
+        entry = self._entry(context)
+        return entry.catalog if entry else VersionCatalog(os.path.normpath(str(context)), {})
+
+    def latest(self, context: str) -> int | None:
+        """
+        Returns the highest version number of the context folder, or None if there is none.
+        """
+        versions = self.all(context)
+        return versions[-1] if versions else None
+
+    def next(self, context: str) -> int:
+        """
+        Returns the version number following the latest one, 1 if there is none.
+        """
+        return (self.latest(context) or 0) + 1
+
+    def invalidate(self, context: str | None = None) -> None:
+        """
+        Forgets the cached versions of a folder, or of every folder.
+        """
+        with self._lock:
+            if context is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.normpath(str(context)), None)
+
+
+_version_cache = VersionCache()
+
+
+def get_version_cache() -> VersionCache:
+    """
+    Returns the version cache shared by the tools of the process.
+    """
+    return _version_cache
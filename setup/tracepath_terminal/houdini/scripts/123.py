@@ -1,6 +1,8 @@
 import os
 import hou
 
+from tracepath.context import get_context
+
 
 def _warn(msg):
     try:
@@ -11,18 +13,14 @@ def _warn(msg):
 
 
 def add_env():
-    env_vars = ["PR_PROJECTS_PATH", "PR_SHOW", "PR_GROUP", "PR_ITEM", "PR_TASK"]
-
     try:
-        env = {var: os.getenv(var) for var in env_vars}
-        missing = [var for var, val in env.items() if not val]
+        context = get_context()
+        missing = context.missing()
         if missing:
             _warn(f"Missing environment variables: {', '.join(missing)}.\n"
                   "Launching Houdini with default environment.")
-        context = os.path.join(env["PR_PROJECTS_PATH"], env["PR_SHOW"],
-                               env["PR_GROUP"], env["PR_ITEM"], env["PR_TASK"])
 
-        scenes = os.path.join(context, "houdini/scenes")
+        scenes = os.path.join(context.task_root, "houdini/scenes")
         hip_file = os.path.join(scenes, "untitled.hip")
 
         hou.putenv("JOB", scenes)
@@ -34,4 +32,16 @@ def add_env():
             f"Tracepath could not set Houdini environment because of the following error:\n{e!r}")
 
 
+def watch_publishes():
+    # Without a show there is nothing to follow, add_env already reported the missing variables
+    if get_context().missing("projects_path", "show"):
+        return
+    try:
+        from tracepath import _houdini
+        _houdini.start_publish_events()
+    except Exception as e:
+        _warn(f"Tracepath could not subscribe to publish events:\n{e!r}")
+
+
 add_env()
+watch_publishes()